@@ -0,0 +1,124 @@
+import asyncio
+import itertools
+import queue
+import threading
+from .task import Task, TaskTimeout
+from .utils import interrupt_thread
+
+class AsyncLoop:
+    """
+    one event loop thread that runs tasks with at most max_workers in flight,
+    coroutine functions run on the loop (and are cancelled at their deadline),
+    plain functions run on daemon threads of the loop that the watchdog expires
+    at the deadline like thread mode workers (and interrupts with hard_timeout)
+    """
+
+    def __init__(self, max_workers: int, maxsize: int = 0, name: str = 'AsyncLoop', watchdog=None, hard_timeout: bool = False):
+        self.max_workers = max_workers
+        self.maxsize = maxsize or 0
+        self.name = name
+        self.watchdog = watchdog
+        self.hard_timeout = hard_timeout
+        self.calls = queue.SimpleQueue() # plain function tasks for the daemon threads
+        self.idle = threading.Semaphore(0)
+        self.threads = []
+        self.counter = itertools.count()
+        self.size = 0 # queued tasks
+        self.running = 0
+        self.cond = threading.Condition()
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.queue = asyncio.PriorityQueue()
+        self.consumers = [self.loop.create_task(self.consume()) for _ in range(self.max_workers)]
+        self.ready.set()
+        self.loop.run_forever()
+
+    def put(self, priority, task: Task, block: bool = True, timeout: float = None, worker_id: int = None) -> bool:
+        with self.cond:
+            if self.maxsize:
+                if not block and self.size >= self.maxsize:
+                    return False
+                if not self.cond.wait_for(lambda: self.size < self.maxsize, timeout=timeout):
+                    return False
+            self.size += 1
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (priority, next(self.counter), task))
+        return True
+
+    async def consume(self):
+        while True:
+            priority, _, task = await self.queue.get()
+            with self.cond:
+                self.size -= 1
+                self.running += 1
+                self.cond.notify()
+            try:
+                if asyncio.iscoroutinefunction(task.fn):
+                    await task.run_async()
+                else:
+                    # the slot is freed once the task finishes or expires
+                    self.call(task)
+                    await asyncio.gather(asyncio.wrap_future(task.future), return_exceptions=True)
+            finally:
+                self.running -= 1
+
+    def call(self, task: Task):
+        """runs a plain function task on an idle daemon thread, starting one if none is idle"""
+        if not self.idle.acquire(blocking=False):
+            thread = threading.Thread(target=self.call_loop, name=f'{self.name}_{len(self.threads)}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        self.calls.put(task)
+
+    def call_loop(self):
+        while True:
+            task = self.calls.get()
+            if task is None:
+                return
+            watch = None
+            if self.watchdog is not None:
+                watch = self.watchdog.watch(task.deadline, self.on_timeout, task)
+            try:
+                task.run()
+            except TaskTimeout:
+                # hard timeout, the task has already been expired
+                pass
+            if watch is not None:
+                self.watchdog.cancel(watch)
+            self.idle.release()
+
+    def on_timeout(self, task: Task):
+        """called by the watchdog at the deadline of a running plain function"""
+        if not task.expire() or not self.hard_timeout:
+            return
+        with task.lock:
+            # fn may have returned since the deadline, never interrupt the thread once it left the task
+            if task.thread is not None:
+                interrupt_thread(task.thread, TaskTimeout)
+
+    def qsize(self) -> int:
+        return self.size
+
+    def empty(self) -> bool:
+        return self.size == 0
+
+    def full(self) -> bool:
+        return bool(self.maxsize) and self.size >= self.maxsize
+
+    def stats(self) -> dict:
+        return {'size': self.size, 'running': self.running}
+
+    def close(self):
+        async def stop():
+            for consumer in self.consumers:
+                consumer.cancel()
+            await asyncio.gather(*self.consumers, return_exceptions=True)
+            self.loop.stop()
+        asyncio.run_coroutine_threadsafe(stop(), self.loop)
+        for _ in self.threads:
+            self.calls.put(None)
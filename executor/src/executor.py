@@ -1,8 +1,5 @@
-
 import os
-import sys
 import time
-import queue
 import weakref
 import itertools
 import threading
@@ -12,8 +9,24 @@ from typing import Callable
 from concurrent.futures._base import Future
 import time
 from tqdm import tqdm
-from .task import Task, NULL_TASK
-from .utils import new_event_loop, detailed_error, wait
+from .task import Task, TaskTimeout
+from .queues import TaskQueue, StealingQueue
+from .watchdog import Watchdog
+from .process import ProcessWorker
+from .aio import AsyncLoop
+from .telemetry import Telemetry
+from .utils import new_event_loop, detailed_error, wait, interrupt_thread
+
+class Worker:
+    """a worker thread slot, abandoned workers finish their task and exit"""
+    def __init__(self, idx:int, executor:'Executor'):
+        self.idx = idx
+        self.executor = weakref.ref(executor)
+        self.thread = None
+        self.task = None
+        self.process = None # the ProcessWorker of the slot in process mode
+        self.abandoned = False
+        self.lock = threading.Lock()
 
 class Executor:
     """Base threadpool executor with a priority queue"""
@@ -22,6 +35,7 @@ class Executor:
     _counter = itertools.count().__next__
     # submit.__doc__ = _base.Executor.submit.__doc__
     threads_queues = weakref.WeakKeyDictionary()
+    modes = ['thread', 'steal', 'process', 'async']
 
     def __init__(
         self,
@@ -29,27 +43,55 @@ class Executor:
         maxsize : int = None ,
         thread_name_prefix : str ="",
         mode = 'thread',
+        hard_timeout : bool = False,
+        hard_timeout_grace : float = 1.0,
     ):
         """Initializes a new Executor instance.
         Args:
             max_workers: The maximum number of threads that can be used to
                 execute the given calls.
             thread_name_prefix: An optional name prefix to give our threads.
+            mode: thread (one shared priority queue), steal (a priority
+                queue per worker with work stealing), process (every worker
+                slot drives a pre-forked process, large numpy arguments go
+                through shared memory) or async (one event loop running at
+                most max_workers tasks, coroutines run on the loop)
+            hard_timeout: interrupt the worker thread of a timed out task,
+                if it is still stuck after hard_timeout_grace seconds the
+                worker is abandoned and replaced so the slot is freed
+                (process mode always kills the process of a timed out task)
         """
         self.start_time = time.time()
-        max_workers = (os.cpu_count() or 1) * 5 if max_workers == None else max_workers
+        if max_workers == None:
+            max_workers = (os.cpu_count() or 1) * (1 if mode == 'process' else 5)
         maxsize = max_workers * 10 or None
         if max_workers <= 0:
             raise ValueError("max_workers must be greater than 0")
+        assert mode in self.modes, f'mode {mode} not in {self.modes}'
         self.mode = mode
         self.max_workers = max_workers
-        self.task_queue = queue.PriorityQueue(maxsize=maxsize)
+        self.thread_name_prefix = thread_name_prefix or ("Executor-%d" % self._counter() )
+        self.processes = []
+        self.watchdog = Watchdog(name=f'{self.thread_name_prefix}_watchdog')
+        if mode == 'steal':
+            self.task_queue = StealingQueue(num_workers=max_workers, maxsize=maxsize)
+        elif mode == 'async':
+            self.task_queue = AsyncLoop(max_workers=max_workers, maxsize=maxsize, name=f'{self.thread_name_prefix}_loop',
+                                        watchdog=self.watchdog, hard_timeout=hard_timeout)
+        else:
+            self.task_queue = TaskQueue(maxsize=maxsize)
+        if mode == 'process':
+            # warm workers so the first tasks do not pay for the fork
+            self.processes = [ProcessWorker() for _ in range(max_workers)]
+        self.hard_timeout = hard_timeout
+        self.hard_timeout_grace = hard_timeout_grace
         self.idle_semaphore = threading.Semaphore(0)
+        self.workers = [None] * max_workers
         self.threads = []
         self.broken = False
-        self.shutdown = False
+        self._shutdown = False
         self.shutdown_lock = threading.Lock()
-        self.thread_name_prefix = thread_name_prefix or ("Executor-%d" % self._counter() )
+        self.telemetry = Telemetry()
 
     @property
     def is_empty(self):
@@ -59,17 +101,17 @@ class Executor:
     def is_full(self):
         return self.task_queue.full()
 
-    def submit(self, 
+    def submit(self,
                fn: Callable,
                 params = None,
-                args:dict=None, 
-                kwargs:dict=None, 
+                args:dict=None,
+                kwargs:dict=None,
                 priority:int=1,
-                timeout=200, 
+                timeout=200,
                 return_future:bool=True,
-                wait = True, 
+                wait = True,
                 path:str=None) -> Future:
-        
+
         args = args or []
         kwargs = kwargs or {}
         if params != None:
@@ -82,38 +124,55 @@ class Executor:
                 args = params
             else:
                 raise ValueError(f"params must be a list or a dict {params, args, kwargs}")
-        # check if the queue is full and if so, raise an exception
-        if self.task_queue.full():
-            if wait:
-                while self.task_queue.full():
-                    time.sleep(0.1)
-            else:
-                return {'success': False, 'msg':"cannot schedule new futures after maxsize exceeded"}
         with self.shutdown_lock:
             if self.broken:
                 raise Exception("Executor is broken")
-            if self.shutdown:
+            if self._shutdown:
                 raise RuntimeError("cannot schedule new futures after shutdown")
 
-            task = Task(fn=fn, params=dict(args=args, kwargs=kwargs), timeout=timeout, path=path)
-            # add the work item to the queue
+        task = Task(fn=fn, params=dict(args=args, kwargs=kwargs), timeout=timeout, path=path, on_done=self.telemetry.record)
+        self.telemetry.submit(task)
 
-            # if the function has a cost attribute, multiply the priority by the cost
-            priority = kwargs.pop("priority", 1)
-            if hasattr(fn, '__cost__'):
-                priority = fn.__cost__ * priority
+        # if the function has a cost attribute, multiply the priority by the cost
+        priority = kwargs.pop("priority", priority)
+        if hasattr(fn, '__cost__'):
+            priority = fn.__cost__ * priority
+
+        # block on the queue condition when it is full (backpressure)
+        if not self.task_queue.put(priority, task, block=wait, worker_id=self.current_worker_idx()):
+            return {'success': False, 'msg':"cannot schedule new futures after maxsize exceeded"}
+        # adjust the thread count to match the new task
+        self.adjust_thread_count()
 
-            self.task_queue.put((priority, task), block=False)
-            # adjust the thread count to match the new task
-            self.adjust_thread_count()
-            
         # return the future (MAYBE WE CAN RETURN THE TASK ITSELF)
         if return_future:
             return task.future
-        
+
         return task.future.result()
 
+    def submit_many(self, fn: Callable, params: list, **kwargs) -> list:
+        """submits fn once per params (a list of args lists or kwargs dicts)"""
+        return [self.submit(fn=fn, params=p, **kwargs) for p in params]
+
+    def map(self, fn: Callable, *iterables, timeout=200, priority:int=1):
+        """like the builtin map, submits every call now and returns a generator of the results in order"""
+        futures = [self.submit(fn=fn, args=list(args), timeout=timeout, priority=priority) for args in zip(*iterables)]
+        def results():
+            for future in futures:
+                yield future.result()
+        return results()
+
+    def current_worker_idx(self):
+        """the slot of the calling worker thread so nested submits stay local (steal mode)"""
+        worker = getattr(threading.current_thread(), 'worker', None)
+        if worker is not None and worker.executor() is self:
+            return worker.idx
+        return None
+
     def adjust_thread_count(self):
+        if self.mode == 'async':
+            # the event loop thread runs everything
+            return
         # if idle threads are available, don't spin new threads
         if self.idle_semaphore.acquire(timeout=0):
             return
@@ -121,28 +180,41 @@ class Executor:
         # When the executor gets lost, the weakref callback will wake up
         # the worker threads.
         def weakref_cb(_, q=self.task_queue):
-            q.put(NULL_TASK)
+            q.close()
 
-        num_threads = len(self.threads)
-        if num_threads < self.max_workers:
-            thread_name = "%s_%d" % (self.thread_name_prefix or self, num_threads)
+        with self.shutdown_lock:
+            free_slots = [i for i, w in enumerate(self.workers) if w is None]
+            if not free_slots:
+                return
+            idx = free_slots[0]
+            worker = Worker(idx, self)
+            thread_name = "%s_%d" % (self.thread_name_prefix or self, idx)
             t = threading.Thread(
                 name=thread_name,
                 target=self.worker,
                 args=(
                     weakref.ref(self, weakref_cb),
                     self.task_queue,
+                    worker,
                 ),
             )
             t.daemon = True
+            t.worker = worker
+            worker.thread = t
+            if self.processes:
+                worker.process = self.processes[idx]
+            self.workers[idx] = worker
             t.start()
             self.threads.append(t)
             self.threads_queues[t] = self.task_queue
 
     def shutdown(self, wait=True):
         with self.shutdown_lock:
-            self.shutdown = True
-            self.task_queue.put(NULL_TASK)
+            self._shutdown = True
+            self.task_queue.close()
+        self.watchdog.close()
+        for p in self.processes:
+            p.close()
         if wait:
             for t in self.threads:
                 try:
@@ -150,68 +222,125 @@ class Executor:
                 except Exception:
                     pass
 
+    def on_timeout(self, task: Task, worker: Worker):
+        """called by the watchdog at the deadline of a running task"""
+        if not task.expire():
+            return
+        if worker.process is not None:
+            with worker.lock:
+                if worker.task is task:
+                    worker.process.kill()
+            return
+        if not self.hard_timeout:
+            return
+        with task.lock:
+            # fn may have returned since the deadline, never interrupt the thread once it left the task
+            if task.thread is not worker.thread:
+                return
+            interrupt_thread(worker.thread, TaskTimeout)
+        self.watchdog.watch(time.time() + self.hard_timeout_grace, self.on_stuck, task, worker)
+
+    def on_stuck(self, task: Task, worker: Worker):
+        """the interrupt did not land (ie blocked in C), give the slot to a new worker"""
+        with self.shutdown_lock:
+            if worker.task is not task or worker.abandoned:
+                return
+            worker.abandoned = True
+            self.workers[worker.idx] = None
+            self.threads = [t for t in self.threads if t is not worker.thread]
+        logger.warning(f'abandoned worker {worker.thread.name} stuck on {task.state["fn"]}')
+        if not self.is_empty:
+            self.adjust_thread_count()
+
     @classmethod
-    def worker(cls, executor_reference, task_queue):
+    def worker(cls, executor_reference, task_queue, worker):
         new_event_loop()
         try:
-            while True:
-                work_item = task_queue.get(block=True)
-                priority = work_item[0]
-
-                if priority == sys.maxsize:
-                    # Wake up queue management thread.
-                    task_queue.put(NULL_TASK)
-                    break
-
-                item = work_item[1]
-
-                if item is not None:
-                    item.run()
-                    # Delete references to object. See issue16284
-                    del item
-                    continue
-
-                executor = executor_reference()
-                # Exit if:
-                #   - The interpreter is shutting down OR
-                #   - The executor that owns the worker has been collected OR
-                #   - The executor that owns the worker has been shutdown.
-                if executor is None or executor.shutdown:
-                    # Flag the executor as shutting down as early as possible if it
-                    # is not gc-ed yet.
-                    if executor is not None:
-                        executor.shutdown = True
-                    # Notice other workers
-                    task_queue.put(NULL_TASK)
-                    return
-                del executor
+            while not worker.abandoned:
+                try:
+                    if not cls.work(executor_reference, task_queue, worker):
+                        break
+                except TaskTimeout:
+                    # hard timeout, the task has already been expired
+                    worker.task = None
         except Exception as e:
             e = detailed_error(e)
 
+    @classmethod
+    def work(cls, executor_reference, task_queue, worker) -> bool:
+        """runs one task, returns False when the worker should exit"""
+        work_item = task_queue.get(worker.idx)
+        if work_item is None:
+            # the queue was closed (shutdown or executor collected)
+            return False
+        item = work_item[1]
+        executor = executor_reference()
+        watch = None
+        if executor is not None:
+            worker.task = item
+            watchdog = executor.watchdog
+            watch = watchdog.watch(item.deadline, executor.on_timeout, item, worker)
+            del executor
+        item.run(runner=worker.process.call if worker.process else None)
+        with worker.lock:
+            worker.task = None
+        if watch is not None:
+            watchdog.cancel(watch)
+        # Delete references to object. See issue16284
+        del item
+        executor = executor_reference()
+        # Exit if:
+        #   - The interpreter is shutting down OR
+        #   - The executor that owns the worker has been collected OR
+        #   - The executor that owns the worker has been shutdown.
+        if executor is None or (executor._shutdown and executor.is_empty):
+            return False
+        executor.idle_semaphore.release()
+        return True
+
+    def stats(self, recent:bool=False) -> dict:
+        """
+        cheap snapshot: executor status plus per function submit->start wait, 
+        run time percentiles and complete/failed/timeout/cancelled counts
+        """
+        return {**self.status(), **self.telemetry.snapshot(recent=recent)}
+
+    def prometheus(self, prefix:str='executor') -> str:
+        """the stats in prometheus text format"""
+        gauges = {k: v for k, v in self.status().items() if not isinstance(v, bool)}
+        return self.telemetry.prometheus(prefix=prefix, gauges=gauges)
+
     @property
     def num_tasks(self):
         return self.task_queue.qsize()
 
+    @property
+    def num_workers(self):
+        return len([w for w in self.workers if w is not None])
+
     @property
     def is_empty(self):
         return self.task_queue.empty()
-    
+
     def status(self):
         return dict(
-            num_threads = len(self.threads),
+            mode = self.mode,
+            num_threads = self.num_workers,
             num_tasks = self.num_tasks,
+            num_watched = len(self.watchdog),
             is_empty = self.is_empty,
-            is_full = self.is_full
+            is_full = self.is_full,
+            **{f'queue_{k}': v for k, v in self.task_queue.stats().items()}
         )
 
     @classmethod
-    def test(cls):
+    def test(cls, mode='thread'):
         def fn(x):
             result =  x*2
             print(result)
             return result
-            
-        self = cls()
+
+        self = cls(mode=mode)
         futures = []
         for i in range(10):
             futures += [self.submit(fn=fn, kwargs=dict(x=i))]
@@ -221,9 +350,60 @@ class Executor:
             futures += [self.submit(fn=fn, kwargs=dict(x=i))]
 
         results = wait(futures, timeout=10)
-        
+        assert list(self.map(fn, range(10))) == [fn(i) for i in range(10)]
+        stats = self.stats()['fns']
+        assert sum(s['complete'] for s in stats.values()) == 30, stats
+
         while self.num_tasks > 0:
             print(self.num_tasks, 'tasks remaining')
 
 
         return {'success': True, 'msg': 'thread pool test passed'}
+
+    @classmethod
+    def benchmark(cls, n:int=200, size:int=200000, modes:list=None, max_workers:int=None):
+        """
+        the test workload scaled up and made cpu bound, tasks/second per mode
+        """
+        results = {}
+        for mode in modes or cls.modes:
+            self = cls(mode=mode, max_workers=max_workers or (os.cpu_count() or 1))
+            t0 = time.time()
+            futures = [self.submit(fn=burn, kwargs=dict(x=i, size=size), timeout=600) for i in range(n)]
+            wait(futures, timeout=600)
+            duration = time.time() - t0
+            self.shutdown()
+            results[mode] = {'duration': duration, 'tasks_per_second': n / duration}
+        return results
+
+    @classmethod
+    def test_timeout(cls, modes:list=None):
+        for mode in modes or ['thread', 'steal', 'async']:
+            self = cls(max_workers=1, mode=mode, hard_timeout=True, hard_timeout_grace=0.5)
+            beats = []
+            def hang():
+                while True:
+                    beats.append(time.time())
+                    time.sleep(0.01)
+            future = self.submit(fn=hang, timeout=0.5)
+            try:
+                future.result(timeout=2)
+                raise AssertionError(f'hung task did not time out in {mode} mode')
+            except TimeoutError:
+                pass
+            # the timed out function must stop, not keep running in the background
+            time.sleep(self.hard_timeout_grace)
+            n = len(beats)
+            time.sleep(0.1)
+            assert len(beats) == n, f'timed out task is still running in {mode} mode'
+            # the interrupted worker must be free for the next task
+            assert self.submit(fn=lambda: 1, timeout=2).result(timeout=2) == 1
+            self.shutdown()
+        return {'success': True, 'msg': 'timeout test passed'}
+
+def burn(x:int, size:int=200000) -> int:
+    """cpu bound benchmark task"""
+    total = 0
+    for i in range(size):
+        total += (i * x) % 7
+    return total
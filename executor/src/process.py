@@ -0,0 +1,137 @@
+import threading
+import multiprocessing as mp
+from .utils import detailed_error
+
+try:
+    import cloudpickle as pickle # lambdas and closures
+except ImportError:
+    import pickle
+
+class SharedArray:
+    """a numpy array passed through shared memory instead of the pipe"""
+
+    def __init__(self, array: 'np.ndarray'):
+        from multiprocessing.shared_memory import SharedMemory
+        self.shape = array.shape
+        self.dtype = array.dtype.str
+        self.shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.name = self.shm.name
+        import numpy as np
+        np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)[...] = array
+
+    def __getstate__(self):
+        return {'name': self.name, 'shape': self.shape, 'dtype': self.dtype}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = None
+
+    def attach(self) -> 'np.ndarray':
+        """maps the array in the worker process without copying"""
+        import numpy as np
+        from multiprocessing.shared_memory import SharedMemory
+        self.shm = SharedMemory(name=self.name)
+        try:
+            # the parent owns the block, do not let the worker's tracker unlink it
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+
+    def unlink(self):
+        self.shm.close()
+        self.shm.unlink()
+
+def share_arrays(args: list, kwargs: dict, min_bytes: int) -> tuple:
+    """swaps top level numpy arguments of at least min_bytes for shared memory handles"""
+    shared = []
+    def share(x):
+        if type(x).__name__ == 'ndarray' and type(x).__module__ == 'numpy' and x.nbytes >= min_bytes and not x.dtype.hasobject:
+            x = SharedArray(x)
+            shared.append(x)
+        return x
+    args = [share(a) for a in args]
+    kwargs = {k: share(v) for k, v in kwargs.items()}
+    return args, kwargs, shared
+
+def process_main(conn):
+    """the loop of a warm worker process: receive (fn, args, kwargs), send back the result"""
+    while True:
+        try:
+            msg = conn.recv_bytes()
+        except (EOFError, OSError):
+            return
+        fn, args, kwargs = pickle.loads(msg)
+        shared = [x for x in list(args) + list(kwargs.values()) if isinstance(x, SharedArray)]
+        args = [a.attach() if isinstance(a, SharedArray) else a for a in args]
+        kwargs = {k: v.attach() if isinstance(v, SharedArray) else v for k, v in kwargs.items()}
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            result = detailed_error(e)
+        try:
+            data = pickle.dumps(result)
+        except Exception as e:
+            data = pickle.dumps(detailed_error(e))
+        del args, kwargs, result
+        for x in shared:
+            x.close()
+        conn.send_bytes(data)
+
+class ProcessWorker:
+    """
+    a pre-forked worker process bound to one executor slot, killing it is how
+    a timed out task gets its slot back
+    """
+
+    def __init__(self, min_shared_bytes: int = 2**20, context: str = None):
+        self.min_shared_bytes = min_shared_bytes
+        self.ctx = mp.get_context(context)
+        self.lock = threading.Lock()
+        self.process = None
+        self.start()
+
+    def start(self):
+        if self.process is not None:
+            self.conn.close()
+        self.conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(target=process_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def call(self, fn, args: list, kwargs: dict):
+        with self.lock:
+            if not self.process.is_alive():
+                self.start()
+            args, kwargs, shared = share_arrays(args, kwargs, self.min_shared_bytes)
+            try:
+                self.conn.send_bytes(pickle.dumps((fn, args, kwargs)))
+                return pickle.loads(self.conn.recv_bytes())
+            except (EOFError, OSError):
+                # killed on timeout (or crashed), the next call gets a fresh process
+                pid = self.pid
+                self.start()
+                raise RuntimeError(f'worker process {pid} died')
+            finally:
+                for x in shared:
+                    x.unlink()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def kill(self):
+        """hard timeout, the blocked call raises and the process is restarted"""
+        if self.process.is_alive():
+            self.process.kill()
+
+    def close(self):
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
@@ -0,0 +1,142 @@
+import heapq
+import random
+import itertools
+import threading
+import time
+
+class TaskQueue:
+    """
+    shared priority queue of (priority, task), producers block on a condition
+    variable when it is full instead of polling
+    """
+
+    def __init__(self, maxsize:int=0):
+        self.maxsize = maxsize or 0
+        self.heap = []
+        self.counter = itertools.count() # keeps equal priorities fifo
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.closed = False
+
+    def put(self, priority, task, block:bool=True, timeout:float=None, worker_id:int=None) -> bool:
+        with self.not_full:
+            if not self.wait_not_full(block, timeout):
+                return False
+            heapq.heappush(self.heap, (priority, next(self.counter), task))
+            self.not_empty.notify()
+        return True
+
+    def wait_not_full(self, block:bool, timeout:float) -> bool:
+        """called with the lock held"""
+        if not self.maxsize:
+            return True
+        if not block:
+            return len(self) < self.maxsize
+        return self.not_full.wait_for(lambda: len(self) < self.maxsize or self.closed, timeout=timeout) and not self.closed
+
+    def get(self, worker_id:int=None, timeout:float=None):
+        """returns (priority, task), or None once the queue is closed"""
+        with self.not_empty:
+            if not self.not_empty.wait_for(lambda: self.heap or self.closed, timeout=timeout):
+                return None
+            if not self.heap:
+                return None
+            priority, _, task = heapq.heappop(self.heap)
+            self.not_full.notify()
+        return priority, task
+
+    def close(self):
+        """wakes every blocked producer and worker, queued tasks are still handed out"""
+        with self.lock:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    def qsize(self) -> int:
+        return len(self)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def full(self) -> bool:
+        return bool(self.maxsize) and len(self) >= self.maxsize
+
+    def stats(self) -> dict:
+        return {'size': len(self)}
+
+
+class StealingQueue(TaskQueue):
+    """
+    one priority heap per worker, each with its own lock: a worker pops from its own
+    heap and only steals from a random victim when that is empty, so workers do not
+    contend on one shared lock. tasks submitted from inside a worker stay on that
+    worker's heap. the shared condition is only used to sleep and for backpressure
+    """
+
+    def __init__(self, num_workers:int, maxsize:int=0):
+        super().__init__(maxsize=maxsize)
+        self.heaps = [[] for _ in range(num_workers)]
+        self.locks = [threading.Lock() for _ in range(num_workers)]
+        self.size = 0 # reserved slots (queued + being pushed)
+        self.available = 0 # tasks that can be popped
+        self.steals = 0
+        self.next_worker = itertools.count()
+
+    def put(self, priority, task, block:bool=True, timeout:float=None, worker_id:int=None) -> bool:
+        with self.not_full:
+            if not self.wait_not_full(block, timeout):
+                return False
+            self.size += 1
+        if worker_id is None:
+            worker_id = next(self.next_worker) % len(self.heaps)
+        with self.locks[worker_id]:
+            heapq.heappush(self.heaps[worker_id], (priority, next(self.counter), task))
+        with self.lock:
+            self.available += 1
+            self.not_empty.notify()
+        return True
+
+    def pop(self, worker_id:int):
+        """pop from the own heap, otherwise steal from the others starting at a random victim"""
+        n = len(self.heaps)
+        start = random.randrange(n)
+        for i, victim in enumerate(itertools.chain([worker_id], ((start + j) % n for j in range(n)))):
+            if i > 0 and victim == worker_id:
+                continue
+            with self.locks[victim]:
+                if self.heaps[victim]:
+                    entry = heapq.heappop(self.heaps[victim])
+                    if victim != worker_id:
+                        self.steals += 1
+                    return entry
+        return None
+
+    def get(self, worker_id:int=0, timeout:float=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            entry = self.pop(worker_id)
+            if entry is not None:
+                with self.lock:
+                    self.size -= 1
+                    self.available -= 1
+                    self.not_full.notify()
+                priority, _, task = entry
+                return priority, task
+            with self.not_empty:
+                if self.available <= 0:
+                    if self.closed:
+                        return None
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self.not_empty.wait(timeout=remaining)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def stats(self) -> dict:
+        return {'size': self.size, 'steals': self.steals, 'heap_sizes': [len(h) for h in self.heaps]}
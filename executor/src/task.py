@@ -9,10 +9,19 @@ import threading
 import asyncio
 from loguru import logger
 from typing import *
-from concurrent.futures._base import Future
+from concurrent.futures._base import Future, InvalidStateError
 import time
 from tqdm import tqdm
-from .utils import detailed_error
+from .utils import detailed_error, clear_interrupt
+
+_local = threading.local()
+
+def current_task() -> 'Task':
+    """the task running in the current worker thread (None outside a worker)"""
+    return getattr(_local, 'task', None)
+
+class TaskTimeout(TimeoutError):
+    """raised inside a worker thread when its task is hard interrupted"""
 
 class Task:
     def __init__(self, 
@@ -21,6 +30,7 @@ class Task:
                 timeout:int=10, 
                 priority:int=1, 
                 path = None, 
+                on_done = None,
                 **extra_kwargs):
         
         self.fn = fn if callable(fn) else lambda *args, **kwargs: fn
@@ -31,8 +41,26 @@ class Task:
         self.priority = priority # the priority of the task
         self.data = None # the result of the task
         self.path = os.path.abspath(path) if path != None else None
-        self.status = 'pending' # pending, running, done
+        self.status = 'pending' # pending, running, complete, failed, timeout
         self.future = Future()
+        self.run_time = None # the time the task started running
+        self.stop_event = threading.Event() # set when the task times out (cooperative cancellation)
+        self.lock = threading.Lock()
+        self.thread = None # the thread running fn, only set while fn runs
+        self.on_done = on_done # called once with the task when it reaches its final status
+
+    @property
+    def name(self) -> str:
+        return getattr(self.fn, '__qualname__', None) or getattr(self.fn, '__name__', None) or type(self.fn).__name__
+
+    @property
+    def deadline(self) -> float:
+        return self.start_time + self.timeout
+
+    @property
+    def stopped(self) -> bool:
+        """long running functions can poll current_task().stopped and return early"""
+        return self.stop_event.is_set()
 
     def set_params(self, params):
         self.params = params
@@ -52,30 +80,121 @@ class Task:
     @property
     def state(self) -> dict:
         return {
-            'fn': self.fn.__name__,
+            'fn': self.name,
             'params': self.params,
             'timeout': self.timeout,
             'start_time': self.start_time, 
+            'run_time': self.run_time,
             'end_time': self.end_time,
             'priority': self.priority,
             'status': self.status,
         }
 
-    def run(self):
-        """Run the given work item"""
+    def run(self, runner=None):
+        """Run the given work item
+        runner(fn, args, kwargs) runs the function somewhere else (ie a worker process)
+        """
         # Checks if future is canceled or if work item is stale
+        if not self.future.set_running_or_notify_cancel():
+            self.status = 'cancelled'
+            self.done_callback()
+            return
+        if time.time() > self.deadline:
+            self.expire()
+            return
+        with self.lock:
+            self.status = 'running'
+            self.run_time = time.time()
+            self.thread = threading.current_thread()
+        _local.task = self
+        try:
+            if runner != None:
+                data = runner(self.fn, self.params['args'], self.params['kwargs'])
+            else:
+                data = self.fn(*self.params['args'], **self.params['kwargs'])
+            status = 'complete'
+        except TaskTimeout:
+            raise
+        except Exception as e:
+            data = detailed_error(e)
+            status = 'failed'
+        finally:
+            # a hard timeout only interrupts the thread while self.thread is set (under the lock),
+            # so one that was not raised yet is dropped here instead of hitting the next task
+            with self.lock:
+                self.thread = None
+            clear_interrupt(threading.current_thread())
+            _local.task = None
+        self.finish(data, status)
 
-        if (not self.future.set_running_or_notify_cancel()) or (time.time() - self.start_time) > self.timeout:
-            self.future.set_exception(TimeoutError('Task timed out'))
+    async def run_async(self):
+        """Run the given coroutine function on the running event loop, it is cancelled at the deadline"""
+        if not self.future.set_running_or_notify_cancel():
+            self.status = 'cancelled'
+            self.done_callback()
+            return
+        remaining = self.deadline - time.time()
+        if remaining <= 0:
+            self.expire()
+            return
+        with self.lock:
+            self.status = 'running'
+            self.run_time = time.time()
         try:
-            data = self.fn(*self.params['args'], **self.params['kwargs'])
-            self.status = 'complete'
+            coro = self.fn(*self.params['args'], **self.params['kwargs'])
+            data = await asyncio.wait_for(coro, timeout=remaining)
+            status = 'complete'
+        except asyncio.TimeoutError:
+            self.expire()
+            return
         except Exception as e:
             data = detailed_error(e)
-            self.status = 'failed'
-        self.future.set_result(data)
-        self.data = data 
-        self.end_time = time.time()
+            status = 'failed'
+        self.finish(data, status)
+
+    def finish(self, data, status:str):
+        with self.lock:
+            finished = self.status == 'running'
+            if finished:
+                self.status = status
+                self.end_time = time.time()
+            self.data = data 
+        if finished:
+            # recorded before the future resolves, so its waiters see the telemetry
+            self.done_callback()
+            self.set_result(data)
+
+    def done_callback(self):
+        if self.on_done != None:
+            try:
+                self.on_done(self)
+            except Exception as e:
+                print(f'on_done failed for {self.name} error={e}')
+
+    def expire(self) -> bool:
+        """
+        times the task out: the future fails with TimeoutError, the stop event is set 
+        and the result of the function (if it ever returns) is dropped
+        returns False if the task already finished
+        """
+        with self.lock:
+            if self.status not in ['pending', 'running']:
+                return False
+            self.status = 'timeout'
+            self.end_time = time.time()
+            self.stop_event.set()
+        self.done_callback()
+        try:
+            self.future.set_exception(TimeoutError('Task timed out'))
+        except InvalidStateError:
+            pass
+        return True
+
+    def set_result(self, data):
+        try:
+            self.future.set_result(data)
+        except InvalidStateError:
+            pass
               
     def result(self) -> object:
         return self.future.result()
@@ -92,7 +211,8 @@ class Task:
         return self.future._waiters
 
     def cancel(self) -> bool:
-        self.future.cancel()
+        self.stop_event.set()
+        return self.future.cancel()
 
     def running(self) -> bool:
         return self.future.running()
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+
+def escape_label(value) -> str:
+    """a prometheus label value, with backslashes, quotes and newlines escaped"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Histogram:
+    """
+    log-linear latency histogram (HDR style): every power of two of microseconds
+    is split into sub_buckets linear buckets, so the relative error stays under
+    1/sub_buckets at any scale and recording is a couple of integer ops
+    """
+
+    def __init__(self, sub_bits:int=3, unit:float=1e-6):
+        self.sub_bits = sub_bits
+        self.sub_buckets = 1 << sub_bits
+        self.unit = unit
+        self.counts = {} # bucket index -> count
+        self.n = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def index(self, value:float) -> int:
+        v = int(value / self.unit)
+        if v < self.sub_buckets:
+            return max(v, 0)
+        e = v.bit_length() - 1
+        m = (v >> (e - self.sub_bits)) - self.sub_buckets
+        return self.sub_buckets + (e - self.sub_bits) * self.sub_buckets + m
+
+    def bounds(self, idx:int) -> tuple:
+        """[lower, upper) of a bucket in seconds"""
+        if idx < self.sub_buckets:
+            return idx * self.unit, (idx + 1) * self.unit
+        e, m = divmod(idx - self.sub_buckets, self.sub_buckets)
+        lower = (self.sub_buckets + m) << e
+        upper = (self.sub_buckets + m + 1) << e
+        return lower * self.unit, upper * self.unit
+
+    def record(self, value:float):
+        idx = self.index(value)
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        self.n += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p:float) -> float:
+        """upper bound of the bucket holding the p-th percentile (p in [0, 100])"""
+        if self.n == 0:
+            return 0.0
+        target = self.n * p / 100
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= target:
+                return min(self.bounds(idx)[1], self.max)
+        return self.max
+
+    def buckets(self) -> list:
+        """cumulative [(upper bound, count)] over the non empty buckets"""
+        seen = 0
+        result = []
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            result.append((self.bounds(idx)[1], seen))
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.n,
+            'mean': self.sum / self.n if self.n else 0.0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+class FnStats:
+    """counters and latency histograms of one function"""
+
+    statuses = ['complete', 'failed', 'timeout', 'cancelled']
+
+    def __init__(self):
+        self.submitted = 0
+        self.counts = {s: 0 for s in self.statuses}
+        self.wait = Histogram() # submit -> start
+        self.run = Histogram() # start -> end
+
+    def snapshot(self) -> dict:
+        return {
+            'submitted': self.submitted,
+            **self.counts,
+            'wait': self.wait.snapshot(),
+            'run': self.run.snapshot(),
+        }
+
+class Telemetry:
+    """
+    per function wait/run latencies and outcome counts of an executor,
+    recorded once per task when it reaches its final status
+    """
+
+    def __init__(self, max_recent:int=100):
+        self.lock = threading.Lock()
+        self.fn2stats = {}
+        self.recent = deque(maxlen=max_recent) # outcomes of the last finished tasks, without their params
+        self.start_time = time.time()
+
+    def stats(self, fn:str) -> FnStats:
+        if fn not in self.fn2stats:
+            self.fn2stats[fn] = FnStats()
+        return self.fn2stats[fn]
+
+    def submit(self, task: 'Task'):
+        with self.lock:
+            self.stats(task.name).submitted += 1
+
+    def record(self, task: 'Task'):
+        """on_done callback of a task"""
+        with self.lock:
+            stats = self.stats(task.name)
+            if task.status in stats.counts:
+                stats.counts[task.status] += 1
+            if task.run_time:
+                stats.wait.record(task.run_time - task.start_time)
+                stats.run.record(task.end_time - task.run_time)
+            error = task.data.get('error') if task.status == 'failed' and isinstance(task.data, dict) else None
+            self.recent.append({'fn': task.name,
+                                'duration': task.duration if task.end_time else None,
+                                'status': task.status,
+                                'error': error})
+
+    def snapshot(self, recent:bool=False) -> dict:
+        with self.lock:
+            snapshot = {
+                'uptime': time.time() - self.start_time,
+                'fns': {fn: stats.snapshot() for fn, stats in self.fn2stats.items()},
+            }
+            if recent:
+                snapshot['recent'] = list(self.recent)
+        return snapshot
+
+    def prometheus(self, prefix:str='executor', gauges:dict=None) -> str:
+        """prometheus text exposition format"""
+        lines = []
+        for name, value in (gauges or {}).items():
+            if isinstance(value, (int, float)):
+                lines += [f'# TYPE {prefix}_{name} gauge', f'{prefix}_{name} {float(value)}']
+        with self.lock:
+            fn2stats = [(escape_label(fn), stats) for fn, stats in self.fn2stats.items()]
+            lines += [f'# TYPE {prefix}_tasks_submitted_total counter']
+            for fn, stats in fn2stats:
+                lines.append(f'{prefix}_tasks_submitted_total{{fn="{fn}"}} {stats.submitted}')
+            lines += [f'# TYPE {prefix}_tasks_total counter']
+            for fn, stats in fn2stats:
+                for status, count in stats.counts.items():
+                    lines.append(f'{prefix}_tasks_total{{fn="{fn}",status="{status}"}} {count}')
+            for metric in ['wait', 'run']:
+                name = f'{prefix}_task_{metric}_seconds'
+                lines.append(f'# TYPE {name} histogram')
+                for fn, stats in fn2stats:
+                    hist = getattr(stats, metric)
+                    for upper, count in hist.buckets():
+                        lines.append(f'{name}_bucket{{fn="{fn}",le="{upper:.6g}"}} {count}')
+                    lines.append(f'{name}_bucket{{fn="{fn}",le="+Inf"}} {hist.n}')
+                    lines.append(f'{name}_sum{{fn="{fn}"}} {hist.sum}')
+                    lines.append(f'{name}_count{{fn="{fn}"}} {hist.n}')
+        return '\n'.join(lines) + '\n'
@@ -10,6 +10,27 @@ def new_event_loop() -> 'asyncio.AbstractEventLoop':
     nest_asyncio.apply()
     return loop
 
+def interrupt_thread(thread: 'threading.Thread', exc: type) -> bool:
+    """
+    raises exc asynchronously inside thread (delivered at its next bytecode, 
+    so a thread blocked inside a C call only sees it once the call returns)
+    """
+    import ctypes
+    if thread.ident is None:
+        return False
+    n = ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread.ident), ctypes.py_object(exc))
+    if n > 1:
+        # more than one thread state was touched, undo it
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread.ident), None)
+        return False
+    return n == 1
+
+def clear_interrupt(thread: 'threading.Thread') -> None:
+    """drops an exception from interrupt_thread that thread has not raised yet"""
+    import ctypes
+    if thread.ident is not None:
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread.ident), None)
+
 def detailed_error(e) -> dict:
     tb = traceback.extract_tb(e.__traceback__)
     filename = tb[-1].filename
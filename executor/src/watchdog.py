@@ -0,0 +1,77 @@
+import heapq
+import itertools
+import threading
+import time
+
+class Watchdog:
+    """
+    one daemon thread that fires callbacks at their deadlines, it sleeps on a 
+    condition variable until the earliest deadline instead of polling
+    """
+
+    def __init__(self, name:str='Watchdog'):
+        self.name = name
+        self.heap = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.thread = None
+        self.n_cancelled = 0
+        self.closed = False
+
+    def watch(self, deadline:float, fn, *args) -> list:
+        """returns a handle that can be passed to cancel"""
+        entry = [deadline, next(self.counter), fn, args, True]
+        with self.cond:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+                self.thread.start()
+            heapq.heappush(self.heap, entry)
+            if self.heap[0] is entry:
+                self.cond.notify()
+        return entry
+
+    def cancel(self, entry:list):
+        """cancelled entries are dropped lazily, the heap is compacted once they are the majority"""
+        with self.cond:
+            if not entry[4]:
+                return
+            entry[4] = False
+            self.n_cancelled += 1
+            if self.n_cancelled > len(self.heap) // 2:
+                self.heap = [e for e in self.heap if e[4]]
+                heapq.heapify(self.heap)
+                self.n_cancelled = 0
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.heap and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                entry = self.heap[0]
+                now = time.time()
+                if not entry[4]:
+                    heapq.heappop(self.heap)
+                    self.n_cancelled -= 1
+                    continue
+                if now < entry[0]:
+                    self.cond.wait(timeout=entry[0] - now)
+                    continue
+                heapq.heappop(self.heap)
+                entry[4] = False
+            _, _, fn, args, _ = entry
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f'{self.name} callback {fn} failed error={e}')
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.heap = []
+            self.n_cancelled = 0
+            self.cond.notify()
+
+    def __len__(self):
+        return len(self.heap) - self.n_cancelled
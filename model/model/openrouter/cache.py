@@ -0,0 +1,204 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generator, Iterator, Optional
+
+class Flight:
+    """
+    A request in progress that identical requests wait for
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+
+class LeaderStream:
+    """
+    The stream of the request leading a flight. Its chunks are cached once it is read to the end,
+    and the flight lands however the stream ends, even when it is closed or dropped unread.
+    """
+    def __init__(self, cache: 'ResponseCache', key: str, flight: Flight, result):
+        self.cache = cache
+        self.key = key
+        self.flight = flight
+        self.result = iter(result)
+        self.chunks = []
+        self.landed = False
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if self.landed:
+            raise StopIteration
+        try:
+            chunk = next(self.result)
+        except StopIteration:
+            try:
+                self.cache.put(self.key, self.chunks)
+            finally:
+                self.land(True)
+            raise
+        except BaseException:
+            self.land(False)
+            raise
+        self.chunks.append(chunk)
+        return chunk
+
+    def land(self, ok: bool):
+        if not self.landed:
+            self.landed = True
+            self.cache._land(self.key, self.flight, ok)
+
+    def close(self):
+        self.land(False)
+        close = getattr(self.result, 'close', None)
+        if close is not None:
+            close()
+
+    def __del__(self):
+        self.close()
+
+class ResponseCache:
+    """
+    Content addressed cache of model responses, with single flight coalescing of identical requests.
+
+    Responses are kept as the list of chunks they arrived in, so a cached stream replays
+    chunk by chunk. Entries expire after ttl seconds, the least recently used are evicted
+    past max_size, and with a store they are also saved to {path}/{key} for other processes,
+    where the expired and the oldest past max_size are pruned every prune_interval seconds.
+    """
+    caches = {} # (key, ttl, max_size) -> cache
+    caches_lock = threading.Lock()
+
+    def __init__(self, store=None, ttl: float = 3600, max_size: int = 1024, path: str = 'cache', wait_timeout: float = 600, prune_interval: float = 60):
+        self.store = store
+        self.ttl = ttl
+        self.max_size = max_size
+        self.path = path
+        self.wait_timeout = wait_timeout
+        self.prune_interval = prune_interval
+        self.last_prune = 0
+        self.entries = OrderedDict() # key -> (time, chunks)
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_cache(cls, key: str = None, store=None, ttl: float = 3600, max_size: int = 1024, **kwargs) -> 'ResponseCache':
+        """
+        Get the cache shared by every client of the key (e.g. the storage path) with the same ttl and max_size
+        """
+        with cls.caches_lock:
+            cache_key = (key, ttl, max_size)
+            if cache_key not in cls.caches:
+                cls.caches[cache_key] = cls(store=store, ttl=ttl, max_size=max_size, **kwargs)
+            return cls.caches[cache_key]
+
+    def _remember(self, key: str, chunks: list, t: float):
+        with self.lock:
+            self.entries[key] = (t, chunks)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[list]:
+        """
+        Get the chunks of a cached response, None if missing or expired
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if time.time() - entry[0] <= self.ttl:
+                    self.entries.move_to_end(key)
+                    return entry[1]
+                del self.entries[key]
+        if self.store is not None:
+            item = self.store.get(f'{self.path}/{key}', default=None, max_age=self.ttl)
+            if isinstance(item, dict) and 'chunks' in item:
+                self._remember(key, item['chunks'], item['time'])
+                return item['chunks']
+        return None
+
+    def put(self, key: str, chunks: list):
+        t = time.time()
+        self._remember(key, chunks, t)
+        if self.store is not None:
+            self.store.put(f'{self.path}/{key}', {'chunks': chunks, 'time': t})
+            if t - self.last_prune > self.prune_interval:
+                self.prune()
+
+    def prune(self) -> int:
+        """
+        Remove the saved responses that expired, and the oldest past max_size
+        """
+        self.last_prune = time.time()
+        path2time = {}
+        for p in self.store.paths(path=self.store.get_path(self.path)):
+            try:
+                path2time[p] = os.path.getmtime(p)
+            except OSError: # removed by another process
+                continue
+        paths = sorted(path2time, key=path2time.get, reverse=True)
+        expired = [p for p in paths[:self.max_size] if self.last_prune - path2time[p] > self.ttl]
+        removed = 0
+        for p in expired + paths[self.max_size:]:
+            try:
+                os.remove(p)
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def _land(self, key: str, flight: Flight, ok: bool):
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+        flight.ok = ok
+        flight.done.set()
+
+    @staticmethod
+    def replay(chunks: list) -> Generator[str, None, None]:
+        for chunk in chunks:
+            yield chunk
+
+    def call(self, key: str, fn: Callable, stream: bool = False):
+        """
+        Get the response of a request from the cache, or from fn() (a generator of chunks if stream).
+
+        Identical concurrent requests wait for the first one and share its response. If it fails,
+        or its stream is not read to the end, they each make their own uncached request.
+        """
+        while True:
+            chunks = self.get(key)
+            if chunks is not None:
+                return self.replay(chunks) if stream else ''.join(chunks)
+            with self.lock:
+                flight = self.flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self.flights[key] = Flight()
+            if leader:
+                break
+            if not flight.done.wait(self.wait_timeout) or not flight.ok:
+                return fn()
+
+        if not stream:
+            ok = False
+            try:
+                result = fn()
+                self.put(key, [result])
+                ok = True
+                return result
+            finally:
+                self._land(key, flight, ok)
+
+        try:
+            result = fn()
+        except BaseException:
+            self._land(key, flight, False)
+            raise
+        return LeaderStream(self, key, flight, result)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+import requests
+
+class ModelCatalog:
+    """
+    Process wide catalog of the models of an OpenRouter compatible api.
+
+    The models are read from the store (or the api) once, then served from memory
+    and refreshed in a background thread once they are older than refresh_interval.
+    """
+    catalogs = {} # (url, key, path) -> catalog
+    catalogs_lock = threading.Lock()
+
+    def __init__(self, url: str, store, path: str = 'models', refresh_interval: float = 3600):
+        self.url = url
+        self.store = store
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.model2info = {}
+        self.query2model = {}
+        self.updated = 0
+        self.refresh_lock = threading.Lock()
+        self.refresh_thread = None
+        models = self.store.get(path, default=[], max_age=refresh_interval)
+        if len(models) > 0:
+            self.set_models(models)
+        else:
+            self.refresh()
+
+    @classmethod
+    def get(cls, url: str, store, key: str = None, path: str = 'models', **kwargs) -> 'ModelCatalog':
+        """
+        Get the catalog shared by every client of the url and store key
+        """
+        with cls.catalogs_lock:
+            catalog_key = (url, key, path)
+            if catalog_key not in cls.catalogs:
+                cls.catalogs[catalog_key] = cls(url, store, path=path, **kwargs)
+            return cls.catalogs[catalog_key]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated
+
+    def set_models(self, models: list):
+        """
+        Index the models, swapping the indexes at once so readers never see them half built
+        """
+        self.model2info = {m['id']: m for m in models}
+        self.query2model = {}
+        self.updated = time.time()
+
+    def refresh(self) -> dict:
+        """
+        Fetch the models from the api and save them to the store
+        """
+        with self.refresh_lock:
+            print('Updating models...')
+            response = requests.get(self.url + '/models')
+            models = json.loads(response.text)['data']
+            self.store.put(self.path, models)
+            self.set_models(models)
+        return self.model2info
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f'Failed to update models from {self.url} error={e}')
+
+    def check(self):
+        """
+        Start a background refresh if the models are stale, the current ones are served meanwhile
+        """
+        if self.age < self.refresh_interval:
+            return
+        if self.refresh_thread is not None and self.refresh_thread.is_alive():
+            return
+        self.refresh_thread = threading.Thread(target=self._refresh_in_background, daemon=True)
+        self.refresh_thread.start()
+
+    def resolve(self, model: str) -> str:
+        """
+        Resolve a model id, or the first model containing it (or any of its comma separated parts)
+        """
+        self.check()
+        model = str(model)
+        if model in self.model2info:
+            return model
+        query2model = self.query2model
+        if model not in query2model:
+            if ',' in model:
+                models = [m for m in self.model2info if any([s in m for s in model.split(',')])]
+            else:
+                models = [m for m in self.model2info if model in m]
+            print(f"Model {model} not found. Using {models} instead.")
+            assert len(models) > 0
+            query2model[model] = models[0]
+        return query2model[model]
+
+    def info(self, model: str) -> dict:
+        return self.model2info[self.resolve(model)]
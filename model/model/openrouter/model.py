@@ -1,10 +1,11 @@
-from typing import Generator
-import requests
-import json
+from typing import Generator, Optional
 import openai
 import time
 import os
 from .store import Store
+from .cache import ResponseCache
+from .catalog import ModelCatalog
+from .tokens import count_message_tokens, is_exact
 import commune as c
 import random
 
@@ -21,6 +22,9 @@ class OpenRouter:
         max_retries: int = 10,
         path = '~/.commune/openrouter',
         key = None,
+        cache: bool = False,
+        cache_ttl: float = 3600,
+        cache_size: int = 1024,
         **kwargs
     ):
         """
@@ -32,8 +36,12 @@ class OpenRouter:
             url (str, optional): can be used for openrouter api calls
             timeout (float, optional): The timeout value for the client. Defaults to None.
             max_retries (int, optional): The maximum number of retries for the client. Defaults to None.
+            cache (bool, optional): Whether forward reuses the responses of identical requests. Defaults to False.
+            cache_ttl (float, optional): The seconds a cached response is reused. Defaults to 3600.
+            cache_size (int, optional): The number of responses cached in memory. Defaults to 1024.
         """
         self.store = c.mod('store')(path)
+        self.path = path
         self.url = url
         self.client = openai.OpenAI(
             base_url=self.url,
@@ -43,6 +51,8 @@ class OpenRouter:
         )
         self.model = model
         self.prompt = prompt
+        self.cache = cache
+        self.response_cache = ResponseCache.get_cache(key=path, store=self.store, ttl=cache_ttl, max_size=cache_size)
 
     def forward(
         self,
@@ -55,6 +65,7 @@ class OpenRouter:
         model:str = 'anthropic/claude-opus-4',
         max_tokens: int = 10000000,
         temperature: float = 1.0,
+        cache: bool = None,
         **kwargs
     ) -> str :
         """
@@ -66,6 +77,8 @@ class OpenRouter:
             stream (bool): Whether to stream the response or not.
             max_tokens (int): The maximum number of tokens to generate.
             temperature (float): The sampling temperature to use.
+            cache (bool): Whether to reuse the response of an identical request (model, messages,
+                temperature, max_tokens), and share in-flight ones. Defaults to the client's cache.
 
         Returns:
         Generator[str] | str: A generator for streaming responses or the full streamed response.
@@ -78,12 +91,27 @@ class OpenRouter:
         message = message + prompt if prompt else message
         model = self.resolve_model(model)
         model_info = self.get_model_info(model)
-        num_tokens = len(message)
-        print(f'Sending {num_tokens} tokens -> {model}')
-        max_tokens = min(max_tokens, model_info['context_length'] - num_tokens)
         messages = history.copy()
         messages.append({"role": "user", "content": message})
-        result = self.client.chat.completions.create(model=model, messages=messages, stream= bool(stream), max_tokens = max_tokens, temperature= temperature  )
+        num_tokens = count_message_tokens(messages, model)
+        print(f'Sending {num_tokens} tokens -> {model}')
+        max_tokens = self.max_output_tokens(model_info, num_tokens, max_tokens)
+        cache = self.cache if cache is None else cache
+        if cache:
+            key = c.hash({'model': model, 'messages': messages, 'temperature': temperature, 'max_tokens': max_tokens})
+            return self.response_cache.call(key, lambda: self.request(model, messages, max_tokens, temperature, stream), stream=bool(stream))
+        return self.request(model, messages, max_tokens, temperature, stream)
+        
+    generate = forward
+
+    def request(self, model: str, messages: list, max_tokens: int, temperature: float, stream: bool = False):
+        """
+        Send a chat completion request and save it to the history
+        """
+        params = dict(model=model, messages=messages, stream= bool(stream), temperature= temperature)
+        if max_tokens is not None:
+            params['max_tokens'] = max_tokens
+        result = self.client.chat.completions.create(**params)
 
         item = {
             'model': model,
@@ -102,6 +130,8 @@ class OpenRouter:
             def stream_generator( result):
                 for token in result:
                     token = token.choices[0].delta.content
+                    if token is None:
+                        continue
                     item['result'] += token
                     yield token
                 self.store.put(path, item)
@@ -110,8 +140,6 @@ class OpenRouter:
             item['result'] = result.choices[0].message.content
             self.store.put(path, item)
             return item['result']
-        
-    generate = forward
 
     def history(self, path:str = None, max_age:int = 0, update:bool = False):
         """
@@ -120,21 +148,30 @@ class OpenRouter:
         history = self.store.items('history', max_age=max_age, update=update)
         return history
 
+    def catalog(self, path='models') -> ModelCatalog:
+        """
+        Get the model catalog shared by every client of this url and storage path
+        """
+        return ModelCatalog.get(self.url, self.store, key=self.path, path=path)
+
     def resolve_model(self, model=None):
-        model = model or self.model
-        models =  self.models()
-        model = str(model)
-        if str(model) not in models:
-            if ',' in model:
-                models = [m for m in models if any([s in m for s in model.split(',')])]
-            else:
-                models = [m for m in models if str(model) in m]
-            print(f"Model {model} not found. Using {models} instead.")
-            print(model)
-            assert len(models) > 0
-            model = models[0]
-
-        return model
+        return self.catalog().resolve(model or self.model)
+
+    def max_output_tokens(self, model_info: dict, num_tokens: int, max_tokens: int = 10000000) -> Optional[int]:
+        """
+        Get the max_tokens to request, within the context left after the prompt
+        and the model's completion limit, None to leave it to the api
+        """
+        context_left = model_info['context_length'] - num_tokens
+        if context_left <= 0:
+            if is_exact(model_info['id']):
+                raise ValueError(f"Prompt of {num_tokens} tokens exceeds the context of {model_info['id']} ({model_info['context_length']} tokens)")
+            # an estimate errs on the high side, let the api decide whether the prompt fits
+            return None
+        max_completion_tokens = (model_info.get('top_provider') or {}).get('max_completion_tokens')
+        if max_completion_tokens:
+            max_tokens = min(max_tokens, max_completion_tokens)
+        return min(max_tokens, context_left)
 
     def api_key(self, api_key: str = None):
         """
@@ -173,12 +210,10 @@ class OpenRouter:
 
 
     def model2info(self, search: str = None, path='models', max_age=100, update=False):
-        models = self.store.get(path, default={}, max_age=max_age, update=update)
-        if len(models) == 0:
-            print('Updating models...')
-            response = requests.get(self.url + '/models')
-            models = json.loads(response.text)['data']
-            self.store.put(path, models)
+        catalog = self.catalog(path)
+        if update or catalog.age > max_age:
+            catalog.refresh()
+        models = list(catalog.model2info.values())
         models = self.filter_models(models, search=search)
         return {m['id']:m for m in models}
     
@@ -190,9 +225,7 @@ class OpenRouter:
         return list(self.model2info(search=search, path=path, max_age=max_age, update=update).values())
     
     def get_model_info(self, model):
-        model = self.resolve_model(model)
-        model2info = self.model2info()
-        return model2info[model]
+        return self.catalog().info(model or self.model)
     
     @classmethod
     def filter_models(cls, models, search:str = None):
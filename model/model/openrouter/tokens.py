@@ -0,0 +1,75 @@
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import tiktoken
+except ImportError: # estimate from word pieces instead
+    tiktoken = None
+
+# ascii word pieces of up to 5 characters, or any other single non space character
+WORD_PIECE = re.compile(r"[A-Za-z0-9_]{1,5}|[^\sA-Za-z0-9_]")
+# tokens added around each message and to prime the reply (chat format overhead)
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+# headroom for models whose tokenizer is only approximated
+ESTIMATE_MARGIN = 1.1
+# counts kept by digest, so the cache does not hold on to the texts
+CACHE_SIZE = 8192
+_counts = OrderedDict() # (digest, encoding) -> tokens
+_counts_lock = threading.Lock()
+
+def encoding_name(model: str = None) -> str:
+    """
+    Get the tiktoken encoding of a model, cl100k_base approximates non openai models
+    """
+    model = str(model or '').split('/')[-1]
+    if model.startswith(('gpt-4o', 'gpt-4.1', 'gpt-5', 'o1', 'o3', 'o4')):
+        return 'o200k_base'
+    return 'cl100k_base'
+
+def is_exact(model: str = None) -> bool:
+    return tiktoken is not None and str(model or '').startswith('openai/')
+
+def _encode(text: str, encoding: str) -> int:
+    if tiktoken is not None:
+        return len(tiktoken.get_encoding(encoding).encode(text, disallowed_special=()))
+    return len(WORD_PIECE.findall(text))
+
+def _count_tokens(text: str, encoding: str) -> int:
+    key = (hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest(), encoding)
+    with _counts_lock:
+        num_tokens = _counts.get(key)
+        if num_tokens is not None:
+            _counts.move_to_end(key)
+            return num_tokens
+    num_tokens = _encode(text, encoding)
+    with _counts_lock:
+        _counts[key] = num_tokens
+        while len(_counts) > CACHE_SIZE:
+            _counts.popitem(last=False)
+    return num_tokens
+
+def count_tokens(text: str, model: str = None) -> int:
+    """
+    Count the tokens of a text, exactly for openai models when tiktoken is installed
+    and otherwise with a margin so the estimate errs on the high side
+    """
+    num_tokens = _count_tokens(str(text), encoding_name(model))
+    if is_exact(model):
+        return num_tokens
+    return math.ceil(num_tokens * ESTIMATE_MARGIN)
+
+def count_message_tokens(messages: list, model: str = None) -> int:
+    """
+    Count the tokens of chat messages, including the chat format overhead
+    """
+    num_tokens = TOKENS_PER_REPLY
+    for message in messages:
+        num_tokens += TOKENS_PER_MESSAGE
+        for key, value in message.items():
+            if isinstance(value, str):
+                num_tokens += count_tokens(value, model)
+    return num_tokens
@@ -3,11 +3,23 @@ import json
 import os
 import time
 import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Union
 import commune as c
 
 class Store:
 
+    # path -> ((inode, mtime_ns, size), digest) of every file hashed by cid, shared by all stores
+    file2digest = {}
+    # cid -> merkle tree of the last max_trees folders hashed in this process, for diff_cid
+    cid2tree = OrderedDict()
+    max_trees = 64
+    cid_lock = threading.Lock()
+    chunk_size = 1 << 20
+
     def __init__(self, 
                 folder='~/.commune/store', 
                 suffix='json',
@@ -280,35 +292,122 @@ class Store:
             times[p] = os.path.getmtime(p)
         return times
 
-    def cid(self, path, ignore_names=['__pycache__', '.DS_Store','.git', '.gitignore']):
+    def cid(self, path, ignore_names=['__pycache__', '.DS_Store','.git', '.gitignore'], max_workers=8):
         """
         Get the CID of the strat module
         """
-        path = self.abspath(path)
-        if os.path.isdir(path):
-            files = os.listdir(path)
-            content = []
-            for f in files:
-                if any([ignore in f for ignore in ignore_names]):
-                    continue
-                f = path + '/' + f
-                content.append(self.cid(f))
-            content = ''.join(content)
-        elif os.path.isfile(path):
-            content =  self.get_text(path)
-        else: 
-            raise Exception(f'Failed to find path {path}')
-        cid =  self.hash(content)
+        cid = self.cid_tree(path, ignore_names=ignore_names, max_workers=max_workers)['cid']
         print(f'cid={cid} path={path}')
         return cid
 
+    def cid_tree(self, path, ignore_names=['__pycache__', '.DS_Store','.git', '.gitignore'], max_workers=8) -> dict:
+        """
+        Get the merkle tree of the CIDs under a path
+        params
+            path: str: the file or folder to hash
+            ignore_names: list: skip files and folders whose name contains any of these
+            max_workers: int: the number of threads hashing files
+        return: dict: {'cid': str, 'children': {name: tree}} ('children' only for folders)
+
+        A file's CID is the hash of its bytes, streamed in chunks. A folder's CID is the hash of
+        its children's names and CIDs in name order. Files whose (inode, mtime, size) did not
+        change since they were last hashed are not read again.
+        """
+        path = self.abspath(path)
+        path2key = {}
+
+        def walk(p):
+            if os.path.isdir(p):
+                names = sorted(os.listdir(p))
+                return {name: walk(p + '/' + name) for name in names if not any([ignore in name for ignore in ignore_names])}
+            elif os.path.isfile(p):
+                stat = os.stat(p)
+                path2key[p] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                return p
+            else:
+                raise Exception(f'Failed to find path {p}')
+
+        structure = walk(path)
+        with self.cid_lock:
+            stale = [p for p, key in path2key.items() if self.file2digest.get(p, (None,))[0] != key]
+        if stale:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                digests = list(executor.map(self.file_hash, stale))
+            with self.cid_lock:
+                for p, digest in zip(stale, digests):
+                    self.file2digest[p] = (path2key[p], digest)
+        with self.cid_lock:
+            path2digest = {p: self.file2digest[p][1] for p in path2key}
+
+        def build(node):
+            if isinstance(node, str):
+                return {'cid': path2digest[node]}
+            children = {name: build(child) for name, child in node.items()}
+            content = ''.join([f'{name}:{child["cid"]}\n' for name, child in children.items()])
+            return {'cid': self.hash(content), 'children': children}
+
+        tree = build(structure)
+        with self.cid_lock:
+            self.cid2tree[tree['cid']] = tree
+            self.cid2tree.move_to_end(tree['cid'])
+            while len(self.cid2tree) > self.max_trees:
+                self.cid2tree.popitem(last=False)
+        return tree
+
+    def get_cid_tree(self, cid: str) -> dict:
+        """
+        Get the tree of a cid hashed in this process
+        """
+        with self.cid_lock:
+            if cid not in self.cid2tree:
+                raise ValueError(f'Unknown cid {cid}, only the last {self.max_trees} cids hashed in this process are kept, pass the tree from cid_tree instead')
+            self.cid2tree.move_to_end(cid)
+            return self.cid2tree[cid]
+
+    def file_hash(self, path, hash_type='sha256') -> str:
+        """
+        Hash the bytes of a file, reading it in chunks
+        """
+        hash_obj = hashlib.new(hash_type)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                hash_obj.update(chunk)
+        return hash_obj.hexdigest()
+
+    def diff_cid(self, a: Union[str, dict], b: Union[str, dict], path: str = '') -> dict:
+        """
+        Get the subtrees that differ between two CIDs
+        params
+            a: str or dict: a cid recently hashed in this process (see max_trees) or a tree from cid_tree (e.g. of another host)
+            b: str or dict: the cid or tree to compare against (added = only in b)
+            path: str: the prefix of the returned paths
+        return: dict: {'changed': [...], 'added': [...], 'removed': [...]} the deepest differing paths
+        """
+        a, b = [self.get_cid_tree(t) if isinstance(t, str) else t for t in [a, b]]
+        diff = {'changed': [], 'added': [], 'removed': []}
+        if a['cid'] == b['cid']:
+            return diff
+        if 'children' not in a or 'children' not in b:
+            diff['changed'].append(path)
+            return diff
+        for name in sorted(set(a['children']) | set(b['children'])):
+            child_path = f'{path}/{name}' if path else name
+            if name not in a['children']:
+                diff['added'].append(child_path)
+            elif name not in b['children']:
+                diff['removed'].append(child_path)
+            else:
+                child_diff = self.diff_cid(a['children'][name], b['children'][name], path=child_path)
+                for k, v in child_diff.items():
+                    diff[k].extend(v)
+        return diff
+
     def get_text(self, path) -> str:
         with open(path, 'r') as f:
             result =  f.read()
         return result
     
     def hash(self, content: str, hash_type='sha256') -> str:
-        import hashlib
         if hash_type == 'md5':
             hash_obj = hashlib.md5()
         elif hash_type == 'sha1':
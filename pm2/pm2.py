@@ -2,11 +2,20 @@ import commune as c
 from typing import *
 import json
 import os
+import time
+import threading
 class Pm2:
 
-    def __init__(self, process_prefix='proc/', **kwargs):
+    # process table shared by every Pm2 in the process: name -> {name, pid, status, cpu, memory, restarts, uptime}
+    proc_table = {}
+    proc_table_time = 0
+    proc_table_lock = threading.Lock()
+    pm2_installed = False
+
+    def __init__(self, process_prefix='proc/', ttl:float = 5, **kwargs):
         self.process_prefix = process_prefix
         self.process_manager_path = c.abspath('~/.pm2')
+        self.ttl = ttl
         self.sync_env()
 
     def get_procname(self, name:str, **kwargs) -> str:
@@ -18,15 +27,55 @@ class Pm2:
         name = self.get_procname(name)
         return name in self.procs(**kwargs)
 
-    def procs(self, search=None,  **kwargs) -> List[str]:
-        output_string = c.cmd('pm2 status')
-        procs = []
-        tag = ' default '
-        for line in output_string.split('\n'):
-            if  tag in line:
-                name = line.split(tag)[0].strip()
-                name = name.split(' ')[-1]
-                procs += [name]
+    def jlist(self) -> List[dict]:
+        """
+        get the processes from pm2 jlist
+        """
+        output = c.cmd('pm2 jlist', verbose=False)
+        # the json is the last line that looks like a list, pm2 can print
+        # banners like "[PM2] Spawning PM2 daemon" or update notices around it
+        for line in reversed(output.splitlines()):
+            line = line.strip()
+            if line.startswith('[') and line.endswith(']'):
+                try:
+                    return json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+        return []
+
+    def table(self, update:bool = False, max_age:float = None) -> Dict[str, dict]:
+        """
+        get the process table, refreshed from pm2 jlist when older than max_age (defaults to ttl)
+
+        Args:
+            update (bool, optional): Whether to refresh the table now. Defaults to False.
+            max_age (float, optional): The maximum age of the table in seconds. Defaults to self.ttl.
+        Returns:
+            dict: name -> {name, pid, status, cpu, memory, restarts, uptime}
+        """
+        cls = type(self)
+        max_age = self.ttl if max_age == None else max_age
+        with cls.proc_table_lock:
+            if update or time.time() - cls.proc_table_time > max_age:
+                table = {}
+                for proc in self.jlist():
+                    env = proc.get('pm2_env', {})
+                    monit = proc.get('monit', {})
+                    table[proc['name']] = {
+                        'name': proc['name'],
+                        'pid': proc.get('pid'),
+                        'status': env.get('status'),
+                        'cpu': monit.get('cpu', 0),
+                        'memory': monit.get('memory', 0),
+                        'restarts': env.get('restart_time', 0),
+                        'uptime': env.get('pm_uptime'),
+                    }
+                cls.proc_table = table
+                cls.proc_table_time = time.time()
+            return dict(cls.proc_table)
+
+    def procs(self, search=None, update:bool = False, **kwargs) -> List[str]:
+        procs = list(self.table(update=update))
         if search != None:
             search = self.get_procname(search)
             procs = [m for m in procs if search in m]
@@ -64,6 +113,20 @@ class Pm2:
          
         """
         self.sync_env()
+        proc_name, fn_params = self.get_fn_params(fn=fn, name=name, module=module, params=params)
+        params_str = json.dumps(fn_params).replace('"','\\"')
+        if self.proc_exists(proc_name):
+            self.kill(proc_name, rm_server=False)
+        cmd = f"pm2 start {c.filepath()} --name {proc_name} --interpreter {interpreter} -f --no-autorestart -- --fn run_fn --params \"{params_str}\""
+        c.cmd(cmd, verbose=verbose, cwd=c.lib_path)
+        self.set_launching(proc_name)
+        return {'success':True, 'message':f'Running {proc_name}'}
+
+    def get_fn_params(self, fn: str = 'serve', name:str = None, module:str = 'server', params: dict = None) -> Tuple[str, dict]:
+        """
+        get the proc name and the run_fn params of a run
+        """
+        params = dict(params or {})
         params['remote'] = False
         name = name or module
         if '/' in fn:
@@ -71,24 +134,77 @@ class Pm2:
         else:
             module = 'server'
             fn = fn
-        params_str = json.dumps({'fn': module +'/' + fn, 'params': params or {}}).replace('"','\\"')
-        proc_name = self.get_procname(name)
-        if self.proc_exists(proc_name):
-            self.kill(proc_name, rm_server=False)
-        cmd = f"pm2 start {c.filepath()} --name {proc_name} --interpreter {interpreter} -f --no-autorestart -- --fn run_fn --params \"{params_str}\""
-        c.cmd(cmd, verbose=verbose, cwd=c.lib_path)
-        return {'success':True, 'message':f'Running {proc_name}'}
+        return self.get_procname(name), {'fn': module +'/' + fn, 'params': params}
+
+    def set_launching(self, *proc_names):
+        """
+        add started procs to the process table until the next refresh
+        """
+        with self.proc_table_lock:
+            for proc_name in proc_names:
+                type(self).proc_table[proc_name] = {'name': proc_name, 'pid': None, 'status': 'launching',
+                                                    'cpu': 0, 'memory': 0, 'restarts': 0, 'uptime': None}
+
+    def run_many(self, runs: List[dict], interpreter:str='python3', verbose: bool = False) -> dict:
+        """
+        run many processes with pm2 at once, through one ecosystem file
+
+        Args:
+            runs (list): The kwargs of each run (fn, name, module, params).
+            interpreter (str, optional): The interpreter to use. Defaults to 'python3'.
+            verbose (bool, optional): Whether to print the output. Defaults to False.
+        Returns:
+            dict: The result of the command
+        """
+        self.sync_env()
+        apps = []
+        for run in runs:
+            proc_name, fn_params = self.get_fn_params(**run)
+            apps.append({
+                'name': proc_name,
+                'script': c.filepath(),
+                'interpreter': run.get('interpreter', interpreter),
+                'args': ['--fn', 'run_fn', '--params', json.dumps(fn_params)],
+                'cwd': c.lib_path,
+                'autorestart': False,
+            })
+        proc_names = [app['name'] for app in apps]
+        ecosystem = {'apps': apps}
+        path = f'{self.process_manager_path}/ecosystem/{c.hash(ecosystem)}.json'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(ecosystem, f)
+        try:
+            existing = [proc_name for proc_name in proc_names if self.proc_exists(proc_name)]
+            if len(existing) > 0:
+                # deletes the apps of the file that are running
+                c.cmd(f'pm2 delete {path}', verbose=verbose)
+                for proc_name in existing:
+                    self.rm_logs(proc_name)
+            c.cmd(f'pm2 start {path}', verbose=verbose, cwd=c.lib_path)
+        finally:
+            os.remove(path)
+        self.set_launching(*proc_names)
+        return {'success':True, 'message':f'Running {len(proc_names)} procs', 'procs': proc_names}
 
     def kill(self, name:str, verbose:bool = True, rm_server=True, **kwargs):
         proc_name = self.get_procname(name)
         try:
             c.cmd(f"pm2 delete {proc_name}", verbose=False)
+            with self.proc_table_lock:
+                type(self).proc_table.pop(proc_name, None)
             for m in ['out', 'error']:
                 os.remove(self.get_logs_path(name, m))
             result =  {'message':f'Killed {proc_name}', 'success':True}
         except Exception as e:
             result =  {'message':f'Error killing {proc_name}', 'success':False, 'error':e}
         return result
+
+    def rm_logs(self, name:str):
+        for m in ['out', 'error']:
+            path = self.get_logs_path(name, m)
+            if os.path.exists(path):
+                os.remove(path)
     
     def kill_all(self, verbose:bool = True, timeout=20):
         servers = self.procs()
@@ -127,10 +243,13 @@ class Pm2:
 
     def sync_env(self,**kwargs):
         '''ensure that the environment variables are set for the proc'''
+        if type(self).pm2_installed:
+            return {'success':True, 'message':f'Ensured env '}
         is_pm2_installed = bool( '/bin/pm2' in c.cmd('which pm2', verbose=False))
         if not is_pm2_installed:
             c.cmd('npm install -g pm2')
             c.cmd('pm2 update')
+        type(self).pm2_installed = True
         return {'success':True, 'message':f'Ensured env '}
   
    
\ No newline at end of file
@@ -1,10 +1,15 @@
+import ctypes
+import ctypes.util
 import os
 import platform
+import struct
 import sys
 import tty
 import termios
 import select
 import time
+from bisect import bisect_left, insort
+from collections import deque, namedtuple
 from datetime import datetime
 from queue import Queue
 from threading import Event, Thread
@@ -52,7 +57,57 @@ class KeyboardReader:
         else:
             return sys.stdin.read(1).encode()
 
+class InotifyWatcher:
+    """Wakes up on changes to one file, including it being rotated or recreated (Linux only)."""
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_NONBLOCK = 0o4000
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.name = os.path.basename(path).encode()
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch the directory so a rotated or recreated file is seen too
+        mask = (self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM |
+                self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE)
+        directory = os.path.dirname(os.path.abspath(path)).encode()
+        if libc.inotify_add_watch(self.fd, directory, mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        """Return True if the file changed within timeout seconds"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        changed = False
+        while offset + self.EVENT_HEADER.size <= len(data):
+            _, _, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            changed = changed or name == self.name
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
 class BaseLogReader:
+    """Follows a log file, sending each complete line to the queue once, across rotations."""
+    wait_timeout = 0.1
+
     def __init__(self, log_path, log_type, queue):
         self.log_path = log_path
         self.log_type = log_type
@@ -60,17 +115,52 @@ class BaseLogReader:
         self.running = Event()
         self.thread = Thread(target=self._read_log, daemon=True)
         self.last_position = 0
+        self.file = None
+        self.partial = b''
         
+    def _open(self):
+        self.file = open(self.log_path, 'rb')
+        self.last_position = 0
+        self.partial = b''
+
+    def _read_new(self, is_new):
+        """Send the lines appended since the last read, reopening the file if it was rotated"""
+        if self.file is None:
+            if not os.path.exists(self.log_path):
+                return
+            self._open()
+        while True:
+            self.file.seek(self.last_position)
+            data = self.file.read()
+            self.last_position = self.file.tell()
+            if data:
+                lines = (self.partial + data).split(b'\n')
+                self.partial = lines.pop()
+                for line in lines:
+                    line = line.decode('utf-8', errors='replace').rstrip('\r')
+                    if line:  # Only send non-empty lines
+                        self.queue.put((self.log_type, line, is_new))
+            if not self._rotated():
+                return
+            # The old file is drained, continue with the new one from its start
+            self.file.close()
+            self.file = None
+            if not os.path.exists(self.log_path):
+                return
+            self._open()
+
+    def _rotated(self):
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return True
+        current = os.fstat(self.file.fileno())
+        return (stat.st_ino, stat.st_dev) != (current.st_ino, current.st_dev) or stat.st_size < self.last_position
+
     def _read_existing_content(self):
         """Read existing content exactly as is"""
         try:
-            with open(self.log_path, 'r', buffering=1) as f:
-                content = f.read()
-                self.last_position = f.tell()
-                lines = content.splitlines()
-                for line in lines:
-                    if line:  # Only send non-empty lines
-                        self.queue.put((self.log_type, line, False))
+            self._read_new(False)
         except Exception as e:
             self.queue.put((self.log_type, f"Error reading log: {e}", False))
 
@@ -83,50 +173,44 @@ class BaseLogReader:
         self.running.clear()
         if self.thread.is_alive():
             self.thread.join(timeout=1.0)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
 
-    def _read_log(self):
-        raise NotImplementedError("Subclasses must implement _read_log")
+    def _wait(self):
+        """Block until the log may have changed"""
+        time.sleep(self.wait_timeout)
 
-class UnixLogReader(BaseLogReader):
     def _read_log(self):
         try:
-            import select
-            with open(self.log_path, 'r') as f:
-                fd = f.fileno()
-                poll_obj = select.poll()
-                poll_obj.register(fd, select.POLLIN)
-
-                while self.running.is_set():
-                    events = poll_obj.poll(100)
-                    if events:
-                        f.seek(self.last_position)
-                        new_content = f.read()
-                        self.last_position = f.tell()
-                        
-                        if new_content:
-                            lines = new_content.splitlines()
-                            for line in lines:
-                                if line:
-                                    self.queue.put((self.log_type, line, True))
+            while self.running.is_set():
+                self._wait()
+                self._read_new(True)
         except Exception as e:
             self.queue.put((self.log_type, f"Error monitoring log: {e}", True))
 
-class WindowsLogReader(BaseLogReader):
+class UnixLogReader(BaseLogReader):
+    """Sleeps on inotify instead of polling when it is available"""
+
     def _read_log(self):
         try:
-            with open(self.log_path, 'r') as f:
-                while self.running.is_set():
-                    f.seek(self.last_position)
-                    new_content = f.read()
-                    if new_content:
-                        self.last_position = f.tell()
-                        lines = new_content.splitlines()
-                        for line in lines:
-                            if line:
-                                self.queue.put((self.log_type, line, True))
-                    time.sleep(0.1)
-        except Exception as e:
-            self.queue.put((self.log_type, f"Error monitoring log: {e}", True))
+            self.watcher = InotifyWatcher(self.log_path)
+        except (OSError, AttributeError):
+            self.watcher = None
+        try:
+            super()._read_log()
+        finally:
+            if self.watcher is not None:
+                self.watcher.close()
+
+    def _wait(self):
+        if self.watcher is None:
+            return super()._wait()
+        # The timeout only bounds how long stop() waits for the thread
+        self.watcher.wait(0.5)
+
+class WindowsLogReader(BaseLogReader):
+    pass
 
 def get_log_reader_class():
     system = platform.system().lower()
@@ -180,7 +264,7 @@ class ProcessStats:
                     border_style="cyan",
                     box=box.ROUNDED,
                     title="[bold cyan]Compute Subnet Monitor[/bold cyan]",
-                    subtitle="[dim]↑/↓ to scroll · Ctrl+C to exit[/dim]"
+                    subtitle="[dim]↑/↓ to scroll · w/e/a filter · Ctrl+C to exit[/dim]"
                 )
         except psutil.NoSuchProcess:
             return Panel(
@@ -224,78 +308,142 @@ def parse_log_line(line):
     except Exception:
         return "", "", line.strip()
 
-def format_logs(log_lines, max_lines=1000, visible_lines=20):
-    table = Table(
-        show_header=True,
-        header_style="bold cyan",
-        box=box.ROUNDED,
-        expand=True,
-        title="[bold cyan]Compute Subnet Logs[/bold cyan]",
-        caption=f"[dim]Showing {min(len(log_lines), max_lines)} logs (↑/↓ to scroll)[/dim]",
-        padding=(0, 1),
-        collapse_padding=True
-    )
-    
-    table.add_column("Source/Time", style="cyan", no_wrap=True)
-    table.add_column("Level", style="bold yellow", width=10)
-    table.add_column("Message", style="white", ratio=1)
-    table.add_column("", style="green dim", width=3)
-
-    # Keep only the last max_lines
-    log_lines = log_lines[-max_lines:]
-    rows = []
-    
-    for line, is_new in log_lines:
+LogRecord = namedtuple('LogRecord', ['seq', 'source_time', 'level', 'message', 'severity', 'is_new'])
+
+def message_severity(message, level):
+    """Severity a message is styled and filtered by"""
+    if "class" in message or "cipher" in message:
+        return "muted"
+    elif " - INFO" in message:
+        return "info"
+    elif "WARNING" in message or "Warning" in level:
+        return "warning"
+    elif "ERROR" in message:
+        return "error"
+    return "plain"
+
+SEVERITY_STYLES = {
+    "muted": Style(color="yellow", dim=True),
+    "info": Style(color="green"),
+    "warning": Style(color="yellow"),
+    "error": Style(color="red"),
+    "plain": Style(color="white"),
+}
+
+# Level filters and the severities they show, None shows everything
+LEVEL_FILTERS = {
+    "warning": ("warning", "error"),
+    "error": ("error",),
+}
+
+class LogEngine:
+    """
+    Parses each log line once into a ring buffer of the last max_lines records
+    and keeps them sorted (warnings first, then timestamps) per level filter,
+    so a refresh only renders the visible window.
+    """
+
+    def __init__(self, max_lines=1000):
+        self.max_lines = max_lines
+        self.records = deque()
+        self.by_seq = {}
+        self.indexes = {None: []}
+        self.indexes.update({name: [] for name in LEVEL_FILTERS})
+        self.next_seq = 0
+        self.version = 0
+
+    @staticmethod
+    def sort_key(record):
+        """Warnings first, then timestamps, then arrival order"""
+        if "Warning" in record.level:
+            group = 0
+        elif record.source_time.startswith("2025-"):
+            group = 1
+        else:
+            group = 2
+        return (group, record.source_time, record.seq)
+
+    def _filters(self, record):
+        yield None
+        for name, severities in LEVEL_FILTERS.items():
+            if record.severity in severities:
+                yield name
+
+    def append(self, line, is_new=False):
         source_time, level, message = parse_log_line(str(line))
+        record = LogRecord(
+            self.next_seq, source_time, level, message, message_severity(message, level), is_new
+        )
+        self.next_seq += 1
+        self.records.append(record)
+        self.by_seq[record.seq] = record
+        key = self.sort_key(record)
+        for name in self._filters(record):
+            insort(self.indexes[name], key)
+        if len(self.records) > self.max_lines:
+            self._evict(self.records.popleft())
+        self.version += 1
+        return record
+
+    def extend(self, lines):
+        for line, is_new in lines:
+            self.append(line, is_new)
+
+    def _evict(self, record):
+        del self.by_seq[record.seq]
+        key = self.sort_key(record)
+        for name in self._filters(record):
+            index = self.indexes[name]
+            del index[bisect_left(index, key)]
+
+    def count(self, level_filter=None):
+        return len(self.indexes[level_filter])
+
+    def clamp_scroll(self, scroll_position, visible_lines=20, level_filter=None):
+        max_scroll = max(0, self.count(level_filter) - visible_lines)
+        return max(0, min(scroll_position, max_scroll))
+
+    def window(self, scroll_position=0, visible_lines=20, level_filter=None):
+        """Records of the visible window, in display order"""
+        start = self.clamp_scroll(scroll_position, visible_lines, level_filter)
+        keys = self.indexes[level_filter][start:start + visible_lines]
+        return [self.by_seq[key[2]] for key in keys]
+
+    def render(self, scroll_position=0, visible_lines=20, level_filter=None):
+        shown = f"{level_filter} " if level_filter else ""
+        table = Table(
+            show_header=True,
+            header_style="bold cyan",
+            box=box.ROUNDED,
+            expand=True,
+            title="[bold cyan]Compute Subnet Logs[/bold cyan]",
+            caption=f"[dim]Showing {self.count(level_filter)} {shown}logs (↑/↓ to scroll)[/dim]",
+            padding=(0, 1),
+            collapse_padding=True
+        )
         
-        # Determine message style based on content
-        if "class" in message or "cipher" in message:
-            msg_style = Style(color="yellow", dim=True)
-        elif " - INFO" in message:
-            msg_style = Style(color="green")
-        elif "WARNING" in message or "Warning" in level:
-            msg_style = Style(color="yellow")
-        elif "ERROR" in message:
-            msg_style = Style(color="red")
-        else:
-            msg_style = Style(color="white")
-
-        rows.append((
-            Text(source_time, style="cyan"),
-            Text(level, style="yellow bold") if level else Text(""),
-            Text(message, style=msg_style),
-            "●" if is_new else ""
-        ))
-
-    # Custom sort: Warnings first, then timestamps
-    def sort_key(row):
-        timestamp = row[0].plain
-        if "Warning" in row[1].plain:
-            return (0, timestamp)
-        if timestamp.startswith("2025-"):
-            return (1, timestamp)
-        return (2, timestamp)
-    
-    rows.sort(key=sort_key)
-    
-    # Calculate visible range for scrolling
-    total_rows = len(rows)
-    scroll_position = getattr(format_logs, 'scroll_position', 0)
+        table.add_column("Source/Time", style="cyan", no_wrap=True)
+        table.add_column("Level", style="bold yellow", width=10)
+        table.add_column("Message", style="white", ratio=1)
+        table.add_column("", style="green dim", width=3)
+
+        for record in self.window(scroll_position, visible_lines, level_filter):
+            table.add_row(
+                Text(record.source_time, style="cyan"),
+                Text(record.level, style="yellow bold") if record.level else Text(""),
+                Text(record.message, style=SEVERITY_STYLES[record.severity]),
+                "●" if record.is_new else ""
+            )
+        return table
+
+def format_logs(log_lines, max_lines=1000, visible_lines=20):
+    engine = LogEngine(max_lines)
+    engine.extend(log_lines[-max_lines:])
     
     # Ensure scroll position is within bounds
-    max_scroll = max(0, total_rows - visible_lines)
-    scroll_position = max(0, min(scroll_position, max_scroll))
-    format_logs.scroll_position = scroll_position
-    
-    # Only add visible rows
-    start_idx = scroll_position
-    end_idx = min(start_idx + visible_lines, total_rows)
-    
-    visible_rows = rows[start_idx:end_idx]
-    for row in visible_rows:
-        table.add_row(*row)
-
-    return table
+    scroll_position = getattr(format_logs, 'scroll_position', 0)
+    format_logs.scroll_position = engine.clamp_scroll(scroll_position, visible_lines)
+    return engine.render(format_logs.scroll_position, visible_lines)
 
 def get_log_path():
     """Get path to the compute subnet stderr log file"""
@@ -303,9 +451,8 @@ def get_log_path():
     log_dir = os.path.join(project_root, 'logs')
     return os.path.join(log_dir, 'polarise.log')
 
-def monitor_logs(process_pid=None):
+def monitor_logs(process_pid=None, visible_lines=20, stats_interval=1.0):
     log_path = get_log_path()
-    format_logs.scroll_position = 0  # Initialize scroll position
     
     # Ensure log directory exists
     os.makedirs(os.path.dirname(log_path), exist_ok=True)
@@ -313,7 +460,9 @@ def monitor_logs(process_pid=None):
         open(log_path, 'a').close()
 
     try:
-        log_lines = []
+        engine = LogEngine()
+        scroll_position = 0
+        level_filter = None
         log_queue = Queue()
         
         LogReader = get_log_reader_class()
@@ -331,40 +480,59 @@ def monitor_logs(process_pid=None):
         reader.start()
         keyboard.start()
 
+        # Only redraw when the logs, the view or the process stats changed
         with Live(
-            auto_refresh=True,
-            refresh_per_second=4,
+            auto_refresh=False,
             vertical_overflow="visible",
             screen=True,
             console=Console(force_terminal=True)
         ) as live:
             try:
+                rendered = None
+                stats_panel = None
+                last_stats_time = 0
                 while True:
-                    # Handle keyboard input for scrolling
-                    if keyboard.kbhit():
+                    # Handle keyboard input for scrolling and filtering
+                    while keyboard.kbhit():
                         key = keyboard.getch()
                         # Handle both Windows and Unix key codes
                         if key in (b'H', b'A'):  # Up arrow (Windows: H, Unix: A)
-                            format_logs.scroll_position = max(0, format_logs.scroll_position - 1)
+                            scroll_position = max(0, scroll_position - 1)
                         elif key in (b'P', b'B'):  # Down arrow (Windows: P, Unix: B)
-                            format_logs.scroll_position = format_logs.scroll_position + 1
+                            scroll_position = scroll_position + 1
+                        elif key == b'w':
+                            level_filter, scroll_position = "warning", 0
+                        elif key == b'e':
+                            level_filter, scroll_position = "error", 0
+                        elif key == b'a':
+                            level_filter, scroll_position = None, 0
+                        elif key == b'\x03':  # Ctrl+C in raw mode
+                            raise KeyboardInterrupt
 
                     while not log_queue.empty():
                         _, line, is_new = log_queue.get_nowait()
-                        log_lines.append((line, is_new))
-
-                    layout = Layout()
-                    
-                    if process_stats:
-                        layout.split_column(
-                            Layout(process_stats.get_status(), size=10),
-                            Layout(format_logs(log_lines))
-                        )
-                    else:
-                        layout.update(format_logs(log_lines))
-                    
-                    live.update(layout)
-                    time.sleep(0.1)  # Shorter sleep for more responsive scrolling
+                        engine.append(line, is_new)
+                    scroll_position = engine.clamp_scroll(scroll_position, visible_lines, level_filter)
+
+                    if process_stats and time.time() - last_stats_time >= stats_interval:
+                        stats_panel = process_stats.get_status()
+                        last_stats_time = time.time()
+
+                    state = (engine.version, scroll_position, level_filter, id(stats_panel))
+                    if state != rendered:
+                        logs_table = engine.render(scroll_position, visible_lines, level_filter)
+                        layout = Layout()
+                        if process_stats:
+                            layout.split_column(
+                                Layout(stats_panel, size=10),
+                                Layout(logs_table)
+                            )
+                        else:
+                            layout.update(logs_table)
+                        live.update(layout, refresh=True)
+                        rendered = state
+
+                    time.sleep(0.05)  # Short sleep for responsive scrolling
 
             except KeyboardInterrupt:
                 console.print("\n[yellow]Monitoring stopped.[/yellow]")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test that the vectorised batch scoring of the validator gives the same scores
+as the per-miner scoring functions, on random and malformed hardware specs.
+"""
+
+import logging
+import math
+import os
+import random
+import sys
+
+import numpy as np
+
+# Add the current directory to the path so we can import the validator package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from validator.src.config import ScoringConfig
+from validator.src.utils import resource_scoring
+
+# the per-miner functions log a warning for every malformed value
+logging.getLogger(resource_scoring.__name__).setLevel(logging.CRITICAL)
+
+SPEC_KEYS = ['cpu_count', 'cpu_speed', 'memory', 'storage', 'bandwidth']
+CONTAINER_KEYS = ['active_time', 'cpu_utilization', 'memory_utilization']
+MALFORMED_VALUES = [0, 1, 2.5, '3', 'x', None, float('nan'), -4, 1e308, '1e3', True, [1]]
+GPU_NAMES = ['RTX 4090', 'Tesla T4', 'A100', 'unknown', None, 5]
+GPU_MEMORY = [8192, 40000.0, 'x', None, float('nan')]
+
+def random_value(rng):
+    return rng.choice(MALFORMED_VALUES + [rng.uniform(0, 5000) for _ in range(5)])
+
+def random_miner(rng):
+    """random (hardware_specs, container_data) with missing and malformed fields"""
+    specs = {k: random_value(rng) for k in SPEC_KEYS if rng.random() < 0.9}
+    if rng.random() < 0.7:
+        specs['gpus'] = [
+            {'name': rng.choice(GPU_NAMES), 'memory': rng.choice(GPU_MEMORY)}
+            for _ in range(rng.randint(0, 4))
+        ]
+    containers = [
+        {k: random_value(rng) for k in CONTAINER_KEYS if rng.random() < 0.9}
+        for _ in range(rng.randint(0, 3))
+    ]
+    return specs, containers
+
+def same_score(a, b):
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+def test_batch_scores_match_per_miner_scores(trials=500, miners_per_trial=8, seed=0):
+    rng = random.Random(seed)
+    config = ScoringConfig()
+    for _ in range(trials):
+        miners = {str(i): random_miner(rng) for i in range(miners_per_trial)}
+        batch = resource_scoring.score_miners(miners, config)
+        for miner_id, (specs, containers) in miners.items():
+            expected = resource_scoring.calculate_miner_score(specs, containers, config)
+            for key in ['cpu', 'gpu', 'memory', 'storage', 'network']:
+                assert same_score(expected['hardware'][key], batch[miner_id][key]), (specs, key)
+            assert same_score(expected['final_score'], batch[miner_id]['final_score']), (specs, containers)
+
+def test_batch_weights_match_normalize_scores(seed=1):
+    rng = random.Random(seed)
+    scores = [rng.choice([0.0, 0.5, 1.0, rng.uniform(0, 50)]) for _ in range(100)]
+    weights = resource_scoring.normalize_score_batch(
+        np.array(scores), min_score=1.0, max_weight=1.0
+    ).tolist()
+    total = sum(s for s in scores if s >= 1.0)
+    expected = [s / total if s >= 1.0 else 0.0 for s in scores]
+    assert all(math.isclose(a, b, rel_tol=1e-12) for a, b in zip(weights, expected))
+
+def test_infinite_cpu_count_scores_zero():
+    config = ScoringConfig()
+    specs = {'cpu_count': float('inf'), 'cpu_speed': 3.0}
+    try:
+        resource_scoring.calculate_cpu_score(specs, config)
+        raise AssertionError('calculate_cpu_score accepted an infinite cpu_count')
+    except OverflowError:
+        pass
+    assert resource_scoring.score_miners({'0': (specs, [])}, config)['0']['cpu'] == 0.0
+
+def main():
+    tests = [
+        test_batch_scores_match_per_miner_scores,
+        test_batch_weights_match_normalize_scores,
+        test_infinite_cpu_count_scores_zero,
+    ]
+    for test in tests:
+        test()
+        print(f"{test.__name__}: passed")
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,16 @@ import time
 import argparse
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, Any, List, Optional, Tuple
 
 import bittensor as bt
 import requests
 
+from validator.src.utils.resource_scoring import normalize_score_batch
+from validator.src.utils.ssh_utils import SSHSessionPool, get_hardware_specifications
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,7 +39,11 @@ class SimplifiedValidator:
                  max_score: float = 100.0,
                  min_score_for_weight: float = 5.0,
                  max_weight: float = 1.0,
-                 api_base_url: str = "https://api.polaris.network/v1"):
+                 api_base_url: str = "https://api.polaris.network/v1",
+                 max_concurrent_verifications: int = 16,
+                 max_idle_ssh_sessions: int = 256,
+                 miner_deadline: float = 120,
+                 spec_ttl: float = 6 * 3600):
         """
         Initialize simplified validator.
         
@@ -49,6 +58,10 @@ class SimplifiedValidator:
             min_score_for_weight: Minimum score to receive weight
             max_weight: Maximum weight value
             api_base_url: Base URL for Polaris API
+            max_concurrent_verifications: Miners verified (and SSH sessions in use) at once
+            max_idle_ssh_sessions: SSH sessions kept open between rounds, at least the number of miners to reuse them all
+            miner_deadline: Seconds a miner's verification may take before it is marked unverified
+            spec_ttl: Seconds verified specs of an unchanged miner are reused without re-probing
         """
         # Bittensor settings
         self.wallet_name = wallet_name
@@ -66,6 +79,22 @@ class SimplifiedValidator:
         # API settings
         self.api_base_url = api_base_url
         
+        # Verification settings
+        self.max_concurrent_verifications = max_concurrent_verifications
+        self.miner_deadline = miner_deadline
+        self.spec_ttl = spec_ttl
+        self.ssh_pool = SSHSessionPool(
+            max_sessions=max_concurrent_verifications,
+            max_idle=max_idle_ssh_sessions
+        )
+        self.verification_executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_verifications,
+            thread_name_prefix="verify"
+        )
+        # miner_id -> {'fingerprint', 'specs', 'verified_at'}
+        self.spec_cache: Dict[str, Dict[str, Any]] = {}
+        self.spec_cache_lock = threading.Lock()
+        
         # State
         self.last_validation_time = 0
         self.last_submission_time = 0
@@ -188,11 +217,35 @@ class SimplifiedValidator:
             logger.error(f"Error fetching registered miners: {e}")
             return {}
     
+    @staticmethod
+    def miner_fingerprint(miner_data: Dict[str, Any]) -> str:
+        """Fingerprint of what a miner claims and how to reach it."""
+        return json.dumps(
+            {'ssh': miner_data.get('ssh', {}), 'resources': miner_data.get('resources', {})},
+            sort_keys=True,
+            default=str
+        )
+    
+    def cached_specs(self, miner_id: str, miner_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Specs verified within spec_ttl for an unchanged miner, None otherwise."""
+        with self.spec_cache_lock:
+            entry = self.spec_cache.get(miner_id)
+        if entry is None:
+            return None
+        if entry['fingerprint'] != self.miner_fingerprint(miner_data):
+            return None
+        if time.time() - entry['verified_at'] > self.spec_ttl:
+            return None
+        return entry['specs']
+    
     def verify_miner_resources(self, miner_id: str, miner_data: Dict[str, Any]) -> Tuple[bool, Dict[str, Any], str]:
         """
         Verify miner resources.
         
-        For simplicity, this mock implementation just returns success without actual verification.
+        Miners with SSH information are probed over a pooled SSH session, all
+        probes in one remote script, and their specs are reused for spec_ttl
+        seconds while the miner's claims are unchanged. Other miners keep the
+        simulated verification.
         
         Args:
             miner_id: Miner ID
@@ -201,6 +254,28 @@ class SimplifiedValidator:
         Returns:
             Tuple of (success, actual_specs, reason)
         """
+        if miner_data.get('ssh'):
+            specs = self.cached_specs(miner_id, miner_data)
+            if specs is not None:
+                logger.info(f"Using cached specs for miner {miner_id}")
+                return True, specs, "Resource validation passed (cached)"
+            
+            logger.info(f"Verifying resources for miner {miner_id}")
+            with self.ssh_pool.session(miner_data) as ssh_client:
+                if ssh_client is None:
+                    return False, {}, "Failed to connect via SSH"
+                specs = get_hardware_specifications(ssh_client, timeout=self.miner_deadline)
+            if not specs:
+                return False, {}, "Failed to retrieve hardware specifications"
+            
+            with self.spec_cache_lock:
+                self.spec_cache[miner_id] = {
+                    'fingerprint': self.miner_fingerprint(miner_data),
+                    'specs': specs,
+                    'verified_at': time.time()
+                }
+            return True, specs, "Resource validation passed"
+        
         logger.info(f"Verifying resources for miner {miner_id} (simulated)")
         
         # In real implementation, this would SSH to the miner and verify resources
@@ -321,24 +396,20 @@ class SimplifiedValidator:
         if not scores:
             return {}
         
-        # Filter out miners with scores below minimum
-        valid_scores = {
-            miner_id: score
-            for miner_id, score in scores.items()
-            if score >= self.min_score_for_weight
-        }
+        # Normalize all scores in one pass, miners below the minimum get no weight
+        miner_ids = list(scores)
+        values = [float(scores[miner_id]) for miner_id in miner_ids]
+        valid = [score >= self.min_score_for_weight for score in values]
         
-        if not valid_scores:
+        if not any(valid):
             logger.warning("No miners have scores above the minimum threshold")
             return {}
         
-        # Calculate total score
-        total_score = sum(valid_scores.values())
-        
-        # Normalize to weights
+        normalized = normalize_score_batch(values, self.min_score_for_weight, self.max_weight).tolist()
         weights = {
-            miner_id: (score / total_score) * self.max_weight
-            for miner_id, score in valid_scores.items()
+            miner_id: weight
+            for miner_id, weight, is_valid in zip(miner_ids, normalized, valid)
+            if is_valid
         }
         
         logger.info(f"Normalized {len(weights)} scores to weights")
@@ -448,12 +519,14 @@ class SimplifiedValidator:
         # Initialize results
         validation_results = {}
         
+        # Verify all miners concurrently
+        verifications = self.verify_miners_concurrently(registered_miners)
+        
         # Process each miner
         for miner_id, miner_data in registered_miners.items():
             logger.info(f"Validating miner {miner_id}")
             
-            # Verify resources
-            is_verified, actual_specs, verification_reason = self.verify_miner_resources(miner_id, miner_data)
+            is_verified, actual_specs, verification_reason = verifications[miner_id]
             
             if not is_verified:
                 logger.warning(f"Miner {miner_id} failed resource verification: {verification_reason}")
@@ -488,6 +561,48 @@ class SimplifiedValidator:
         logger.info(f"Completed validation of {len(registered_miners)} miners")
         return validation_results
     
+    def verify_miners_concurrently(self, miners: Dict[str, Dict[str, Any]]) -> Dict[str, Tuple[bool, Dict[str, Any], str]]:
+        """
+        Verify miners max_concurrent_verifications at a time.
+        
+        A miner whose verification runs past miner_deadline (counted from when
+        it started) is unverified, its probe is left to finish in the background.
+        
+        Args:
+            miners: Dictionary of registered miners
+        
+        Returns:
+            Dictionary of miner_id -> (success, actual_specs, reason)
+        """
+        started: Dict[str, float] = {}
+        
+        def verify(miner_id: str, miner_data: Dict[str, Any]) -> Tuple[bool, Dict[str, Any], str]:
+            started[miner_id] = time.time()
+            try:
+                return self.verify_miner_resources(miner_id, miner_data)
+            except Exception as e:
+                logger.error(f"Error verifying miner {miner_id}: {e}")
+                return False, {}, f"Verification error: {e}"
+        
+        future_to_miner = {
+            self.verification_executor.submit(verify, miner_id, miner_data): miner_id
+            for miner_id, miner_data in miners.items()
+        }
+        results = {}
+        pending = set(future_to_miner)
+        while pending:
+            done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[future_to_miner[future]] = future.result()
+            now = time.time()
+            for future in list(pending):
+                miner_id = future_to_miner[future]
+                if miner_id in started and now - started[miner_id] > self.miner_deadline:
+                    logger.warning(f"Verification of miner {miner_id} exceeded {self.miner_deadline}s deadline")
+                    results[miner_id] = (False, {}, "Verification deadline exceeded")
+                    pending.discard(future)
+        return results
+    
     def run_validation_step(self) -> bool:
         """
         Run a single validation step.
@@ -547,6 +662,9 @@ class SimplifiedValidator:
         except Exception as e:
             logger.error(f"Validator stopped due to error: {e}")
             raise
+        finally:
+            self.verification_executor.shutdown(wait=False)
+            self.ssh_pool.close()
 
 def parse_args():
     """Parse command line arguments."""
@@ -74,31 +74,37 @@ def log_exception(
         logger.log(level, f"{msg}: {exc}")
 
 def exception_handler(
-    logger: logging.Logger,
-    msg: str,
+    logger: Optional[logging.Logger] = None,
+    msg: str = "Unhandled exception",
     fallback_value: Any = None,
     include_traceback: bool = True,
     level: int = logging.ERROR,
+    fallback_return: Any = None,
 ) -> Callable:
     """
     Create a decorator for handling exceptions in a consistent way.
     
     Args:
-        logger: The logger to use
+        logger: The logger to use, defaults to the logger of the decorated function's module
         msg: A descriptive message about what failed
         fallback_value: Value to return if an exception occurs
         include_traceback: Whether to include the traceback in the log
         level: The logging level to use
+        fallback_return: Alias of fallback_value, as used by the utils modules
         
     Returns:
         A decorator for handling exceptions
     """
+    fallback = fallback_return if fallback_return is not None else fallback_value
+
     def decorator(func):
+        func_logger = logger or logging.getLogger(func.__module__)
+
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
-                log_exception(logger, f"{msg} in {func.__name__}", e, include_traceback, level)
-                return fallback_value
+                log_exception(func_logger, f"{msg} in {func.__name__}", e, include_traceback, level)
+                return fallback
         return wrapper
     return decorator 
\ No newline at end of file
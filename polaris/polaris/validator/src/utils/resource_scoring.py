@@ -8,6 +8,8 @@ scores are used to determine miners' overall weight in the network.
 import logging
 from typing import Dict, Any, List, Tuple, Optional
 
+import numpy as np
+
 from validator.src.config import ScoringConfig
 
 logger = logging.getLogger(__name__)
@@ -297,6 +299,248 @@ def calculate_miner_score(
         }
     }
 
+def _to_float(value: Any, cast=float) -> Optional[float]:
+    """cast(value) as a float, None if it can not be converted."""
+    try:
+        return float(cast(value))
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+def build_resource_table(
+    hardware_specs: List[Dict[str, Any]],
+    container_data: List[List[Dict[str, Any]]],
+    config: ScoringConfig
+) -> Dict[str, np.ndarray]:
+    """
+    Build a column table of the miners' hardware specs and container usage.
+    
+    Each miner is one row of the per-miner columns, each GPU and container
+    one row of the per-GPU and per-container columns, whose 'gpu_miner' and
+    'container_miner' columns hold the row of their miner. The '*_valid'
+    columns are False where the per-miner functions could not convert a
+    value and would score 0.0.
+    
+    Args:
+        hardware_specs: Hardware specifications, one per miner
+        container_data: Container usage data, one list per miner
+        config: Scoring configuration (for the GPU bonus factors)
+        
+    Returns:
+        A dictionary of numpy columns
+    """
+    columns: Dict[str, List[Any]] = {
+        name: [] for name in (
+            'cpu_count', 'cpu_speed', 'memory', 'storage', 'bandwidth',
+            'cpu_valid', 'memory_valid', 'storage_valid', 'bandwidth_valid', 'gpu_valid'
+        )
+    }
+    gpu_miner, gpu_memory, gpu_bonus = [], [], []
+    for row, specs in enumerate(hardware_specs):
+        cpu_values = (_to_float(specs.get('cpu_count', 0), int), _to_float(specs.get('cpu_speed', 0.0)))
+        columns['cpu_valid'].append(None not in cpu_values)
+        for name, value in zip(('cpu_count', 'cpu_speed'), cpu_values):
+            columns[name].append(0.0 if None in cpu_values else value)
+        for name in ('memory', 'storage', 'bandwidth'):
+            value = _to_float(specs.get(name, 0))
+            columns[f'{name}_valid'].append(value is not None)
+            columns[name].append(0.0 if value is None else value)
+        
+        # calculate_gpu_score gives 0.0 if any GPU is malformed
+        try:
+            rows = []
+            for gpu in specs.get('gpus', []) or []:
+                name = str(gpu.get('name', '')).lower()
+                bonus = next(
+                    (factor for gpu_type, factor in config.gpu_bonus_factors.items() if gpu_type in name),
+                    1.0
+                )
+                rows.append((gpu.get('memory', 0) / 1024.0, bonus))
+            valid = True
+        except Exception as e:
+            logger.warning(f"Error calculating GPU score: {e}")
+            rows, valid = [], False
+        columns['gpu_valid'].append(valid)
+        for memory_gb, bonus in rows:
+            gpu_miner.append(row)
+            gpu_memory.append(memory_gb)
+            gpu_bonus.append(bonus)
+    
+    container_columns: Dict[str, List[Any]] = {
+        name: [] for name in (
+            'container_miner', 'active_time', 'cpu_utilization', 'memory_utilization', 'container_valid'
+        )
+    }
+    container_count = []
+    for row, containers in enumerate(container_data):
+        container_count.append(len(containers or []))
+        for container in containers or []:
+            values = [
+                _to_float(container.get(name, 0))
+                for name in ('active_time', 'cpu_utilization', 'memory_utilization')
+            ]
+            valid = None not in values
+            container_columns['container_miner'].append(row)
+            container_columns['container_valid'].append(valid)
+            for name, value in zip(('active_time', 'cpu_utilization', 'memory_utilization'), values):
+                container_columns[name].append(value if valid else 0.0)
+    
+    table = {name: np.array(values, dtype=float) for name, values in columns.items()}
+    table.update({name: np.array(values, dtype=float) for name, values in container_columns.items()})
+    for name in ('cpu_valid', 'memory_valid', 'storage_valid', 'bandwidth_valid', 'gpu_valid', 'container_valid'):
+        table[name] = table[name].astype(bool)
+    table['gpu_miner'] = np.array(gpu_miner, dtype=np.intp)
+    table['gpu_memory'] = np.array(gpu_memory, dtype=float)
+    table['gpu_bonus'] = np.array(gpu_bonus, dtype=float)
+    table['container_miner'] = table['container_miner'].astype(np.intp)
+    table['container_count'] = np.array(container_count, dtype=np.intp)
+    return table
+
+def _capped(max_score: float, raw: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """min(max_score, raw) per row, 0.0 where the row is not valid."""
+    # np.fmin, like min(max_score, raw), gives max_score when raw is nan
+    return np.where(valid, np.fmin(max_score, raw), 0.0)
+
+def _sum_by_row(rows: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    """Per-row sums, added in order like the per-miner loops."""
+    # np.bincount accumulates sequentially, np.add.reduceat would sum pairwise
+    return np.bincount(rows, weights=values, minlength=n)[:n] if len(rows) else np.zeros(n)
+
+def normalize_score_batch(scores: np.ndarray, min_score: float, max_weight: float) -> np.ndarray:
+    """
+    Normalize scores to weights in one pass.
+    
+    Scores below min_score get weight 0.0, the others score / total * max_weight.
+    
+    Args:
+        scores: Miner scores
+        min_score: Minimum score to receive weight
+        max_weight: Maximum weight value
+        
+    Returns:
+        The weights, all 0.0 if no score reaches min_score
+    """
+    scores = np.asarray(scores, dtype=float)
+    valid = scores >= min_score
+    if not valid.any():
+        return np.zeros(len(scores))
+    # cumsum adds in order like sum(), np.sum would sum pairwise
+    total_score = np.cumsum(scores[valid])[-1]
+    return np.where(valid, scores / total_score * max_weight, 0.0)
+
+def calculate_batch_scores(
+    table: Dict[str, np.ndarray],
+    config: ScoringConfig,
+    min_score_for_weight: Optional[float] = None,
+    max_weight: float = 1.0
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate the scores of all miners of a resource table in one vectorised pass.
+    
+    The columns equal calculate_miner_score of each miner: 'cpu', 'gpu',
+    'memory', 'storage', 'network', 'hardware', 'container_average',
+    'container_count', 'hardware_contribution', 'container_contribution' and
+    'final_score'. With min_score_for_weight a 'weight' column holds the
+    final scores normalized by normalize_score_batch.
+    
+    Inputs the per-miner functions raise on score 0.0 here instead: a
+    cpu_count of inf, which calculate_cpu_score passes to int() and so
+    raises OverflowError, gives a cpu score of 0.0.
+    
+    Args:
+        table: Column table from build_resource_table
+        config: Scoring configuration
+        min_score_for_weight: Minimum score to receive weight, None for no weights
+        max_weight: Maximum weight value
+        
+    Returns:
+        A dictionary of numpy columns, one row per miner
+    """
+    n = len(table['cpu_count'])
+    
+    # inf and nan inputs score like the per-miner functions, without warnings
+    with np.errstate(invalid='ignore', over='ignore', divide='ignore'):
+        cpu = _capped(
+            config.cpu_max_score,
+            table['cpu_count'] * table['cpu_speed'] / config.cpu_normalization_factor * config.cpu_max_score,
+            table['cpu_valid']
+        )
+        gpu_scores = table['gpu_memory'] * config.gpu_base_factor * table['gpu_bonus']
+        gpu = _capped(config.gpu_max_score, _sum_by_row(table['gpu_miner'], gpu_scores, n), table['gpu_valid'])
+        memory = _capped(
+            config.memory_max_score, table['memory'] / config.memory_normalization_factor, table['memory_valid']
+        )
+        storage = _capped(
+            config.storage_max_score, table['storage'] / config.storage_normalization_factor, table['storage_valid']
+        )
+        network = _capped(
+            config.network_max_score, table['bandwidth'] / config.network_normalization_factor, table['bandwidth_valid']
+        )
+        hardware = cpu + gpu + memory + storage + network
+        
+        utilization = (table['cpu_utilization'] / 100.0 + table['memory_utilization'] / 100.0) / 2.0
+        # np.minimum keeps nan like min(active_time, 1440) does
+        capped_active_time = np.minimum(table['active_time'], 1440)
+        usage = _capped(
+            config.container_max_score,
+            capped_active_time * utilization / 1440.0 * config.container_max_score,
+            table['container_valid']
+        )
+        count = table['container_count']
+        total_usage = _sum_by_row(table['container_miner'], usage, n)
+        container_average = np.divide(total_usage, count, out=np.zeros(n), where=count > 0)
+        
+        hardware_contribution = hardware * config.hardware_weight
+        container_contribution = container_average * config.container_weight
+        final_score = np.where(count == 0, hardware, hardware_contribution + container_contribution)
+    
+    scores = {
+        'cpu': cpu,
+        'gpu': gpu,
+        'memory': memory,
+        'storage': storage,
+        'network': network,
+        'hardware': hardware,
+        'container_average': container_average,
+        'container_count': count,
+        'hardware_contribution': hardware_contribution,
+        'container_contribution': container_contribution,
+        'final_score': final_score,
+    }
+    if min_score_for_weight is not None:
+        scores['weight'] = normalize_score_batch(final_score, min_score_for_weight, max_weight)
+    return scores
+
+def score_miners(
+    miners: Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+    config: ScoringConfig,
+    min_score_for_weight: Optional[float] = None,
+    max_weight: float = 1.0
+) -> Dict[str, Dict[str, float]]:
+    """
+    Score many miners at once, see calculate_batch_scores.
+    
+    Args:
+        miners: Dictionary of miner_id -> (hardware_specs, container_data)
+        config: Scoring configuration
+        min_score_for_weight: Minimum score to receive weight, None for no weights
+        max_weight: Maximum weight value
+        
+    Returns:
+        Dictionary of miner_id -> {column: value}
+    """
+    miner_ids = list(miners)
+    table = build_resource_table(
+        [miners[miner_id][0] for miner_id in miner_ids],
+        [miners[miner_id][1] for miner_id in miner_ids],
+        config
+    )
+    scores = calculate_batch_scores(table, config, min_score_for_weight, max_weight)
+    columns = {name: column.tolist() for name, column in scores.items()}
+    return {
+        miner_id: {name: column[row] for name, column in columns.items()}
+        for row, miner_id in enumerate(miner_ids)
+    }
+
 def validate_miner_resources(
     claimed_specs: Dict[str, Any],
     actual_specs: Dict[str, Any],
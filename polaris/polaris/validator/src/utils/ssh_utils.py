@@ -7,8 +7,12 @@ executing commands to verify their resources, and retrieving hardware specificat
 import logging
 import json
 import re
+import threading
 import time
-from typing import Dict, Any, List, Tuple, Optional
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Tuple, Optional
 
 import paramiko
 
@@ -16,6 +20,36 @@ from validator.src.utils.logging_utils import exception_handler
 
 logger = logging.getLogger(__name__)
 
+# (command, shell) of every command the hardware probes run, in the order they
+# run it. The shell differs from the command where a step only runs if needed.
+PROBE_COMMANDS: List[Tuple[str, str]] = [
+    # CPU
+    ("lscpu | grep 'Model name'", "lscpu | grep 'Model name'"),
+    ("nproc", "nproc"),
+    ("lscpu | grep 'CPU MHz' | awk '{print $3}'", "lscpu | grep 'CPU MHz' | awk '{print $3}'"),
+    # GPU
+    ("which nvidia-smi", "which nvidia-smi"),
+    ("nvidia-smi --query-gpu=name,memory.total,utilization.gpu --format=csv,noheader",
+     "nvidia-smi --query-gpu=name,memory.total,utilization.gpu --format=csv,noheader"),
+    ("which rocm-smi", "which rocm-smi"),
+    ("rocm-smi --showmeminfo vram --csv", "rocm-smi --showmeminfo vram --csv"),
+    ("which lspci", "which lspci"),
+    ("lspci -v -nn | grep -E 'VGA|3D|Display'", "lspci -v -nn | grep -E 'VGA|3D|Display'"),
+    ("lspci | grep -i 'vga\\|3d\\|display\\|graphic'", "lspci | grep -i 'vga\\|3d\\|display\\|graphic'"),
+    # Memory and storage
+    ("free -b | grep 'Mem:' | awk '{print $2}'", "free -b | grep 'Mem:' | awk '{print $2}'"),
+    ("df -BG --total | grep 'total' | awk '{print $2}'", "df -BG --total | grep 'total' | awk '{print $2}'"),
+    # Network
+    ("which speedtest-cli", "which speedtest-cli"),
+    ("pip install speedtest-cli", "which speedtest-cli >/dev/null 2>&1 || pip install speedtest-cli"),
+    ("speedtest-cli --simple", "speedtest-cli --simple"),
+    # Docker
+    ("which docker", "which docker"),
+    ("docker --version", "docker --version"),
+    ("docker ps --format '{{.ID}}|{{.Image}}|{{.Status}}|{{.Names}}'",
+     "docker ps --format '{{.ID}}|{{.Image}}|{{.Status}}|{{.Names}}'"),
+]
+
 class SSHClient:
     """Client for connecting to miners via SSH and executing commands."""
     
@@ -110,13 +144,21 @@ class SSHClient:
             logger.error(f"Failed to connect to {self.host}: {e}")
             return False
     
+    def is_alive(self) -> bool:
+        """Whether the SSH transport is still open."""
+        if not self.connected or not self.client:
+            return False
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
     @exception_handler(fallback_return=('', '', -1))
-    def execute_command(self, command: str) -> Tuple[str, str, int]:
+    def execute_command(self, command: str, timeout: Optional[float] = None) -> Tuple[str, str, int]:
         """
         Execute a command on the miner via SSH.
         
         Args:
             command: Command to execute
+            timeout: Timeout for the command in seconds (default: command_timeout)
         
         Returns:
             Tuple of (stdout, stderr, exit_code)
@@ -132,7 +174,7 @@ class SSHClient:
             
             # Execute command with timeout
             stdin, stdout, stderr = self.client.exec_command(
-                command, timeout=self.command_timeout
+                command, timeout=timeout or self.command_timeout
             )
             
             # Get command output
@@ -349,7 +391,7 @@ def get_gpu_info(ssh_client: SSHClient) -> List[Dict[str, Any]]:
                         'type': gpu_type
                     })
             
-            logger.info(f"Total GPUs found with lspci: {len(stdout.strip().split('\n'))}")
+            logger.info(f"Total GPUs found with lspci: {len(stdout.strip().splitlines())}")
     
     # If still no GPUs found, try a more aggressive lspci search
     if not gpus:
@@ -542,12 +584,111 @@ def get_docker_info(ssh_client: SSHClient) -> Dict[str, Any]:
     }
 
 
-def get_hardware_specifications(ssh_client: SSHClient) -> Dict[str, Any]:
+class RecordedSSHClient:
+    """
+    Stands in for an SSHClient whose probe commands already ran in one script.
+
+    Recorded commands are answered from the recording, any other command
+    (e.g. a per-GPU rocm-smi query) still runs on the live client.
+    """
+
+    def __init__(self, ssh_client: SSHClient, outputs: Dict[str, Tuple[str, str, int]]):
+        self.ssh_client = ssh_client
+        self.outputs = outputs
+        self.host = ssh_client.host
+
+    @property
+    def connected(self) -> bool:
+        return self.ssh_client.connected
+
+    def connect(self) -> bool:
+        return self.ssh_client.connect()
+
+    def execute_command(self, command: str, timeout: Optional[float] = None) -> Tuple[str, str, int]:
+        if command in self.outputs:
+            return self.outputs[command]
+        return self.ssh_client.execute_command(command, timeout=timeout)
+
+
+def build_probe_script(commands: List[Tuple[str, str]], token: str) -> str:
+    """
+    Shell script running every command and printing its stdout, stderr and
+    exit code between marker lines tagged with token.
+    """
+    lines = ['d=$(mktemp -d)']
+    for i, (_, shell) in enumerate(commands):
+        lines += [
+            f'( {shell} ) >"$d/out" 2>"$d/err"; code=$?',
+            f"printf '\\n@@{token} {i} out\\n'; cat \"$d/out\"",
+            f"printf '\\n@@{token} {i} err\\n'; cat \"$d/err\"",
+            f"printf '\\n@@{token} {i} exit %s\\n' \"$code\"",
+        ]
+    lines.append('rm -rf "$d"')
+    return '\n'.join(lines)
+
+
+def parse_probe_output(output: str, commands: List[Tuple[str, str]], token: str) -> Dict[str, Tuple[str, str, int]]:
+    """
+    {command: (stdout, stderr, exit_code)} of the commands whose exit code was
+    printed, the output of build_probe_script.
+    """
+    marker = re.compile(rf'^@@{re.escape(token)} (\d+) (out|err|exit)(?: (-?\d+))?$')
+    sections: Dict[Tuple[int, str], List[str]] = {}
+    exit_codes: Dict[int, int] = {}
+    current = None
+    for line in output.split('\n'):
+        match = marker.match(line)
+        if match:
+            index, kind = int(match.group(1)), match.group(2)
+            if kind == 'exit':
+                exit_codes[index] = int(match.group(3))
+                current = None
+            else:
+                current = sections.setdefault((index, kind), [])
+        elif current is not None:
+            current.append(line)
+    outputs = {}
+    for index, code in exit_codes.items():
+        if index < len(commands):
+            stdout = '\n'.join(sections.get((index, 'out'), [])).strip()
+            stderr = '\n'.join(sections.get((index, 'err'), [])).strip()
+            outputs[commands[index][0]] = (stdout, stderr, code)
+    return outputs
+
+
+def run_probe_script(ssh_client: SSHClient,
+                     commands: List[Tuple[str, str]] = PROBE_COMMANDS,
+                     timeout: Optional[float] = None) -> Dict[str, Tuple[str, str, int]]:
+    """
+    Run all probe commands in a single remote round trip.
+    
+    Args:
+        ssh_client: Connected SSH client
+        commands: (command, shell) pairs to run, in order
+        timeout: Timeout for the whole script in seconds
+    
+    Returns:
+        {command: (stdout, stderr, exit_code)}, empty if the script could not run
+    """
+    token = uuid.uuid4().hex
+    stdout, stderr, _ = ssh_client.execute_command(build_probe_script(commands, token), timeout=timeout)
+    outputs = parse_probe_output(stdout, commands, token)
+    if len(outputs) < len(commands):
+        logger.warning(f"Probe script on {ssh_client.host} returned {len(outputs)}/{len(commands)} commands: {stderr}")
+    return outputs
+
+
+def get_hardware_specifications(ssh_client: SSHClient, timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Retrieve comprehensive hardware specifications from the miner.
     
+    The CPU, GPU, memory, storage, network and docker probes all run in one
+    remote script, their parsers then read the recorded outputs. If the script
+    fails the probes run one command at a time.
+    
     Args:
         ssh_client: Connected SSH client
+        timeout: Timeout for the probe script in seconds
     
     Returns:
         Dictionary with all hardware specifications
@@ -558,31 +699,34 @@ def get_hardware_specifications(ssh_client: SSHClient) -> Dict[str, Any]:
         return {}
     
     try:
+        outputs = run_probe_script(ssh_client, timeout=timeout)
+        probe_client = RecordedSSHClient(ssh_client, outputs) if outputs else ssh_client
+
         # Get CPU info
-        cpu_info = get_cpu_info(ssh_client)
-        logger.info(f"Retrieved CPU info: {cpu_count} cores")
+        cpu_info = get_cpu_info(probe_client)
+        logger.info(f"Retrieved CPU info: {cpu_info.get('cpu_count', 0)} cores")
         
         # Get GPU info
-        gpus = get_gpu_info(ssh_client)
+        gpus = get_gpu_info(probe_client)
         logger.info(f"Retrieved info for {len(gpus)} GPUs")
         
         # Get memory info
-        memory_info = get_memory_info(ssh_client)
+        memory_info = get_memory_info(probe_client)
         memory_gb = memory_info.get('memory', 0)
         logger.info(f"Retrieved memory info: {memory_gb:.1f} GB")
         
         # Get storage info
-        storage_info = get_storage_info(ssh_client)
+        storage_info = get_storage_info(probe_client)
         storage_gb = storage_info.get('storage', 0)
         logger.info(f"Retrieved storage info: {storage_gb:.1f} GB")
         
         # Get network info
-        network_info = get_network_info(ssh_client)
+        network_info = get_network_info(probe_client)
         bandwidth = network_info.get('bandwidth', 0)
         logger.info(f"Retrieved network info: {bandwidth:.1f} Mbps")
         
         # Get Docker info
-        docker_info = get_docker_info(ssh_client)
+        docker_info = get_docker_info(probe_client)
         docker_installed = docker_info.get('installed', False)
         container_count = len(docker_info.get('containers', []))
         logger.info(f"Docker installed: {docker_installed}, Running containers: {container_count}")
@@ -658,4 +802,70 @@ def create_ssh_client_from_miner_data(miner_data: Dict[str, Any],
         
     except Exception as e:
         logger.error(f"Error creating SSH client: {e}")
-        return None 
\ No newline at end of file
+        return None 
+
+
+class SSHSessionPool:
+    """
+    Connected SSH clients of miners, reused across validation rounds.
+    
+    At most max_sessions sessions are in use at once, idle ones are kept for
+    the next round (the least recently used are closed beyond max_idle, which
+    defaults to max_sessions) and dead ones are reconnected. Size max_idle to
+    the number of miners so a round does not reconnect to most of them.
+    """
+    
+    def __init__(self, max_sessions: int = 16, connection_timeout: int = 30, command_timeout: int = 60,
+                 max_idle: Optional[int] = None):
+        self.max_sessions = max_sessions
+        self.max_idle = max_sessions if max_idle is None else max_idle
+        self.connection_timeout = connection_timeout
+        self.command_timeout = command_timeout
+        self.sessions: "OrderedDict[Tuple[Any, ...], SSHClient]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_sessions)
+    
+    @staticmethod
+    def session_key(miner_data: Dict[str, Any]) -> Tuple[Any, ...]:
+        ssh_info = miner_data.get('ssh', {})
+        return (ssh_info.get('host'), int(ssh_info.get('port', 22)), ssh_info.get('username'))
+    
+    @contextmanager
+    def session(self, miner_data: Dict[str, Any]) -> Iterator[Optional[SSHClient]]:
+        """
+        An SSH client of the miner for the duration of the block, None if the
+        miner has no usable SSH information.
+        """
+        key = self.session_key(miner_data)
+        with self.slots:
+            with self.lock:
+                client = self.sessions.pop(key, None)
+            if client is not None and not client.is_alive():
+                client.close()
+                client = None
+            if client is None:
+                client = create_ssh_client_from_miner_data(
+                    miner_data, self.connection_timeout, self.command_timeout
+                )
+            try:
+                yield client
+            finally:
+                if client is not None:
+                    self._release(key, client)
+    
+    def _release(self, key: Tuple[Any, ...], client: SSHClient):
+        evicted = []
+        with self.lock:
+            if client.connected:
+                self.sessions[key] = client
+            while len(self.sessions) > self.max_idle:
+                evicted.append(self.sessions.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+    
+    def close(self):
+        """Close every idle session."""
+        with self.lock:
+            sessions, self.sessions = list(self.sessions.values()), OrderedDict()
+        for client in sessions:
+            client.close()
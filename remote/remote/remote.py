@@ -4,9 +4,184 @@ from typing import *
 import os
 import re
 import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
 import paramiko
-    
+
+class SSHPool:
+    """
+    Persistent SSH connections, one transport per host shared by up to max_channels
+    concurrent commands (each exec_command opens its own channel on it).
+
+    Connections are kept alive, health checked before reuse after health_interval idle
+    seconds, reconnected when dead and closed after idle_timeout idle seconds. A command
+    waits at most channel_timeout seconds for a free channel of its host.
+    """
+    def __init__(self, max_channels=8, keepalive=30, idle_timeout=300, health_interval=10, channel_timeout=300):
+        self.max_channels = max_channels
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.channel_timeout = channel_timeout
+        self.sessions = {} # (host, port, user) -> session
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def host_key(host):
+        return (host['host'], int(host['port']), host['user'])
+
+    def _session(self, key):
+        with self.lock:
+            if key not in self.sessions:
+                self.sessions[key] = {
+                    'client': None,
+                    'lock': threading.Lock(),
+                    'connect_lock': threading.Lock(), # one (re)connect per host at a time
+                    'channels': threading.BoundedSemaphore(self.max_channels),
+                    'in_use': 0,
+                    'last_used': time.time(),
+                }
+            return self.sessions[key]
+
+    def is_healthy(self, session):
+        client = session['client']
+        transport = client.get_transport() if client != None else None
+        if transport == None or not transport.is_active():
+            return False
+        if time.time() - session['last_used'] > self.health_interval:
+            try:
+                transport.send_ignore()
+            except Exception:
+                return False
+        return True
+
+    def connect(self, host, key_policy='auto_add_policy', timeout=10):
+        client = paramiko.SSHClient()
+        # Automatically add the server's host key (this is insecure and used for demonstration; 
+        # in production, you should have the remote server's public key in known_hosts)
+        if key_policy == 'auto_add_policy':
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        else:
+            client.load_system_host_keys()
+        client.connect(host['host'],
+                       port=host['port'], 
+                       username=host['user'], 
+                       password=host['pwd'],
+                       timeout=timeout,
+                       banner_timeout=timeout,
+                       auth_timeout=timeout)
+        client.get_transport().set_keepalive(self.keepalive)
+        return client
+
+    def acquire(self, host, key_policy='auto_add_policy', timeout=10):
+        """
+        Get a connected client of the host and reserve one of its channels, release it with release(host)
+        """
+        self.evict_idle()
+        session = self._session(self.host_key(host))
+        if not session['channels'].acquire(timeout=self.channel_timeout):
+            raise TimeoutError(f'No free channel to {host["host"]} after {self.channel_timeout}s ({self.max_channels} in use)')
+        try:
+            with session['connect_lock']:
+                with session['lock']:
+                    if self.is_healthy(session):
+                        session['in_use'] += 1
+                        session['last_used'] = time.time()
+                        return session['client']
+                    stale, session['client'] = session['client'], None
+                if stale != None:
+                    stale.close()
+                # connect without the session lock, so release, evict_idle and stats do not wait on it
+                client = self.connect(host, key_policy=key_policy, timeout=timeout)
+                with session['lock']:
+                    session['client'] = client
+                    session['in_use'] += 1
+                    session['last_used'] = time.time()
+                    return client
+        except Exception:
+            session['channels'].release()
+            raise
+
+    def release(self, host):
+        session = self._session(self.host_key(host))
+        with session['lock']:
+            session['in_use'] -= 1
+            session['last_used'] = time.time()
+        session['channels'].release()
+
+    def evict_idle(self):
+        """
+        Close the connections idle for more than idle_timeout seconds
+        """
+        now = time.time()
+        with self.lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            # a busy session is in use, not idle
+            if not session['lock'].acquire(blocking=False):
+                continue
+            try:
+                if session['client'] != None and session['in_use'] == 0 and now - session['last_used'] > self.idle_timeout:
+                    session['client'].close()
+                    session['client'] = None
+            finally:
+                session['lock'].release()
+
+    def close(self, host=None):
+        """
+        Close the connection of a host, or of all hosts
+        """
+        with self.lock:
+            keys = list(self.sessions) if host == None else [self.host_key(host)]
+            sessions = [self.sessions[k] for k in keys if k in self.sessions]
+        for session in sessions:
+            with session['lock']:
+                if session['client'] != None:
+                    session['client'].close()
+                    session['client'] = None
+        return {'status': 'success', 'msg': f'Closed {len(sessions)} connections'}
+
+    def stats(self):
+        with self.lock:
+            sessions = dict(self.sessions)
+        return {f'{user}@{host}:{port}': {'connected': s['client'] != None, 'in_use': s['in_use'], 'idle': time.time() - s['last_used']}
+                for (host, port, user), s in sessions.items()}
+
+class PooledOutput:
+    """
+    The output lines of a command on a pooled connection, that gives its channel back
+    when read to the end, closed or dropped, even unread
+    """
+    def __init__(self, lines, release):
+        self.lines = lines
+        self.release = release
+        self.released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.lines)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            try:
+                self.lines.close()
+            finally:
+                self.release()
+
+    def __del__(self):
+        self.close()
+
 class Remote:
+    pool = SSHPool() # shared by every Remote in the process
+
     def __init__(self, path = c.abspath('~/.commune/remote/hosts.yaml')):
         self.path = path
 
@@ -15,7 +190,7 @@ class Remote:
                 port = None, 
                 user = None,
                 password = None,
-                host:str= None,  
+                host:Union[str, dict]= None,  
                 cwd:str=None, 
                 verbose=False, 
                 sudo=False, 
@@ -28,15 +203,19 @@ class Remote:
         """s
         Run a command on a remote server using Remote.
 
-        :param host: Hostname or IP address of the remote machine.
+        :param host: Name of the remote machine, or its host dict.
         :param port: Remote port (typically 22).
         :param username: Remote username.
         :param password: Remote password.
         :param command: Command to be executed on the remote machine.
         :return: Command output.
+
+        The connection to the host is taken from (and kept in) the shared pool.
         """
 
-        if host == None:
+        if isinstance(host, dict):
+            host = dict(host)
+        elif host == None:
             if port == None or user == None or password == None:
                 host = list(self.hosts().values())[0]
             else:
@@ -52,20 +231,8 @@ class Remote:
 
         host['name'] = f'{host["user"]}@{host["host"]}:{host["port"]}'
 
-        # Create an Remote client instance.
-        client = paramiko.SSHClient()
-        # Automatically add the server's host key (this is insecure and used for demonstration; 
-        # in production, you should have the remote server's public key in known_hosts)
-        if key_policy == 'auto_add_policy':
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        else:
-            client.load_system_host_keys()
-                
-        # Connect to the remote server
-        client.connect(host['host'],
-                       port=host['port'], 
-                       username=host['user'], 
-                       password=host['pwd'])
+        # Get a pooled connection to the remote server
+        client = self.pool.acquire(host, key_policy=key_policy, timeout=timeout)
 
         # THE COMMAND
 
@@ -84,14 +251,19 @@ class Remote:
 
         c.print(f'Running --> (command={command} host={host["name"]} sudo={sudo} cwd={cwd})')
 
-        stdin, stdout, stderr = client.exec_command(command)
+        output = ''
+        try:
+            stdin, stdout, stderr = client.exec_command(command)
+        except Exception:
+            self.pool.release(host)
+            raise
         try:
-            if sudo:
-                stdin.write(host['pwd'] + "\n") # Send the password for sudo commands
-                stdin.flush() # Send the password
             color = c.random_color()
             # Print the output of ls command
             def print_output():
+                if sudo:
+                    stdin.write(host['pwd'] + "\n") # Send the password for sudo commands
+                    stdin.flush() # Send the password
                 for line in stdout.readlines():
                     if verbose:
                         c.print(f'[bold]{host["name"]}[/bold]', line.strip('\n'), color=color)
@@ -103,15 +275,21 @@ class Remote:
                         c.print(f'[bold]{host["name"]}[/bold]', line.strip('\n'))
                     yield line
 
+            def release_channel():
+                try:
+                    stdout.channel.close()
+                finally:
+                    self.pool.release(host)
+
+            lines = PooledOutput(print_output(), release_channel)
             if stream:
-                return print_output()
+                return lines
             else:
-                output = ''
-                for line in print_output():
+                for line in lines:
                     output += line 
 
 
-            del stdin, stdout, stderr, client
+            del stdin, stdout, stderr
 
         except Exception as e:
             c.print(e)
@@ -262,13 +440,10 @@ class Remote:
         # Test Remote
         c.print(self.ssh_cmd('ls'))
 
-    def cmd(self, *commands, 
-            search=None, 
-            hosts:Union[list, dict, str] = None, 
-            cwd=None,
-              host:str=None,  
-              timeout=5 , 
-              verbose:bool = True,**kwargs):
+    def resolve_hosts(self, hosts:Union[list, dict, str] = None, search=None, host:str=None) -> dict:
+        """
+        Get the {name: host} of the hosts to run on
+        """
         if hosts == None:
             hosts = self.hosts()
             if host != None:
@@ -276,32 +451,61 @@ class Remote:
         if search != None:
             hosts = {k:v for k,v in hosts.items() if search in k}
         if isinstance(hosts, list):
-            hosts = {h:hosts[h] for h in hosts}
+            all_hosts = self.hosts()
+            hosts = {h:all_hosts[h] for h in hosts}
         elif isinstance(hosts, str):
-            hosts = {hosts:self.hosts(hosts)}
+            hosts = {hosts:self.hosts()[hosts]}
 
         assert isinstance(hosts, dict), f'Hosts must be a dict, got {type(hosts)}'
+        return hosts
 
-        results = {}
-        errors = {}
-        host2future = {}
-        for host in hosts:
-            host2future[host] = c.submit(self.ssh_cmd, 
-                                            args=commands, 
-                                            kwargs=dict(host=host, cwd=cwd, verbose=verbose,**kwargs),
-                                            return_future=True
-                                            )
-        future2host = {v:k for k,v in host2future.items()}
+    def fanout(self, *commands,
+               hosts:Union[list, dict, str] = None,
+               search=None,
+               host:str=None,
+               max_workers:int = 32,
+               timeout:float = None,
+               **kwargs) -> Iterator[Tuple[str, Any]]:
+        """
+        Run a command on many hosts, at most max_workers at a time, yielding
+        (name, output) per host as they finish (the exception if a host failed).
 
+        :param timeout: seconds to wait for all hosts, the hosts still running are then skipped
+        """
+        hosts = self.resolve_hosts(hosts=hosts, search=search, host=host)
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(hosts))))
+        future2name = {executor.submit(self.ssh_cmd, *commands, host=dict(v), **kwargs): k for k,v in hosts.items()}
+        try:
+            for future in as_completed(future2name, timeout=timeout):
+                try:
+                    yield future2name[future], future.result()
+                except Exception as e:
+                    yield future2name[future], e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def cmd(self, *commands, 
+            search=None, 
+            hosts:Union[list, dict, str] = None, 
+            cwd=None,
+              host:str=None,  
+              timeout=5 , 
+              verbose:bool = True,
+              max_workers:int = 32,
+              **kwargs):
 
+        results = {}
+        errors = {}
         try:
-            for future in c.as_completed(list(host2future.values()), timeout=timeout):
-                result = future.result()
-                host = future2host[future]
-                if not c.is_error(result):
+            for host, result in self.fanout(*commands, hosts=hosts, search=search, host=host,
+                                            max_workers=max_workers, timeout=timeout,
+                                            cwd=cwd, verbose=verbose, **kwargs):
+                if not c.is_error(result) and not isinstance(result, Exception):
                     results[host] = result
                 else:
                     errors[host]= result
+        except TimeoutError as e:
+            c.print(f'Timed out after {timeout}s waiting for {e}')
         except Exception as e:
             c.print(e)
 
@@ -315,6 +519,41 @@ class Remote:
 
         return results 
 
+    def benchmark(self, host:str = None, n:int = 20, cmd:str = 'true') -> dict:
+        """
+        Compare running n commands with a fresh connection each against the pooled connection
+
+        e.g. against a local sshd: c add_host 127.0.0.1 port=22 user=$USER pwd=... name=local && c remote/benchmark local
+        """
+        host = host or self.names()[0]
+        host_info = self.hosts()[host]
+        self.pool.close(host_info)
+        fresh = []
+        for _ in range(n):
+            t = time.time()
+            self.ssh_cmd(cmd=cmd, host=host_info)
+            fresh.append(time.time() - t)
+            self.pool.close(host_info)
+        self.ssh_cmd(cmd=cmd, host=host_info) # connect once
+        pooled = []
+        for _ in range(n):
+            t = time.time()
+            self.ssh_cmd(cmd=cmd, host=host_info)
+            pooled.append(time.time() - t)
+        t = time.time()
+        with ThreadPoolExecutor(max_workers=self.pool.max_channels) as executor:
+            list(executor.map(lambda _: self.ssh_cmd(cmd=cmd, host=host_info), range(n)))
+        multiplexed = time.time() - t
+        fresh_mean, pooled_mean = sum(fresh) / n, sum(pooled) / n
+        return {
+            'host': host,
+            'n': n,
+            'fresh_per_cmd': fresh_mean,
+            'pooled_per_cmd': pooled_mean,
+            'multiplexed_per_cmd': multiplexed / n,
+            'speedup': fresh_mean / pooled_mean,
+        }
+
     def add_admin(self, timeout=10):
         root_key_address = c.root_key().ss58_address
         return self.cmd(f'c add_admin {root_key_address}', timeout=timeout)
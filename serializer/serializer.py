@@ -7,34 +7,191 @@ class Serializer:
 
     list_types = [list, set, tuple] # shit that you can turn into lists for json
     json_serializable_types = [int, float, str, bool, type(None)]
+    modes = ['json', 'bytes']
+    # binary frame: magic | u32 header length | json header | aligned raw buffers
+    frame_magic = b'CSB1'
+    frame_align = 64
+    # process wide dispatch registry, built once on first use
+    _serializers = {} # data_type -> serializer
+    _type2data_type = {} # python type -> data_type
+    _loaded = False
 
-    def serialize(self,x:dict, copy_value = True):
+    def serialize(self,x:dict, copy_value = False, mode='json', buffers=None):
+        """
+        mode='json' returns a json compatible structure (hex payloads)
+        mode='bytes' returns a binary frame where array/tensor/bytes payloads 
+        travel as raw buffers next to a small json header
+        the structure is walked with an explicit stack and rebuilt into new 
+        containers, so copy_value (a deep copy of x up front) is rarely needed
+        """
+        assert mode in self.modes, f'mode {mode} not in {self.modes}'
+        if mode == 'bytes':
+            return b''.join(self.serialize_frames(x, copy_value=copy_value))
         if copy_value:
             x = c.copy(x)
-        if isinstance(x, dict):
-            data  = {}
-            for k,v in x.items():
-                data[k] = self.serialize(v)
-            return data
-        elif type(x) in self.list_types:
-            data_type = type(x)
-            data = []
-            for v in x:
-                data.append(self.serialize(v))
-            return data
-        elif type(x) in self.json_serializable_types:
+        return self.walk(x, lambda v: self.serialize_leaf(v, buffers=buffers))
+
+    def serialize_leaf(self, x, buffers=None):
+        if type(x) in self.json_serializable_types:
             return x
-        else:
-            data_type = get_data_type_string(x)
-            serializer = self.get_serializer(data_type)
-            result = {'data':  serializer.serialize(x), 
-                            'data_type': serializer.date_type,  
-                            'serialized': True}
-            return result
-
-    def deserialize(self, x) -> object:
+        serializer = self.get_type_serializer(x)
+        if buffers is not None and hasattr(serializer, 'to_buffers'):
+            result = self.serialize_buffers(x, serializer, buffers)
+            if result is not None:
+                return result
+        result = {'data':  serializer.serialize(x), 
+                        'data_type': serializer.date_type,  
+                        'serialized': True}
+        return result
+
+    def walk(self, x, fn, is_leaf=None, restore_types=False):
+        """
+        maps fn over the leaves of nested dicts/lists into new containers, 
+        using an explicit stack so deep structures do not hit the recursion limit
+        restore_types turns rebuilt lists back into tuples/sets 
+        """
+        is_leaf = is_leaf or (lambda v: False)
+        def is_container(v):
+            return (isinstance(v, dict) or type(v) in self.list_types) and not is_leaf(v)
+        def new(v):
+            return {} if isinstance(v, dict) else []
+        def items(v):
+            return iter(v.items()) if isinstance(v, dict) else enumerate(v)
+        if not is_container(x):
+            return fn(x)
+        root = new(x)
+        # frame: source, item iterator, output container, parent output, key in parent
+        stack = [(x, items(x), root, None, None)]
+        while stack:
+            src, it, out, parent, key = stack[-1]
+            for k, v in it:
+                pushed = is_container(v)
+                if pushed:
+                    child = new(v)
+                    stack.append((v, items(v), child, out, k))
+                else:
+                    child = fn(v)
+                if isinstance(out, dict):
+                    out[k] = child
+                else:
+                    out.append(child)
+                if pushed:
+                    break
+            else:
+                stack.pop()
+                if restore_types and type(src) in self.list_types and type(src) != list:
+                    out = type(src)(out)
+                    if parent is None:
+                        root = out
+                    else:
+                        parent[key] = out
+        return root
+
+    def stream(self, x, chunk_size:int=2**16):
+        """
+        yields the json text of serialize(x) in chunks of about chunk_size chars, 
+        encoding leaves as it walks so large responses can start flowing 
+        before the whole tree is encoded
+        """
+        chunks, size = [], 0
+        # frame: item iterator, is dict, first item, closing token
+        stack = [[iter([(None, x)]), False, True, '']]
+        while stack:
+            frame = stack[-1]
+            for k, v in frame[0]:
+                token = '' if frame[2] else ','
+                frame[2] = False
+                if frame[1]:
+                    key = k if isinstance(k, str) else json.dumps(k)
+                    token += json.dumps(key) + ':'
+                pushed = True
+                if isinstance(v, dict):
+                    token += '{'
+                    stack.append([iter(v.items()), True, True, '}'])
+                elif type(v) in self.list_types:
+                    token += '['
+                    stack.append([enumerate(v), False, True, ']'])
+                else:
+                    token += json.dumps(self.serialize_leaf(v))
+                    pushed = False
+                chunks.append(token)
+                size += len(token)
+                if size >= chunk_size:
+                    yield ''.join(chunks)
+                    chunks, size = [], 0
+                if pushed:
+                    break
+            else:
+                chunks.append(stack.pop()[3])
+        if chunks:
+            yield ''.join(chunks)
+
+    def serialize_buffers(self, x, serializer, buffers:list):
+        """
+        moves the payload of x out of band into buffers, returns None if 
+        the serializer cannot represent x as raw buffers (ie object arrays)
+        """
+        out = serializer.to_buffers(x)
+        if out is None:
+            return None
+        meta, bufs = out
+        result = {'data': meta, 
+                  'data_type': serializer.date_type, 
+                  'serialized': True, 
+                  'buffers': list(range(len(buffers), len(buffers) + len(bufs)))}
+        buffers.extend(bufs)
+        return result
+
+    def serialize_frames(self, x, copy_value=False) -> list:
+        """
+        returns the binary frame as a list of chunks (header, padding, buffers) 
+        so a transport can write them without joining them first
+        """
+        buffers = []
+        data = self.serialize(x, copy_value=copy_value, buffers=buffers)
+        offsets = []
+        offset = 0
+        for buf in buffers:
+            offset = self.align(offset)
+            offsets.append([offset, buf.nbytes])
+            offset += buf.nbytes
+        header = json.dumps({'data': data, 'buffers': offsets}).encode('utf-8')
+        prefix = self.frame_magic + len(header).to_bytes(4, 'little') + header
+        frames = [prefix, bytes(self.align(len(prefix)) - len(prefix))]
+        offset = 0
+        for buf, (start, nbytes) in zip(buffers, offsets):
+            if start > offset:
+                frames.append(bytes(start - offset))
+            frames.append(buf)
+            offset = start + nbytes
+        return frames
+
+    def deserialize_frame(self, x, lazy=False) -> object:
+        """
+        decodes a binary frame, payloads are returned as views into x (no copy)
+        lazy keeps columnar payloads in their wire form (ie arrow tables for dataframes)
+        """
+        view = memoryview(x).cast('B')
+        n = len(self.frame_magic)
+        header_size = int.from_bytes(view[n:n+4], 'little')
+        start = n + 4 + header_size
+        header = json.loads(bytes(view[n+4:start]))
+        start = self.align(start)
+        buffers = [view[start+offset:start+offset+nbytes] for offset, nbytes in header['buffers']]
+        return self.deserialize(header['data'], buffers=buffers, lazy=lazy)
+
+    def is_frame(self, x) -> bool:
+        n = len(self.frame_magic)
+        return isinstance(x, (bytes, bytearray, memoryview)) and bytes(x[:n]) == self.frame_magic
+
+    def align(self, n:int) -> int:
+        return (n + self.frame_align - 1) // self.frame_align * self.frame_align
+
+    def deserialize(self, x, buffers=None, lazy=False) -> object:
         """Serializes a torch object to DataBlock wire format.
         """
+        if self.is_frame(x):
+            return self.deserialize_frame(x, lazy=lazy)
         if isinstance(x, str):
             if x.startswith('{') or x.startswith('['):
                 x = str2dict(x)
@@ -45,23 +202,22 @@ class Serializer:
                     x = float(x)
                 return x
            
+        return self.walk(x, 
+                         lambda v: self.deserialize_leaf(v, buffers=buffers, lazy=lazy), 
+                         is_leaf=self.is_serialized, 
+                         restore_types=True)
+
+    def deserialize_leaf(self, x, buffers=None, lazy=False):
+        if isinstance(x, str):
+            # strings can carry nested json
+            return self.deserialize(x, buffers=buffers, lazy=lazy)
         if self.is_serialized(x):
             serializer = self.get_serializer(x['data_type'])
+            if 'buffers' in x and buffers is not None:
+                return serializer.from_buffers(x['data'], [buffers[i] for i in x['buffers']], lazy=lazy)
             return serializer.deserialize(x['data'])
-        if isinstance(x, dict):
-            data  = {}
-            for k,v in x.items():
-                data[k] = self.deserialize(v)
-            return data
-        elif type(x) in self.list_types:
-            data_type = type(x)
-            data = []
-            for v in x:
-                data.append(self.deserialize(v))
-            return data_type(data)
         return x
     
-    
     def is_serialized(self, data):
         if isinstance(data, dict) and data.get('serialized', False) and \
                     'data' in data and 'data_type' in data:
@@ -70,7 +226,31 @@ class Serializer:
             return False
 
     def serializer_map(self):
-        return {p.split('.')[-2]: c.obj(p)() for p in c.objs(os.path.dirname(__file__) + '/types')}
+        cls = Serializer
+        if not cls._loaded:
+            for p in c.objs(os.path.dirname(__file__) + '/types'):
+                data_type = p.split('.')[-2]
+                if data_type not in cls._serializers:
+                    cls.register(data_type, c.obj(p)())
+            cls._loaded = True
+        return cls._serializers
+
+    @classmethod
+    def register(cls, data_type:str, serializer, types:list=None):
+        """
+        plugin hook for new types, the serializer needs serialize/deserialize 
+        (and optionally to_buffers/from_buffers for the binary frame)
+        types are python types that dispatch straight to data_type
+        """
+        if isinstance(serializer, type):
+            serializer = serializer()
+        setattr(serializer, 'date_type', data_type)
+        Serializer._serializers[data_type] = serializer
+        # previous resolutions may now point to the wrong serializer
+        Serializer._type2data_type.clear()
+        for t in (types or []):
+            Serializer._type2data_type[t] = data_type
+        return serializer
 
     def types(self):
         return list(self.serializer_map().keys())
@@ -79,13 +259,28 @@ class Serializer:
         serializer_map = self.serializer_map()
         if data_type in serializer_map:
             serializer = serializer_map[data_type]
-            if not hasattr(serializer, 'date_type'):
-                setattr(serializer, 'date_type', data_type)
-                serializer_map[data_type] = serializer
         else:
             raise TypeError(f'Type Not supported for serializeation ({data_type}) with ')
         return serializer
 
+    def get_type_serializer(self, x):
+        """
+        dispatch on the concrete type of x, resolved once per type 
+        by walking the mro and cached afterwards
+        """
+        t = type(x)
+        data_type = Serializer._type2data_type.get(t)
+        if data_type is None:
+            serializer_map = self.serializer_map()
+            data_type = get_type_string(t)
+            for base in t.__mro__:
+                base_data_type = get_type_string(base)
+                if base_data_type in serializer_map:
+                    data_type = base_data_type
+                    break
+            Serializer._type2data_type[t] = data_type
+        return self.get_serializer(data_type)
+
     def test(self):
         import time
         import numpy as np
@@ -116,5 +311,33 @@ class Serializer:
             t2 = time.time()
             duration = t2 - t1
             emoji = '✅' if str(des_ser_data) == str(ser_data) else '❌'
+            # the binary frame must decode to the same value as the json path
+            frame = self.serialize(data, mode='bytes')
+            assert str(self.serialize(self.deserialize(frame))) == str(ser_data), f'binary frame mismatch {data}'
+            stream_data = json.loads(''.join(self.stream(data, chunk_size=64)))
+            assert stream_data == json.loads(json.dumps(ser_data)), f'stream mismatch {data}'
+        deep = []
+        for i in range(10000):
+            deep = [deep, i]
+        # compare the streamed text, == on the structure itself recurses
+        assert ''.join(self.stream(self.deserialize(self.serialize(deep)))) == ''.join(self.stream(deep))
 
         return {'msg': 'PASSED test_serialize_deserialize'}
+
+    def benchmark(self, n:int=1000, size:int=8, mode='json'):
+        """
+        ns/element for a nested dict of small tensors (our hottest shape)
+        """
+        import time
+        import torch
+        data = {f'module_{i}': {'scores': torch.rand(size), 'meta': {'w': torch.rand(size), 'step': i}} for i in range(n)}
+        n_elements = n * 3
+        t0 = time.perf_counter_ns()
+        ser_data = self.serialize(data, copy_value=False, mode=mode)
+        t1 = time.perf_counter_ns()
+        self.deserialize(ser_data)
+        t2 = time.perf_counter_ns()
+        return {'mode': mode,
+                'n_elements': n_elements, 
+                'serialize_ns_per_element': (t1 - t0) / n_elements, 
+                'deserialize_ns_per_element': (t2 - t1) / n_elements}
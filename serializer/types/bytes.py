@@ -8,3 +8,9 @@ class BytesSerializer:
         if isinstance(data, str):
             data = bytes.fromhex(data)
         return data
+
+    def to_buffers(self, data: bytes) -> tuple:
+        return {}, [memoryview(data).cast('B')]
+
+    def from_buffers(self, meta: dict, buffers: list, lazy: bool = False) -> memoryview:
+        return buffers[0]
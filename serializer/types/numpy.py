@@ -8,6 +8,24 @@ class NumpySerializer:
             data = bytes.fromhex(data)
         return self.bytes2numpy(data)
 
+    def to_buffers(self, data: 'np.ndarray') -> tuple:
+        import numpy as np
+        # the shape before ascontiguousarray, which turns 0-d arrays and scalars into shape [1]
+        shape = list(np.shape(data))
+        is_scalar = isinstance(data, np.generic)
+        data = np.ascontiguousarray(data)
+        if data.dtype.hasobject:
+            return None
+        meta = {'dtype': data.dtype.str, 'shape': shape}
+        if is_scalar:
+            meta['scalar'] = True
+        return meta, [memoryview(data.reshape(-1).view(np.uint8))]
+
+    def from_buffers(self, meta: dict, buffers: list, lazy: bool = False) -> 'np.ndarray':
+        import numpy as np
+        data = np.frombuffer(buffers[0], dtype=np.dtype(meta['dtype'])).reshape(meta['shape'])
+        return data[()] if meta.get('scalar') else data
+
     def bytes2numpy(self, data:bytes) -> 'np.ndarray':
         import msgpack_numpy
         import msgpack
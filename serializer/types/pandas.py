@@ -11,6 +11,78 @@ class PandasSerializer:
 
     def deserialize(self, data: bytes) -> pd.DataFrame:
         data = pd.DataFrame.from_dict(json.loads(data))
-        print(data)
         return data
-    
\ No newline at end of file
+
+    def to_buffers(self, data: pd.DataFrame) -> tuple:
+        """
+        columnar payload for the binary frame, arrow ipc if pyarrow is installed
+        and can convert the frame (mixed object columns and duplicate column names
+        it cannot), otherwise one raw numpy buffer per column with its dtype in the meta
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return self.df2columns(data)
+        try:
+            table = pa.Table.from_pandas(data)
+        except (pa.ArrowException, ValueError):
+            return self.df2columns(data)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return {'format': 'arrow'}, [memoryview(sink.getvalue())]
+
+    def from_buffers(self, meta: dict, buffers: list, lazy: bool = False) -> pd.DataFrame:
+        """
+        lazy returns the arrow table without materializing pandas (arrow format only)
+        """
+        if meta['format'] == 'arrow':
+            import pyarrow as pa
+            table = pa.ipc.open_stream(pa.py_buffer(buffers[0])).read_all()
+            return table if lazy else table.to_pandas()
+        return self.columns2df(meta, buffers)
+
+    def df2columns(self, data: pd.DataFrame) -> tuple:
+        import numpy as np
+        buffers = []
+        def encode(col: pd.Series) -> dict:
+            if isinstance(col.dtype, pd.DatetimeTZDtype):
+                # the utc wall times as a datetime64 buffer, the zone in the meta
+                values = np.ascontiguousarray(col.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy())
+                buffers.append(memoryview(values.reshape(-1).view(np.uint8)))
+                return {'dtype': values.dtype.str, 'buffer': len(buffers) - 1, 'tz': str(col.dtype.tz)}
+            if isinstance(col.dtype, np.dtype) and not col.dtype.hasobject:
+                values = np.ascontiguousarray(col.to_numpy())
+                buffers.append(memoryview(values.reshape(-1).view(np.uint8)))
+                return {'dtype': values.dtype.str, 'buffer': len(buffers) - 1}
+            # object, categorical and extension columns go through json
+            return {'dtype': str(col.dtype), 'values': json.loads(col.to_json(orient='values'))}
+        meta = {'format': 'numpy',
+                'columns': [[name, encode(data.iloc[:, i])] for i, name in enumerate(data.columns)]}
+        # only the default 0..n-1 index is left out, any other (e.g. a sliced frame) is sent
+        if not data.index.equals(pd.RangeIndex(len(data))):
+            meta['index'] = encode(data.index.to_series())
+        if data.index.name is not None:
+            meta['index_name'] = data.index.name
+        return meta, buffers
+
+    def columns2df(self, meta: dict, buffers: list) -> pd.DataFrame:
+        import numpy as np
+        def decode(col: dict):
+            if 'buffer' in col:
+                values = np.frombuffer(buffers[col['buffer']], dtype=np.dtype(col['dtype']))
+                if 'tz' in col:
+                    return pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(col['tz']).array
+                return values
+            values = pd.Series(col['values'])
+            try:
+                values = values.astype(col['dtype'])
+            except (TypeError, ValueError):
+                pass
+            return values.array
+        index = decode(meta['index']) if 'index' in meta else None
+        # built by position, duplicate column names would collapse in a dict
+        df = pd.DataFrame({i: decode(col) for i, (_, col) in enumerate(meta['columns'])}, index=index)
+        df.columns = [name for name, _ in meta['columns']]
+        df.index.name = meta.get('index_name')
+        return df
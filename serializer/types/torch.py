@@ -11,6 +11,25 @@ class TorchSerializer:
         from safetensors.torch import save
         return save({'data':data}).hex()
     
+    def to_buffers(self, data: 'torch.Tensor') -> tuple:
+        import torch
+        if data.is_sparse or data.is_quantized:
+            return None
+        data = data.detach().cpu().contiguous()
+        meta = {'dtype': str(data.dtype).split('.')[-1], 'shape': list(data.shape)}
+        return meta, [memoryview(data.reshape(-1).view(torch.uint8).numpy())]
+
+    def from_buffers(self, meta: dict, buffers: list, lazy: bool = False) -> 'torch.Tensor':
+        import torch
+        import warnings
+        dtype = getattr(torch, meta['dtype'])
+        if buffers[0].nbytes == 0:
+            return torch.empty(meta['shape'], dtype=dtype)
+        with warnings.catch_warnings():
+            # the frame is read only, the tensor shares its memory instead of copying
+            warnings.simplefilter('ignore')
+            return torch.frombuffer(buffers[0], dtype=dtype).reshape(meta['shape'])
+
     def str2bytes(self, data: str, mode: str = 'hex') -> bytes:
         if mode in ['utf-8']:
             return bytes(data, mode)
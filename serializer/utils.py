@@ -1,3 +1,5 @@
+import json
+
 def dict2bytes( data:dict) -> bytes:
     import msgpack
     data_json_str = json.dumps(data)
@@ -14,7 +16,10 @@ def str2dict( data:str) -> bytes:
 
 def get_data_type_string( x):
     # GET THE TYPE OF THE VALUE
-    data_type = str(type(x)).split("'")[1].lower()
+    return get_type_string(type(x))
+
+def get_type_string( t:type):
+    data_type = str(t).split("'")[1].lower()
     if 'munch' in data_type:
         data_type = 'munch'
     if 'tensor' in data_type or 'torch' in data_type:
@@ -23,6 +28,8 @@ def get_data_type_string( x):
         data_type = 'numpy'
     if  'dataframe' in data_type:
         data_type = 'pandas'
+    if data_type in ['bytearray', 'memoryview']:
+        data_type = 'bytes'
 
     return data_type
 
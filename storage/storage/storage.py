@@ -1,34 +1,164 @@
 
 import json
 import os
+import tempfile
 import time
+import atexit
+import threading
+import weakref
 
 class Storage:
 
+    index_filename = '.index.json' # hidden so the glob in paths skips it
+    index_save_interval = 1.0 # seconds between index writes
+    instances = weakref.WeakSet() # saved at exit without keeping them alive
+
     def __init__(self, storage_dirpath='~/.storage', mode='json'):
         self.storage_dirpath = self.abspath(storage_dirpath)
         self.mode = mode
+        self.index_path = f'{self.storage_dirpath}/{self.index_filename}'
+        self._index = None # path -> [mtime, size, ttl]
+        self.index_saved = 0
+        self.index_dirty = False
+        self.lock = threading.RLock()
+        self.instances.add(self)
+
+    @classmethod
+    def save_indexes(cls):
+        for storage in list(cls.instances):
+            storage.save_index()
 
-    def put(self, path, data):
+    def put(self, path, data, ttl=None):
+        """
+        ttl is the number of seconds after which the item expires (None never expires)
+        """
         path = self.get_item_path(path)
         dirpath = '/'.join(path.split('/')[:-1])
         if not os.path.exists(dirpath):
             os.makedirs(dirpath, exist_ok=True)
-        with open(path, 'w') as f:
-            json.dump(data, f)
+        fd, tmp_path = tempfile.mkstemp(dir=dirpath, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        stat = os.stat(path)
+        with self.lock:
+            self.index()[path] = [stat.st_mtime, stat.st_size, ttl]
+            self.index_changed()
         return path
 
     def get(self, path, default=None, max_age=None, update=False):
         path = self.get_item_path(path)
-        with open(path, 'r') as f:
-            data = json.load(f)
         if update:
             max_age = 0
-        if max_age != None:
-            if time.time() - os.path.getmtime(path) > max_age:
-                data = default
+        # check the age before reading so stale items are never parsed
+        entry = self.index_entry(path)
+        if entry != None:
+            age = time.time() - entry[0]
+            ttl = entry[2]
+            if (max_age != None and age > max_age) or (ttl != None and age > ttl):
+                return default
+        with open(path, 'r') as f:
+            data = json.load(f)
         return data
 
+    def index(self) -> dict:
+        """
+        path -> [mtime, size, ttl] for every item, loaded from disk once 
+        and rebuilt from a scan if it is missing or corrupt
+        """
+        with self.lock:
+            if self._index == None:
+                self._index = self.read_index()
+                if self._index == None:
+                    self.reindex()
+            return self._index
+
+    def read_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def reindex(self) -> dict:
+        """
+        rebuilds the index from the files on disk (keeps known ttls)
+        """
+        with self.lock:
+            ttls = {p: e[2] for p, e in (self._index or {}).items()}
+            index = {}
+            for p in self.paths():
+                stat = os.stat(p)
+                index[p] = [stat.st_mtime, stat.st_size, ttls.get(p)]
+            self._index = index
+            self.index_changed(force=True)
+            return index
+
+    def index_entry(self, path):
+        """
+        the index entry of path, checked against the file (one stat, no read) 
+        as other processes can rewrite or remove it
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+        with self.lock:
+            index = self.index()
+            entry = index.get(path)
+            if stat == None:
+                if entry != None:
+                    # removed by another process
+                    index.pop(path)
+                    self.index_changed()
+                return None
+            if entry == None or entry[0] != stat.st_mtime or entry[1] != stat.st_size:
+                # written by another process since the index was loaded, which
+                # saved its ttl in the index on disk if it saved the index since
+                saved = (self.read_index() or {}).get(path)
+                if saved != None and saved[0] == stat.st_mtime and saved[1] == stat.st_size:
+                    entry = index[path] = saved
+                else:
+                    entry = index[path] = [stat.st_mtime, stat.st_size, None]
+                self.index_changed()
+            return entry
+
+    def index_changed(self, force=False):
+        self.index_dirty = True
+        if force or time.time() - self.index_saved > self.index_save_interval:
+            self.save_index()
+
+    def save_index(self):
+        """
+        merges the index into the one on disk, so the entries (and ttls) saved by other
+        processes are kept: the newest write of a path wins, at the same mtime the 
+        entry that knows its ttl, and the entries of removed files are dropped
+        """
+        with self.lock:
+            if not self.index_dirty or self._index == None:
+                return
+            saved_index = self.read_index() or {}
+            index = {p: e for p, e in saved_index.items() if p in self._index or os.path.isfile(p)}
+            for p, entry in self._index.items():
+                saved = index.get(p)
+                if saved == None and not os.path.isfile(p):
+                    continue # removed by another process
+                if saved == None or entry[0] > saved[0] or (entry[0] == saved[0] and entry[2] != None):
+                    index[p] = entry
+            os.makedirs(self.storage_dirpath, exist_ok=True)
+            tmp_path = f'{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+            self._index = index
+            self.index_saved = time.time()
+            self.index_dirty = False
+
     def get_item_path(self, path):
         if not path.startswith('/'):
             path  = f'{self.storage_dirpath}/{path}'
@@ -41,21 +171,68 @@ class Storage:
         path = self.get_item_path(path)
         assert os.path.exists(path), f'Failed to find path {path}'
         os.remove(path)
+        with self.lock:
+            if self.index().pop(path, None) != None:
+                self.index_changed()
         return path
 
-    def items(self, df=False, features=None):
-        paths = self.paths()
-        data = []
-        for p in paths:
-            try:
-                data.append(self.get(p))
-            except Exception as e:
-                print(f'Failed to get {p} error={e}')
+    def items(self, df=False, features=None, max_age=None, prefix=None, lazy=False):
+        """
+        max_age and prefix filter on the index before any file is read
+        lazy returns a generator that reads the items one at a time
+        """
+        def generator():
+            for p in self.filter_paths(max_age=max_age, prefix=prefix):
+                try:
+                    yield self.get(p)
+                except Exception as e:
+                    print(f'Failed to get {p} error={e}')
+        if lazy:
+            return generator()
+        data = list(generator())
         if df:
             import pandas as pd
             data = pd.DataFrame(data)
         return data
 
+    def filter_paths(self, max_age=None, prefix=None):
+        """
+        indexed paths that are younger than max_age, not expired and under prefix
+        """
+        now = time.time()
+        if prefix != None:
+            prefix = prefix if prefix.startswith('/') else f'{self.storage_dirpath}/{prefix}'
+        paths = []
+        with self.lock:
+            entries = list(self.index().items())
+        for p, (mtime, size, ttl) in entries:
+            age = now - mtime
+            if prefix != None and not p.startswith(prefix):
+                continue
+            if (max_age != None and age > max_age) or (ttl != None and age > ttl):
+                continue
+            paths.append(p)
+        return sorted(paths)
+
+    def sweep(self, max_age=None):
+        """
+        removes every expired item (and every item older than max_age if given) in one pass
+        """
+        now = time.time()
+        removed = []
+        with self.lock:
+            index = self.index()
+            for p, (mtime, size, ttl) in list(index.items()):
+                age = now - mtime
+                if (max_age != None and age > max_age) or (ttl != None and age > ttl):
+                    if os.path.exists(p):
+                        os.remove(p)
+                    index.pop(p)
+                    removed.append(p)
+            if removed:
+                self.index_changed(force=True)
+        return removed
+
     def paths(self):
         import glob
         paths = glob.glob(f'{self.storage_dirpath}/**/*', recursive=True)
@@ -70,15 +247,14 @@ class Storage:
         """
         returns the age of the item in seconds
         """
-        paths = self.paths()
-        ages = {}
-        for p in paths:
-            ages[p] = time.time() - os.path.getmtime(p)
-        return ages
+        return self.path2age()
         
     def n(self):
-        paths = self.items()
-        return len(paths)
+        """
+        the number of indexed items, the ones other processes removed are 
+        dropped when they are next looked up or swept
+        """
+        return len(self.index())
 
     def _rm_all(self):
         """
@@ -87,6 +263,9 @@ class Storage:
         paths = self.paths()
         for p in paths:
             os.remove(p)
+        with self.lock:
+            self._index = {}
+            self.index_changed(force=True)
         return paths
 
     def test(self, path='test.json', data={'test': 'test', 'fam': {'test': 'test'}}):
@@ -105,6 +284,11 @@ class Storage:
         assert n2 == n0, f'Failed to delete item n0={n0} n2={n2}'
         assert not self.exists(path), f'Failed to delete {path}'
         assert data == {'test': 'test'}, f'Failed test data={data}'
+        self.put(path, {'test': 'test'}, ttl=0)
+        time.sleep(0.01)
+        assert self.get(path) == None, f'Failed to expire {path}'
+        assert self.get_item_path(path) in self.sweep(), f'Failed to sweep {path}'
+        assert self.n() == n0, f'Failed to sweep item n0={n0}'
         t1 = time.time()
         print(f'Passed all tests in {t1 - t0} seconds')
         return {'success': True, 'msg': 'Passed all tests'}
@@ -116,8 +300,8 @@ class Storage:
         """
         returns the age of the item in seconds
         """
-        paths = self.paths()
-        ages = {}
-        for p in paths:
-            ages[p] = time.time() - os.path.getmtime(p)
-        return ages
\ No newline at end of file
+        now = time.time()
+        with self.lock:
+            return {p: now - mtime for p, (mtime, size, ttl) in self.index().items()}
+
+atexit.register(Storage.save_indexes)
\ No newline at end of file
@@ -0,0 +1,128 @@
+import commune as c
+import os
+import json
+import sqlite3
+import threading
+from .utils import get_json, put_json
+
+class JsonBackend:
+    """
+    one .json file per key under path (the original store layout)
+    """
+
+    def __init__(self, path:str):
+        self.path = path
+
+    def resolve_path(self, path):
+        return c.resolve_path(self.path + path)
+
+    def item_path(self, k):
+        return self.resolve_path(k + '.json')
+
+    def path2key(self, path):
+        return path[len(self.resolve_path('')):-len('.json')]
+
+    def put(self, k, v):
+        return put_json(self.item_path(k), v)
+
+    def get(self, k, default=None):
+        return get_json(self.item_path(k), default)
+
+    def rm(self, k):
+        return c.rm(self.item_path(k))
+
+    def put_many(self, items:dict):
+        return [self.put(k, v) for k, v in items.items()]
+
+    def get_many(self, keys:list, default=None):
+        return {k: self.get(k, default) for k in keys}
+
+    def scan(self, prefix=''):
+        paths = [p for p in c.glob(self.resolve_path(prefix)) if p.endswith('.json')]
+        return self.get_many(sorted(self.path2key(p) for p in paths))
+
+    def ls(self, path='./'):
+        return c.ls(self.resolve_path(path))
+
+    def exists(self, path):
+        return c.exists(self.resolve_path(path))
+
+    def glob(self, path='./'):
+        return c.glob(self.resolve_path(path))
+
+class SqliteBackend:
+    """
+    all keys in one sqlite file (WAL mode), keys are kept sorted by the primary
+    key index so prefix scans are range queries and batches are one transaction
+    """
+
+    def __init__(self, path:str, filename='store.db'):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+        self.db_path = os.path.join(self.path, filename)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID')
+
+    def execute(self, query:str, params=(), many=False):
+        with self.lock:
+            if many:
+                # executemany outside a transaction commits per row
+                with self.conn:
+                    self.conn.execute('BEGIN')
+                    return self.conn.executemany(query, params).fetchall()
+            return self.conn.execute(query, params).fetchall()
+
+    def put(self, k, v):
+        data = json.dumps(v)
+        self.execute('INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)', (k, data))
+        return {'success': True, 'path': f'{self.db_path}:{k}', 'size': len(data)*8}
+
+    def get(self, k, default=None):
+        rows = self.execute('SELECT value FROM kv WHERE key = ?', (k,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def rm(self, k):
+        self.execute('DELETE FROM kv WHERE key = ?', (k,))
+        return {'success': True, 'path': f'{self.db_path}:{k}'}
+
+    def put_many(self, items:dict):
+        rows = [(k, json.dumps(v)) for k, v in items.items()]
+        self.execute('INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)', rows, many=True)
+        return {'success': True, 'n': len(rows)}
+
+    def get_many(self, keys:list, default=None):
+        keys = list(keys)
+        results = {}
+        # stay under the sqlite host parameter limit
+        for i in range(0, len(keys), 900):
+            chunk = keys[i:i+900]
+            query = f'SELECT key, value FROM kv WHERE key IN ({",".join("?"*len(chunk))})'
+            results.update({k: json.loads(v) for k, v in self.execute(query, chunk)})
+        return {k: results.get(k, default) for k in keys}
+
+    def prefix_range(self, prefix:str):
+        return 'SELECT key, value FROM kv WHERE key >= ? AND key < ? ORDER BY key', (prefix, prefix + '\U0010ffff')
+
+    def scan(self, prefix=''):
+        query, params = self.prefix_range(prefix)
+        return {k: json.loads(v) for k, v in self.execute(query, params)}
+
+    def keys(self, prefix=''):
+        query, params = self.prefix_range(prefix)
+        return [k for k, _ in self.execute(query.replace('key, value', 'key, NULL'), params)]
+
+    def ls(self, path='./'):
+        prefix = '' if path in ['./', '.', '/'] else path.rstrip('/') + '/'
+        return self.keys(prefix)
+
+    def exists(self, path):
+        return len(self.execute('SELECT 1 FROM kv WHERE key = ?', (path,))) > 0
+
+    def glob(self, path='./'):
+        pattern = '*' if path in ['./', '.', '/'] else path
+        return [k for k, in self.execute('SELECT key FROM kv WHERE key GLOB ? ORDER BY key', (pattern,))]
+
+backends = {'json': JsonBackend, 'sqlite': SqliteBackend}
@@ -1,13 +1,22 @@
-
-
 import commune as c
 import os
+from collections import OrderedDict
 from .utils import get_json
+from .backend import backends
 class Store:
     free = False
-    endpoints = ['put', 'get']
-    def __init__(self, path='~/.commune/module/'):
+    endpoints = ['put', 'get', 'put_many', 'get_many', 'scan']
+    def __init__(self, path='~/.commune/module/', backend='json', cache_size=0):
+        """
+        backend: json (one file per key) or sqlite (single file engine)
+        cache_size: number of values kept in the in memory read cache (0 disables it)
+        cached values are shared, do not mutate what get returns
+        """
         self.path = os.path.abspath(os.path.expanduser(path))
+        assert backend in backends, f'backend {backend} not in {list(backends)}'
+        self.backend = backends[backend](self.path)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
     
     def resolve_path(self, path):
         return c.resolve_path(self.path + path)
@@ -16,25 +25,62 @@ class Store:
         return self.resolve_path(item + '.json')
 
     def put(self, k, v):
-        k = self.item_path(k)
-        return c.put_json(k, v)
+        self.cache.pop(k, None)
+        result = self.backend.put(k, v)
+        self.cache_put(k, v)
+        return result
 
     def get(self, k):
-        k = self.item_path(k)
-        return c.get_json(k)
+        if k in self.cache:
+            self.cache.move_to_end(k)
+            return self.cache[k]
+        v = self.backend.get(k)
+        self.cache_put(k, v)
+        return v
+
+    def put_many(self, items:dict):
+        for k in items:
+            self.cache.pop(k, None)
+        result = self.backend.put_many(items)
+        for k, v in items.items():
+            self.cache_put(k, v)
+        return result
+
+    def get_many(self, keys:list):
+        results = {k: self.cache[k] for k in keys if k in self.cache}
+        missing = [k for k in keys if k not in results]
+        if missing:
+            for k, v in self.backend.get_many(missing).items():
+                results[k] = v
+                self.cache_put(k, v)
+        return {k: results[k] for k in keys}
+
+    def scan(self, prefix=''):
+        """
+        all items whose key starts with prefix
+        """
+        return self.backend.scan(prefix)
+
+    def cache_put(self, k, v):
+        if self.cache_size <= 0 or v is None:
+            return
+        self.cache[k] = v
+        self.cache.move_to_end(k)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
 
     def rm(self, k):
-        k = self.item_path(k)
-        return c.rm(k)
+        self.cache.pop(k, None)
+        return self.backend.rm(k)
 
     def ls(self, path = './'):
-        return c.ls(self.resolve_path(path))
+        return self.backend.ls(path)
 
     def exists(self, path):
-        return c.exists(self.resolve_path(path))
+        return self.backend.exists(path)
 
     def glob(self, path = './'):
-        return c.glob(self.resolve_path(path))
+        return self.backend.glob(path)
 
     def hash(self, path):
         return c.hash(self.get(path))
@@ -45,9 +91,16 @@ class Store:
         assert c.hash(self.get(key)) == self.hash(key)
         self.rm(key)
         assert self.get('test') == None
+        items = {f'test/{i}': {'i': i} for i in range(10)}
+        self.put_many(items)
+        assert self.get_many(list(items)) == items
+        assert self.scan('test/') == items
+        for k in items:
+            self.rm(k)
         print('Store test passed')
         return {
             'status': 'pass'
         }
 
 
+
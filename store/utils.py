@@ -44,8 +44,18 @@ def put_json(path:str, data:dict, key=None) -> dict:
     dirpath = os.path.dirname(path)
     if not os.path.exists(dirpath):
         os.makedirs(dirpath, exist_ok=True)
-    with open(path, 'w') as file:
-        file.write(data)
+    # write to a temp file and swap it in so readers never see a partial file,
+    # mkstemp gives every writer (process or thread) a file of its own
+    import tempfile
+    fd, tmp_path = tempfile.mkstemp(dir=dirpath, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
     return {'success': True, 'path': f'{path}', 'size': len(data)*8}
 
 def rm_folder(path):
@@ -725,7 +725,8 @@ class SubstrateInterface:
                 self.debug_message('Stored metadata for {} in Redis'.format(self.runtime_version))
                 self.cache_region.set('METADATA_{}'.format(self.runtime_version), self.metadata)
 
-        # Update type registry
+        # Update type registry, on a new runtime config as the current one can be shared with other connections
+        self.runtime_config = RuntimeConfigurationObject(ss58_format=self.runtime_config.ss58_format)
         self.reload_type_registry(
             use_remote_preset=self.config.get('use_remote_preset'),
             auto_discover=self.config.get('auto_discover')
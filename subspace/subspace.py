@@ -1,15 +1,14 @@
 import requests
 import json
-import queue
 import re
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import Future
 from contextlib import contextmanager
-from copy import deepcopy
 from typing import Any, Mapping, TypeVar, cast, List, Dict, Optional
 from collections import defaultdict
 from .storage import StorageKey
 from .key import  Keypair# type: ignore
 from .base import ExtrinsicReceipt, SubstrateInterface
+from scalecodec.base import RuntimeConfigurationObject
 from .types import (ChainTransactionError,
                                     NetworkQueryError, 
                                     SubnetParamsMaps, 
@@ -18,8 +17,9 @@ from .types import (ChainTransactionError,
                                     GovernanceConfiguration,
                                     Ss58Address,  
                                     NetworkParams, 
-                                    SubnetParams, 
-                                    Chunk )
+                                    SubnetParams,
+                                    AccountStates )
+from .engine import ChainEngine, Chunk, RuntimeCache, make_request_smaller
 import commune as c
 
 U16_MAX = 2**16 - 1
@@ -28,6 +28,10 @@ IPFS_REGEX = re.compile(r"^Qm[1-9A-HJ-NP-Za-km-z]{44}$")
 T1 = TypeVar("T1")
 T2 = TypeVar("T2")
 
+def connect_substrate(url: str, ws_options: dict) -> SubstrateInterface:
+    # module level, so every Subspace of the same node shares one engine
+    return SubstrateInterface(url, ws_options=ws_options)
+
 class Subspace(c.Module):
 
     name2storage_exceptions = {'key': 'Keys'}
@@ -44,7 +48,7 @@ class Subspace(c.Module):
     networks = list(url_map.keys())
     wait_for_finalization: bool
     _num_connections: int
-    connections_queue: queue.Queue[SubstrateInterface]
+    engine: ChainEngine # shared with every client of the same node
     url: str
 
     def __init__(
@@ -59,6 +63,7 @@ class Subspace(c.Module):
         archive = False,
         timeout: int  = None,
         net = None,
+        runtime_check_interval: float = 60,
     ):
         self.set_network(network=net or network, # add a little shortcut,
                          mode=mode,
@@ -68,7 +73,8 @@ class Subspace(c.Module):
                          ws_options=ws_options,
                          archive=archive,
                          wait_for_finalization=wait_for_finalization, 
-                         timeout=timeout)
+                         timeout=timeout,
+                         runtime_check_interval=runtime_check_interval)
         
     @classmethod
     def switch(cls, network=None):
@@ -96,7 +102,8 @@ class Subspace(c.Module):
                         num_connections: int = 1,
                         ws_options: dict[str, int] = {},
                         wait_for_finalization: bool = False,
-                        timeout: int  = None ):
+                        timeout: int  = None,
+                        runtime_check_interval: float = 60):
         if network in ['chain']:
             network = 'main'
 
@@ -115,11 +122,17 @@ class Subspace(c.Module):
         self.url  = url 
         self.num_connections = num_connections                  
         self.wait_for_finalization = wait_for_finalization
-        self.connections_queue = queue.Queue(num_connections)
+        self.engine = ChainEngine.get(self.url, 
+                                      connect_substrate,
+                                      num_connections=num_connections,
+                                      ws_options=self.ws_options,
+                                      runtime_path=self.resolve_path(f'{self.network}/runtime'),
+                                      error_type=NetworkQueryError)
+        self.engine.runtime.check_interval = runtime_check_interval
         self.network_state = {"network": self.network, "url": self.url,"connections": self.num_connections}
         c.print(self.network_state)
-        for _ in range(self.num_connections):
-            self.connections_queue.put(SubstrateInterface(self.url, ws_options=self.ws_options))
+        with self.get_conn(): # opens the first pooled connection, the rest open on demand
+            pass
         self.connection_latency = c.time() - t0
         c.print(f'Chain({self.network_state})', color='blue') 
 
@@ -133,17 +146,36 @@ class Subspace(c.Module):
             url = mode + '://' + url
         return url    
 
+    @property
+    def runtime(self) -> RuntimeCache:
+        """
+        the runtime metadata cache of the node, shared by every pooled
+        connection (and every client of the node) so it is decoded once
+        """
+        return self.engine.runtime
+
+    @property
+    def rpc(self):
+        """
+        multiplexed websockets for batch queries (opened on first use), many
+        request ids are in flight on each of them at once
+        """
+        return self.engine.rpc
+
     @contextmanager
     def get_conn(self, timeout: float = None, init: bool = False):
         """
         Context manager to get a connection from the pool.
 
-        Tries to get a connection from the pool queue. If the queue is empty,
-        it blocks for `timeout` seconds until a connection is available. If
-        `timeout` is None, it blocks indefinitely.
+        Takes an idle connection from the engine pool, opening one while the
+        pool is not full and reconnecting (with backoff) one the node dropped.
+        If none is available it blocks for `timeout` seconds, or indefinitely
+        if `timeout` is None.
 
         Args:
             timeout: The maximum time in seconds to wait for a connection.
+            init: Whether to point the connection at the cached runtime
+              metadata of the current spec version.
 
         Yields:
             The connection object from the pool.
@@ -152,18 +184,8 @@ class Subspace(c.Module):
             QueueEmptyError: If no connection is available within the timeout
               period.
         """
-
-        conn = self.connections_queue.get(timeout=timeout)
-        if init:
-            conn.init_runtime()  # type: ignore
-        try:
-            if conn.websocket and conn.websocket.connected:  # type: ignore
-                yield conn
-            else:
-                conn = SubstrateInterface(self.url, ws_options=self.ws_options)
-                yield conn
-        finally:
-            self.connections_queue.put(conn)
+        with self.engine.connection(timeout=timeout, init=init) as conn:
+            yield conn
 
     def get_storage_keys(
         self,
@@ -240,58 +262,24 @@ class Subspace(c.Module):
     def _send_batch(
         self,
         batch_payload: list[Any],
-        request_ids: list[int],
+        request_ids: list[int] = None,
         extract_result: bool = True,
+        timeout: float = None,
     ):
         """
         Sends a batch of requests to the substrate and collects the results.
 
         Args:
-            substrate: An instance of the substrate interface.
-            batch_payload: The payload of the batch request.
-            request_ids: A list of request IDs for tracking responses.
-            results: A list to store the results of the requests.
+            batch_payload: The payload of the batch request, (method, params) tuples.
+            request_ids: Unused, ids are assigned by the multiplexed connection.
             extract_result: Whether to extract the result from the response.
+            timeout: Seconds to wait for the responses.
 
         Raises:
             NetworkQueryError: If there is an `error` in the response message.
-
-        Note:
-            No explicit return value as results are appended to the provided 'results' list.
         """
-        results: list[str ] = []
-        with self.get_conn(init=True) as substrate:
-            try:
-
-                substrate.websocket.send(  #  type: ignore
-                    json.dumps(batch_payload)
-                )  # type: ignore
-            except NetworkQueryError:
-                pass
-            while len(results) < len(request_ids):
-                received_messages = json.loads(
-                    substrate.websocket.recv()  # type: ignore
-                )  # type: ignore
-                if isinstance(received_messages, dict):
-                    received_messages: list[dict[Any, Any]] = [received_messages]
-
-                for message in received_messages:
-                    if message.get("id") in request_ids:
-                        if extract_result:
-                            try:
-                                results.append(message["result"])
-                            except Exception:
-                                raise (
-                                    RuntimeError(
-                                        f"Error extracting result from message: {message}"
-                                    )
-                                )
-                        else:
-                            results.append(message)
-                    if "error" in message:
-                        raise NetworkQueryError(message["error"])
-
-            return results
+        requests = [(p["method"], p["params"]) if isinstance(p, dict) else p for p in batch_payload]
+        return self.rpc.request(requests, extract_result=extract_result, timeout=timeout)
 
     def _make_request_smaller(
         self,
@@ -300,67 +288,19 @@ class Subspace(c.Module):
         fun_params: list[tuple[Any, Any, Any, Any, str]],
     ) -> tuple[list[list[tuple[T1, T2]]], list[Chunk]]:
         """
-        Splits a batch of requests into smaller batches, each not exceeding the specified maximum size.
+        Splits a batch of requests into smaller batches, each not exceeding MAX_REQUEST_SIZE bytes.
 
         Args:
             batch_request: A list of requests to be sent in a batch.
-            max_size: Maximum size of each batch in bytes.
 
         Returns:
-            A list of smaller request batches.
+            A list of smaller request batches and their chunks.
 
         Example:
-            >>> _make_request_smaller(batch_request=[('method1', 'params1'), ('method2', 'params2')], max_size=1000)
-            [[('method1', 'params1')], [('method2', 'params2')]]
-        """
-        assert len(prefix_list) == len(fun_params) == len(batch_request)
-
-        def estimate_size(request: tuple[T1, T2]):
-            """Convert the batch request to a string and measure its length"""
-            return len(json.dumps(request))
-
-        # Initialize variables
-        result: list[list[tuple[T1, T2]]] = []
-        current_batch = []
-        current_prefix_batch = []
-        current_params_batch = []
-        current_size = 0
-        chunk_list: list[Chunk] = []
-
-        # Iterate through each request in the batch
-        for request, prefix, params in zip(batch_request, prefix_list, fun_params):
-            request_size = estimate_size(request)
-
-            # Check if adding this request exceeds the max size
-            if current_size + request_size > MAX_REQUEST_SIZE:
-                # If so, start a new batch
-
-                # Essentiatly checks that it's not the first iteration
-                if current_batch:
-                    chunk = Chunk(
-                        current_batch, current_prefix_batch, current_params_batch
-                    )
-                    chunk_list.append(chunk)
-                    result.append(current_batch)
-
-                current_batch = [request]
-                current_prefix_batch = [prefix]
-                current_params_batch = [params]
-                current_size = request_size
-            else:
-                # Otherwise, add to the current batch
-                current_batch.append(request)
-                current_size += request_size
-                current_prefix_batch.append(prefix)
-                current_params_batch.append(params)
-
-        # Add the last batch if it's not empty
-        if current_batch:
-            result.append(current_batch)
-            chunk = Chunk(current_batch, current_prefix_batch, current_params_batch)
-            chunk_list.append(chunk)
-
-        return result, chunk_list
+            >>> _make_request_smaller(batch_request=[('method1', 'params1'), ('method2', 'params2')], ...)
+            ([[('method1', 'params1'), ('method2', 'params2')]], [Chunk(...)])
+        """
+        return make_request_smaller(batch_request, prefix_list, fun_params, max_size=MAX_REQUEST_SIZE)
 
     def _are_changes_equal(self, change_a: Any, change_b: Any):
         for (a, b), (c, d) in zip(change_a, change_b):
@@ -371,133 +311,40 @@ class Subspace(c.Module):
         self, batch_requests: list[tuple[str, list[Any]]], extract_result: bool = True
     ) -> list[str]:
         """
-        Sends batch requests to the substrate node using multiple threads and collects the results.
+        Splits the chunks so no query carries more than 35000 keys and sends them
+        all over the multiplexed connections without waiting for the responses.
 
         Args:
-            substrate: An instance of the substrate interface.
-            batch_requests : A list of requests to be sent in batches.
-            max_size: Maximum size of each batch in bytes.
-            extract_result: Whether to extract the result from the response message.
+            chunk_requests: The chunks of (method, params) requests to send.
 
         Returns:
-            A list of results from the batch requests.
-
-        Example:
-            >>> rpc_request_batch(substrate_instance, [('method1', ['param1']), ('method2', ['param2'])])
-            ['result1', 'result2', ...]
-        """
-
-        chunk_results: list[Any] = []
-        # smaller_requests = self._make_request_smaller(batch_requests)
-        request_id = 0
-        with ThreadPoolExecutor() as executor:
-            futures: list[Future[list[str]]] = []
-            for chunk in [batch_requests]:
-                request_ids: list[int] = []
-                batch_payload: list[Any] = []
-                for method, params in chunk:
-                    request_id += 1
-                    request_ids.append(request_id)
-                    batch_payload.append(
-                        {
-                            "jsonrpc": "2.0",
-                            "method": method,
-                            "params": params,
-                            "id": request_id,
-                        }
-                    )
+            A list of response futures per chunk and the chunks as they were sent.
+        """
 
-                futures.append(
-                    executor.submit(
-                        self._send_batch,
-                        batch_payload=batch_payload,
-                        request_ids=request_ids,
-                        extract_result=extract_result,
-                    )
-                )
-            for future in futures:
-                resul = future.result()
-                chunk_results.append(resul)
-        return chunk_results
+        return self.rpc.request_batches([batch_requests], extract_result=extract_result)
 
     def rpc_request_batch_chunked(
         self, chunk_requests: list[Chunk], extract_result: bool = True
     ):
         """
-        Sends batch requests to the substrate node using multiple threads and collects the results.
+        Sends chunked batch requests and waits for all of them, see `rpc_submit_batch_chunked`.
+        """
+        return self.engine.request_chunks(chunk_requests, extract_result=extract_result)
+
+    def rpc_submit_batch_chunked(
+        self, chunk_requests: list[Chunk]
+    ) -> tuple[list[list[Future]], list[Chunk]]:
+        """
+        Splits the chunks so no query carries more than 35000 keys and sends them
+        all over the multiplexed connections without waiting for the responses.
 
         Args:
-            substrate: An instance of the substrate interface.
-            batch_requests : A list of requests to be sent in batches.
-            max_size: Maximum size of each batch in bytes.
-            extract_result: Whether to extract the result from the response message.
+            chunk_requests: The chunks of (method, params) requests to send.
 
         Returns:
-            A list of results from the batch requests.
-
-        Example:
-            >>> rpc_request_batch(substrate_instance, [('method1', ['param1']), ('method2', ['param2'])])
-            ['result1', 'result2', ...]
-        """
-
-        def split_chunks(chunk: Chunk, chunk_info: list[Chunk], chunk_info_idx: int):
-            manhattam_chunks: list[tuple[Any, Any]] = []
-            mutaded_chunk_info = deepcopy(chunk_info)
-            max_n_keys = 35000
-            for query in chunk.batch_requests:
-                result_keys = query[1][0]
-                keys_amount = len(result_keys)
-                if keys_amount > max_n_keys:
-                    mutaded_chunk_info.pop(chunk_info_idx)
-                    for i in range(0, keys_amount, max_n_keys):
-                        new_chunk = deepcopy(chunk)
-                        splitted_keys = result_keys[i: i + max_n_keys]
-                        splitted_query = deepcopy(query)
-                        splitted_query[1][0] = splitted_keys
-                        new_chunk.batch_requests = [splitted_query]
-                        manhattam_chunks.append(splitted_query)
-                        mutaded_chunk_info.insert(chunk_info_idx, new_chunk)
-                else:
-                    manhattam_chunks.append(query)
-            return manhattam_chunks, mutaded_chunk_info
-
-        assert len(chunk_requests) > 0
-        mutated_chunk_info: list[Chunk] = []
-        chunk_results: list[Any] = []
-        # smaller_requests = self._make_request_smaller(batch_requests)
-        request_id = 0
-
-        with ThreadPoolExecutor() as executor:
-            futures: list[Future[list[str]]] = []
-            for idx, macro_chunk in enumerate(chunk_requests):
-                _, mutated_chunk_info = split_chunks(macro_chunk, chunk_requests, idx)
-            for chunk in mutated_chunk_info:
-                request_ids: list[int] = []
-                batch_payload: list[Any] = []
-                for method, params in chunk.batch_requests:
-                    # for method, params in micro_chunk:
-                    request_id += 1
-                    request_ids.append(request_id)
-                    batch_payload.append(
-                        {
-                            "jsonrpc": "2.0",
-                            "method": method,
-                            "params": params,
-                            "id": request_id,
-                        }
-                    )
-                futures.append(
-                    executor.submit(
-                        self._send_batch,
-                        batch_payload=batch_payload,
-                        request_ids=request_ids,
-                        extract_result=extract_result,
-                    )
-                )
-            for future in futures:
-                resul = future.result()
-                chunk_results.append(resul)
-        return chunk_results, mutated_chunk_info
+            A list of response futures per chunk and the chunks as they were sent.
+        """
+        return self.engine.submit_chunks(chunk_requests)
 
     def _decode_response(
         self,
@@ -507,14 +354,13 @@ class Subspace(c.Module):
         block_hash: str,
     ) -> dict[str, dict[Any, Any]]:
         """
-        Decodes a response from the substrate interface and organizes the data into a dictionary.
+        Decodes a response from the substrate interface and organizes the data into a dictionary,
+        a page at a time with numpy when the key and value layouts are fixed (see engine.fast_decode).
 
         Args:
             response: A list of encoded responses from a substrate query.
             function_parameters: A list of tuples containing the parameters for each storage function.
-            last_keys: A list of the last keys used in the substrate query.
             prefix_list: A list of prefixes used in the substrate query.
-            substrate: An instance of the SubstrateInterface class.
             block_hash: The hash of the block to be queried.
 
         Returns:
@@ -522,102 +368,18 @@ class Subspace(c.Module):
             This inner dictionary's key is the decoded key from the response and the value is the corresponding decoded value.
 
         Raises:
-            ValueError: If an unsupported hash type is encountered in the `concat_hash_len` function.
+            ValueError: If an unsupported hash type is encountered.
 
         Example:
             >>> _decode_response(
                     response=[...],
                     function_parameters=[...],
-                    last_keys=[...],
                     prefix_list=[...],
-                    substrate=substrate_instance,
                     block_hash="0x123..."
                 )
             {'storage_function_name': {decoded_key: decoded_value, ...}, ...}
         """
-
-        def get_item_key_value(item_key: tuple[Any, ...]) -> tuple[Any, ...]:
-            if isinstance(item_key, tuple):
-                return tuple(k.value for k in item_key)
-            return item_key.value
-
-        def concat_hash_len(key_hasher: str) -> int:
-            """
-            Determines the length of the hash based on the given key hasher type.
-
-            Args:
-                key_hasher: The type of key hasher.
-
-            Returns:
-                The length of the hash corresponding to the given key hasher type.
-
-            Raises:
-                ValueError: If the key hasher type is not supported.
-
-            Example:
-                >>> concat_hash_len("Blake2_128Concat")
-                16
-            """
-
-            if key_hasher == "Blake2_128Concat":
-                return 16
-            elif key_hasher == "Twox64Concat":
-                return 8
-            elif key_hasher == "Identity":
-                return 0
-            else:
-                raise ValueError("Unsupported hash type")
-
-        assert len(response) == len(function_parameters) == len(prefix_list)
-        result_dict: dict[str, dict[Any, Any]] = {}
-        for res, fun_params_tuple, prefix in zip(
-            response, function_parameters, prefix_list
-        ):
-            if not res:
-                continue
-            res = res[0]
-            changes = res["changes"]  # type: ignore
-            value_type, param_types, key_hashers, params, storage_function = (
-                fun_params_tuple
-            )
-            with self.get_conn(init=True) as substrate:
-                for item in changes:
-                    # Determine type string
-                    key_type_string: list[Any] = []
-                    for n in range(len(params), len(param_types)):
-                        key_type_string.append(
-                            f"[u8; {concat_hash_len(key_hashers[n])}]"
-                        )
-                        key_type_string.append(param_types[n])
-
-                    item_key_obj = substrate.decode_scale(  # type: ignore
-                        type_string=f"({', '.join(key_type_string)})",
-                        scale_bytes="0x" + item[0][len(prefix):],
-                        return_scale_obj=True,
-                        block_hash=block_hash,
-                    )
-                    # strip key_hashers to use as item key
-                    if len(param_types) - len(params) == 1:
-                        item_key = item_key_obj.value_object[1]  # type: ignore
-                    else:
-                        item_key = tuple(  # type: ignore
-                            item_key_obj.value_object[key + 1]  # type: ignore
-                            for key in range(  # type: ignore
-                                len(params), len(param_types) + 1, 2
-                            )
-                        )
-
-                    item_value = substrate.decode_scale(  # type: ignore
-                        type_string=value_type,
-                        scale_bytes=item[1],
-                        return_scale_obj=True,
-                        block_hash=block_hash,
-                    )
-                    result_dict.setdefault(storage_function, {})
-                    key = get_item_key_value(item_key)  # type: ignore
-                    result_dict[storage_function][key] = item_value.value  # type: ignore
-
-        return result_dict
+        return self.engine.decode_response(response, function_parameters, prefix_list, block_hash)
 
     def query_batch(
         self, functions: dict[str, list[tuple[str, list[Any]]]],
@@ -708,25 +470,27 @@ class Subspace(c.Module):
                     d[k] = v  # type: ignore
             return d  # type: ignore
 
-        def get_page():
+        def send_keys(storage, queries):
             send, prefix_list = self.get_storage_keys(storage, queries, block_hash)
             with self.get_conn(init=True) as substrate:
                 function_parameters = self.get_lists(storage, queries, substrate)
-            responses = self.rpc_request_batch(send)
-            # assumption because send is just the storage_function keys
-            # so it should always be really small regardless of the amount of queries
-            assert len(responses) == 1
-            res = responses[0]
+            # send is just the storage_function keys so it is one small batch
+            return self.rpc.submit(send), prefix_list, function_parameters
+
+        def send_page(key_futures, prefix_list, function_parameters):
+            res = self.rpc.gather(key_futures)
             built_payload: list[tuple[str, list[Any]]] = []
             for result_keys in res:
                 built_payload.append(("state_queryStorageAt", [result_keys, block_hash]))
             _, chunks_info = self._make_request_smaller(built_payload, prefix_list, function_parameters)
-            chunks_response, chunks_info = self.rpc_request_batch_chunked(chunks_info)
-            return chunks_response, chunks_info
+            return self.rpc_submit_batch_chunked(chunks_info)
         
         block_hash = block_hash or self.block_hash() 
-        for storage, queries in functions.items():
-            chunks, chunks_info = get_page()
+        # pipeline every storage: all key listings are in flight at once, then all pages
+        key_requests = [send_keys(storage, queries) for storage, queries in functions.items()]
+        pages = [send_page(*key_request) for key_request in key_requests]
+        for chunk_futures, chunks_info in pages:
+            chunks = [self.rpc.gather(futures) for futures in chunk_futures]
             # if this doesn't happen something is wrong on the code
             # and we won't be able to decode the data properly
             assert len(chunks) == len(chunks_info)
@@ -752,9 +516,46 @@ class Subspace(c.Module):
             block_number = substrate.get_block_number()
         return block_number
     
-    def runtime_spec_version(self):
-        # Get the runtime version
-        return self.query(name='SpecVersionRuntimeVersion', module='System')
+    def runtime_spec_version(self, update=True):
+        # Get the runtime version, a change invalidates the runtime cache
+        with self.get_conn() as substrate:
+            return self.runtime.check(substrate, update=update)
+
+    def benchmark_runtime(self, n=10):
+        """
+        per query overhead of conn.init_runtime() (what get_conn(init=True) used to do)
+        against the shared runtime cache, point url at a local node
+        (e.g. ws://127.0.0.1:9944) so network latency does not hide the difference
+        """
+        results = {}
+        with self.get_conn() as substrate:
+            t0 = c.time()
+            fresh = SubstrateInterface(self.url, ws_options=self.ws_options)
+            fresh.init_runtime()
+            results['cold_init_runtime'] = c.time() - t0
+            fresh.close()
+            # a private runtime config so init_runtime does not rebuild the shared one
+            substrate.runtime_config = RuntimeConfigurationObject()
+            substrate.runtime_version = None
+            t0 = c.time()
+            for _ in range(n):
+                substrate.block_hash = None
+                substrate.init_runtime()
+            results['init_runtime'] = (c.time() - t0) / n
+            # a cold start from the on disk snapshot
+            self.runtime.apply(substrate)
+            t0 = c.time()
+            RuntimeCache(path=self.runtime.path).apply(substrate)
+            results['cold_snapshot'] = c.time() - t0
+            self.runtime.apply(substrate)
+        t0 = c.time()
+        for _ in range(n):
+            with self.get_conn(init=True):
+                pass
+        results['cached'] = (c.time() - t0) / n
+        results['speedup'] = results['init_runtime'] / max(results['cached'], 1e-9)
+        results['stats'] = dict(self.runtime.stats)
+        return results
 
     def query(
         self,
@@ -834,6 +635,110 @@ class Subspace(c.Module):
 
         return self.process_results(result)
 
+    def decode_storage(
+        self,
+        fun_params: tuple[Any, Any, Any, Any, str],
+        prefix: str,
+        items: list[tuple[str, str]],
+        block_hash: str,
+    ) -> list[tuple[Any, Any]]:
+        """
+        Decodes raw (storage key, SCALE value) items of one storage function into
+        (item key, value) pairs in the same order, the item key is None for a
+        storage value or a map entry addressed by all of its params.
+        """
+        if not items:
+            return []
+        value_type, param_types, _, params, storage_function = fun_params
+        if len(params) == len(param_types):
+            with self.get_conn(init=True) as substrate:
+                return [(None, substrate.decode_scale(value_type, value, block_hash=block_hash)) for _, value in items]
+        response = [[{"block": block_hash, "changes": [list(item) for item in items]}]]
+        decoded = self._decode_response(response, [fun_params], [prefix], block_hash)
+        return list(decoded.get(storage_function, {}).items())
+
+    def sync_state(
+        self,
+        name: str,
+        queries: dict[str, tuple[str, str, list[Any]]],
+        block_hash: str = None,
+        max_age: int = None,
+        update: bool = False,
+        chunk_size: int = 35000,
+    ) -> dict[str, Any]:
+        """
+        Block pinned snapshot of storage maps and values.
+
+        Every feature ({feature: (module, storage_function, params)}) is read at one
+        block hash, so they are consistent with each other. The snapshot is stored
+        as columns of raw keys/values next to their decoded form, and a refresh
+        only decodes the entries whose SCALE bytes changed since the last snapshot
+        (decoding is most of the cost of a full refresh). All key listings, then all
+        values, are pipelined over the multiplexed connections.
+
+        Returns:
+            {feature: {item key: value}} for maps, {feature: value} when the params
+            address a single entry.
+        """
+        path = self.resolve_path(f'{self.network}/state/{name}')
+        snapshot = c.get(path, None, max_age=max_age, update=update)
+        if snapshot != None and block_hash in [None, snapshot['block_hash']] and set(queries) <= set(snapshot['features']):
+            return self.snapshot2state(snapshot, queries)
+        # a stale snapshot is the base of the delta
+        base = c.get(path, None) or {'features': {}}
+        block_hash = block_hash or self.block_hash()
+        prefixes: dict[str, str] = {}
+        fun_params: dict[str, tuple[Any, Any, Any, Any, str]] = {}
+        with self.get_conn(init=True) as substrate:
+            for feature, (module, storage, params) in queries.items():
+                prefixes[feature] = StorageKey.create_from_storage_function(  # type: ignore
+                    module, storage, params, runtime_config=substrate.runtime_config, metadata=substrate.metadata  # type: ignore
+                ).to_hex()
+                fun_params[feature] = self.get_lists(module, [(storage, params)], substrate)[0]
+        key_futures = {f: self.rpc.submit([("state_getKeys", [prefixes[f], block_hash])]) for f in queries}
+        feature2keys = {f: self.rpc.gather(futures)[0] for f, futures in key_futures.items()}
+        value_futures = {
+            f: [self.rpc.submit([("state_queryStorageAt", [keys[i:i + chunk_size], block_hash])]) for i in range(0, len(keys), chunk_size)]
+            for f, keys in feature2keys.items()
+        }
+        snapshot = {'block_hash': block_hash, 'features': {}, 'stats': {'decoded': 0, 'reused': 0}}
+        for feature, futures in value_futures.items():
+            key2value = {}
+            for future in futures:
+                for change_set in self.rpc.gather(future)[0]:
+                    key2value.update({k: v for k, v in change_set["changes"] if v is not None})
+            prefix = prefixes[feature]
+            # keys are stored without the prefix they all share
+            old = base['features'].get(feature, {}) if base['features'].get(feature, {}).get('prefix') == prefix else {}
+            old_entries = dict(zip(old.get('keys', []), zip(old.get('values', []), old.get('ids', []), old.get('decoded', []))))
+            keys = [k for k in feature2keys[feature] if k in key2value]
+            changed = [k for k in keys if old_entries.get(k[len(prefix):], (None,))[0] != key2value[k]]
+            decoded = dict(zip(changed, self.decode_storage(fun_params[feature], prefix, [(k, key2value[k]) for k in changed], block_hash)))
+            column = {'prefix': prefix, 'single': len(fun_params[feature][3]) == len(fun_params[feature][1]), 'keys': [], 'values': [], 'ids': [], 'decoded': []}
+            for k in keys:
+                item_id, value = decoded[k] if k in decoded else old_entries[k[len(prefix):]][1:]
+                column['keys'].append(k[len(prefix):])
+                column['values'].append(key2value[k])
+                column['ids'].append(list(item_id) if isinstance(item_id, tuple) else item_id)
+                column['decoded'].append(value)
+            snapshot['features'][feature] = column
+            snapshot['stats']['decoded'] += len(decoded)
+            snapshot['stats']['reused'] += len(keys) - len(decoded)
+        c.print(f'SUBSPACE_SYNC(name={name}, block_hash={block_hash}, {snapshot["stats"]})')
+        c.put(path, snapshot)
+        return self.snapshot2state(snapshot, queries)
+
+    def snapshot2state(self, snapshot: dict, features) -> dict[str, Any]:
+        state = {}
+        for feature in features:
+            column = snapshot['features'][feature]
+            if column['single']:
+                state[feature] = column['decoded'][0] if column['decoded'] else None
+            else:
+                ids = [tuple(i) if isinstance(i, list) else i for i in column['ids']]
+                state[feature] = self.process_results(dict(zip(ids, column['decoded'])))
+        return state
+
     def process_results(self, x:dict) -> dict:
         new_x = {}
         for k in list(x.keys()):
@@ -1134,10 +1039,12 @@ class Subspace(c.Module):
     def get_stake(self, key=None):
         return sum(list(self.get_stake_from(key).values()))
     
-    def my_tokens(self, min_value=0):
-        my_stake = self.my_stake()
-        my_balance = self.my_balance()
-        my_tokens =  {k:my_stake.get(k,0) + my_balance.get(k,0) for k in set(my_stake)}
+    def my_tokens(self, min_value=0, max_age=60, update=False):
+        # balance and stake of every local key from one account state pass
+        states = self.account_states(max_age=max_age, update=update)
+        address2key = c.address2key()
+        my_tokens = {address2key.get(a, a): self.format_amount(balance + sum(stake_to.values()), fmt='j')
+                     for a, balance, stake_to in zip(states['address'], states['balance'], states['stake_to'])}
         return dict(sorted({k:v for k,v in my_tokens.items() if v > min_value}.items(), key=lambda x: x[1], reverse=True))
         
     def my_total(self):
@@ -2013,42 +1920,113 @@ class Subspace(c.Module):
             balances =  substrate.query_multi(storage_keys, block_hash=block_hash)
         return balances
     
-    def my_balance(self, batch_size=128, timeout=120, max_age=6000, update=False, num_connections=10):
-        path = self.resolve_path(f'{self.network}/my_balance')
-        balances = c.get(path, None, update=update, max_age=max_age)
-        if balances == None:
-
-            key2address = c.key2address()
-            addresses = list(key2address.values())
-            batched_addresses = [addresses[i:i + batch_size] for i in range(0, len(addresses), batch_size)]
-            hash2batch = {}
-            future2hash = {}
-            n = len(addresses)
-            print(f'Getting baances for {n } addresses in {len(batched_addresses)} batches')
-            for batch in batched_addresses:
-                batch_hash : str = c.hash(batch)
-                hash2batch[batch_hash] = batch
-                f =  c.submit(self.get_balances, dict(key_addresses=batch), timeout=timeout)
-                future2hash[f] = batch_hash
-            balances = {}
-            progress_bar = c.tqdm(total=n, desc='Getting Balances')
-            for f in c.as_completed(future2hash.keys(), timeout=timeout):
-                try:
-                    batch_hash = future2hash[f]
-                    balances_batch = f.result()
-                    addresses_batch = hash2batch[batch_hash]
-                    for address, balance in zip(addresses_batch, balances_batch):
-                        balances[address] = balance[1].value['data']['free']
-                        progress_bar.update(1)
-                        # c.print(f'Balance for {address}: {balance} ({counter}/{len(addresses)})')
-                except Exception as e:
-                    print(e)
-            address2key = c.address2key()
-            balances = {address2key.get(k, k):v for k,v in balances.items()}
-            c.put(path, balances)    
-        balances = {k: v for k, v in balances.items() if v > 0}
+    def account_states(
+        self,
+        addresses: list[str] = None,
+        block_hash: str = None,
+        max_age: int = 60,
+        update: bool = False,
+        chunk_size: int = 35000,
+        batch_size: int = 1000,
+    ) -> AccountStates:
+        """
+        Balance, stake to and stake from of many addresses (the local keys by default),
+        as columns with one row per address.
+
+        Entries are cached per address, so only the addresses that are new, older than
+        max_age or read at another block than block_hash are fetched, all of them at
+        one pinned block (see fetch_account_states).
+        """
+        addresses = addresses or list(c.key2address().values())
+        addresses = [a for a in addresses if not a.startswith('0x')]
+        path = self.resolve_path(f'{self.network}/account_states')
+        address2state = c.get(path, {})
+        now = c.time()
+        missing = [a for a in addresses if update
+                   or a not in address2state
+                   or now - address2state[a]['time'] > max_age
+                   or block_hash not in [None, address2state[a]['block_hash']]]
+        if missing:
+            address2state.update(self.fetch_account_states(missing, block_hash=block_hash, chunk_size=chunk_size, batch_size=batch_size))
+            c.put(path, address2state)
+        rows = [address2state[a] for a in addresses]
+        return {
+            'address': addresses,
+            'block_hash': [row['block_hash'] for row in rows],
+            'balance': [row['balance'] for row in rows],
+            'stake_to': [row['stake_to'] for row in rows],
+            'stake_from': [row['stake_from'] for row in rows],
+        }
+
+    def fetch_account_states(
+        self,
+        addresses: list[str],
+        block_hash: str = None,
+        chunk_size: int = 35000,
+        batch_size: int = 1000,
+    ) -> dict[str, dict[str, Any]]:
+        """
+        {address: {balance, stake_to, stake_from, block_hash, time}} read at one block.
+
+        System.Account values are read by their full keys, the StakeTo/StakeFrom entries
+        of every address are listed with state_getKeys (batch_size requests per frame)
+        and then read with state_queryStorageAt (chunk_size keys per request). Every
+        round of requests is in flight at once over the multiplexed connections and each
+        storage is decoded as one page.
+        """
+        block_hash = block_hash or self.block_hash()
+        stake_storages = {'stake_to': 'StakeTo', 'stake_from': 'StakeFrom'}
+        with self.get_conn(init=True) as substrate:
+            def storage_key(module, storage, params):
+                return StorageKey.create_from_storage_function(  # type: ignore
+                    module, storage, params, runtime_config=substrate.runtime_config, metadata=substrate.metadata  # type: ignore
+                ).to_hex()
+            prefixes = {'balance': storage_key('System', 'Account', [])}
+            fun_params = {'balance': self.get_lists('System', [('Account', [])], substrate)[0]}
+            feature2keys = {'balance': [storage_key('System', 'Account', [a]) for a in addresses]}
+            address_prefixes = {}
+            for feature, storage in stake_storages.items():
+                prefixes[feature] = storage_key('SubspaceModule', storage, [])
+                fun_params[feature] = self.get_lists('SubspaceModule', [(storage, [])], substrate)[0]
+                address_prefixes[feature] = [storage_key('SubspaceModule', storage, [a]) for a in addresses]
+        # list the stake entries of every address
+        key_futures = {
+            feature: [self.rpc.submit([("state_getKeys", [p, block_hash]) for p in ps[i:i + batch_size]]) for i in range(0, len(ps), batch_size)]
+            for feature, ps in address_prefixes.items()
+        }
+        for feature, futures in key_futures.items():
+            feature2keys[feature] = [k for f in futures for keys in self.rpc.gather(f) for k in keys]
+        # read every value
+        value_futures = {
+            feature: [self.rpc.submit([("state_queryStorageAt", [keys[i:i + chunk_size], block_hash])]) for i in range(0, len(keys), chunk_size)]
+            for feature, keys in feature2keys.items()
+        }
+        feature2values = {}
+        for feature, futures in value_futures.items():
+            changes = [change for f in futures for change_set in self.rpc.gather(f)[0] for change in change_set["changes"] if change[1] is not None]
+            response = [[{"block": block_hash, "changes": changes}]] if changes else [[]]
+            decoded = self._decode_response(response, [fun_params[feature]], [prefixes[feature]], block_hash)
+            feature2values[feature] = decoded.get(fun_params[feature][4], {})
+        now = c.time()
+        address2state = {a: {'balance': 0, 'stake_to': {}, 'stake_from': {}, 'block_hash': block_hash, 'time': now} for a in addresses}
+        for address, account in feature2values['balance'].items():
+            if address in address2state:
+                address2state[address]['balance'] = account['data']['free']
+        for feature in stake_storages:
+            for (address, other), amount in feature2values[feature].items():
+                if address in address2state:
+                    address2state[address][feature][other] = amount
+        return address2state
+
+    def my_balance(self, max_age=6000, update=False, fmt='j'):
+        """
+        Free balance of every local key with a positive balance, by key name.
+        """
+        states = self.account_states(max_age=max_age, update=update)
+        address2key = c.address2key()
+        balances = {address2key.get(a, a): b for a, b in zip(states['address'], states['balance']) if b > 0}
         balances = dict(sorted(balances.items(), key=lambda x: x[1], reverse=True))
-        return self.format_amount(balances, fmt='j')
+        return self.format_amount(balances, fmt=fmt)
     
     def balances(self, *args, **kwargs):  
         return self.my_balance(*args, **kwargs)
@@ -2312,8 +2290,7 @@ class Subspace(c.Module):
         if results == None:
             c.print(f"SUBSPACE_UPDATE(params)")
             params = []
-            bulk_query = self.query_batch_map(
-                {
+            module2storages = {
                     "SubspaceModule": [
                         ("ImmunityPeriod", params),
                         ("MinAllowedWeights", params),
@@ -2339,9 +2316,10 @@ class Subspace(c.Module):
                         ("SubnetEmission", params),
                     ],
 
-                },
-                block_hash,
-            )
+                }
+            # pinned to one block, only the entries that changed since the last refresh are decoded
+            queries = {name: (module, name, params) for module, storages in module2storages.items() for name, params in storages}
+            bulk_query = self.sync_state('params', queries, block_hash=block_hash, update=True)
 
         
             subnet_maps: SubnetParamsMaps = {
@@ -2605,26 +2583,14 @@ class Subspace(c.Module):
                     df = False,
                     **kwargs):
         subnet = self.resolve_subnet(subnet)
-        subnet_path = self.resolve_path(f'{self.network}/modules/{subnet}')
-        feature2path = {f:subnet_path + '/' + f for f in features}
-        future2feature = {}
         params = [subnet] if subnet != None else []
-        results  = {}
+        queries = {}
         for feature in features:
-            results[feature] = c.get(feature2path[feature], None, max_age=max_age, update=update)
-            if results[feature] == None:
-                storage_name = self.name2storage(feature)
-                params = [] if feature in ['stake_from'] else ([subnet] if subnet != None else []) 
-                fn_obj = self.query if bool(feature in ['incentive', 'dividends', 'emission']) else  self.query_map 
-                future = c.submit(fn_obj, kwargs=dict(name=storage_name, params=params), timeout=timeout)
-                future2feature[future] = feature
-        
-        progress = c.tqdm(total=len(future2feature))
-        for future in c.as_completed(future2feature, timeout=timeout):
-            feature = future2feature.pop(future)
-            results[feature] = future.result()
-            c.put(feature2path[feature], results[feature])
-            progress.update(1)
+            storage_name = self.name2storage(feature)
+            feature_module = 'SubnetEmissionModule' if storage_name == 'Weights' else module
+            queries[feature] = (feature_module, storage_name, [] if feature in ['stake_from'] else params)
+        # every feature is read at the same block, unchanged entries are not decoded again
+        results = self.sync_state(f'modules/{subnet}', queries, max_age=max_age, update=update)
 
         # process
         results = self.process_results(results)
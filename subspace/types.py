@@ -197,6 +197,22 @@ class ModuleInfoWithOptionalBalance(ModuleInfo):
     balance: int 
 
 
+class AccountStates(TypedDict):
+    """Account state of many addresses as columns, row i is address[i].
+
+    Amounts are in nanotokens.
+    """
+    address: list[Ss58Address]
+    block_hash: list[str]
+    """Block the row was read at, rows fetched together share it."""
+    balance: list[int]
+    """Free balance."""
+    stake_to: list[dict[Ss58Address, int]]
+    """Stake of the address on each module it staked to."""
+    stake_from: list[dict[Ss58Address, int]]
+    """Stake on the address from each of its stakers."""
+
+
 class ChainTransactionError(Exception):
     """Error for any chain transaction related errors."""
 
@@ -15,4 +15,7 @@ import importlib.metadata
 if not __package__:
     __version__ = "0.0.0"
 else:
-    __version__ = importlib.metadata.version(__package__)
+    try:
+        __version__ = importlib.metadata.version(__package__)
+    except importlib.metadata.PackageNotFoundError:  # imported from the source tree
+        __version__ = "0.0.0"
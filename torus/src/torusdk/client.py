@@ -1,20 +1,15 @@
-import gc
-import json
-import queue
-import threading
-from concurrent.futures import Future, ThreadPoolExecutor
+import os
 from contextlib import contextmanager
-from copy import deepcopy
-from dataclasses import dataclass
-from time import sleep
 from typing import Any, Mapping, TypeVar
+from urllib.parse import urlparse
 
 import websocket
 from torustrateinterface import ExtrinsicReceipt, Keypair, SubstrateInterface
 from torustrateinterface.storage import StorageKey
 
 from torusdk._common import transform_stake_dmap
-from torusdk.errors import ChainTransactionError, NetworkQueryError
+from torusdk.engine import ChainEngine, Chunk, make_request_smaller
+from torusdk.errors import ChainTransactionError
 from torusdk.types.proposal import Emission
 from torusdk.types.types import (
     Agent,
@@ -25,57 +20,24 @@ from torusdk.types.types import (
 
 # TODO: InsufficientBalanceError, MismatchedLengthError etc
 
-MAX_REQUEST_SIZE = 9_000_000
-
-
-@dataclass
-class ConnectionContainer:
-    substrate: SubstrateInterface
-    stop_event: threading.Event
-    lock: threading.Lock
-
-
-@dataclass
-class Chunk:
-    batch_requests: list[tuple[Any, Any]]
-    prefix_list: list[list[str]]
-    fun_params: list[tuple[Any, Any, Any, Any, str]]
-
+RUNTIME_SNAPSHOT_HOME = "~/.torus/runtime"
 
 T1 = TypeVar("T1")
 T2 = TypeVar("T2")
 
 
-def send_heartbeat(
-    si: SubstrateInterface,
-    stop: threading.Event,
-    lock: threading.Lock,
-):
-    while not stop.is_set():
-        # uses torustrateinterface wrapper because its very stateful
-        # and we could mess with something by directly using the websocket
-        with lock:
-            _ = si.websocket.pong(b"")  # type: ignore
-        sleep(11)  # Send heartbeat every 30 seconds
-
-
 def _instantiate_substrateinterface(
-    url: str, ws_options: dict[str, bool | int], lock: threading.Lock
-):
+    url: str, ws_options: dict[str, Any]
+) -> SubstrateInterface:
     ws = websocket.WebSocket()
     ws.connect(url)  # type: ignore
-    stop_event = threading.Event()
-    si = SubstrateInterface(websocket=ws, ws_options=ws_options)
-    heartbeat_thread = threading.Thread(
-        target=send_heartbeat, args=(si, stop_event, lock), daemon=True
-    )
-    heartbeat_thread.start()
+    return SubstrateInterface(websocket=ws, ws_options=ws_options)
+
 
-    return ConnectionContainer(
-        si,
-        stop_event,
-        lock,
-    )
+def _runtime_snapshot_path(url: str) -> str:
+    """Directory of the runtime metadata snapshots of the node at `url`."""
+    node = urlparse(url).netloc.replace(":", "_") or "default"
+    return os.path.join(os.path.expanduser(RUNTIME_SNAPSHOT_HOME), node)
 
 
 class TorusClient:
@@ -99,7 +61,7 @@ class TorusClient:
 
     wait_for_finalization: bool
     _num_connections: int
-    _connection_queue: queue.Queue[ConnectionContainer]
+    _engine: ChainEngine
     _ws_options: dict[str, int]
     url: str
 
@@ -114,23 +76,25 @@ class TorusClient:
         Args:
             url: The URL of the network node to connect to.
             num_connections: The number of websocket connections to be opened.
+
+        Clients of the same node share one `ChainEngine`, so its connection
+        pool and runtime metadata are only set up once per process.
         """
         assert num_connections > 0
         self._num_connections = num_connections
         self.wait_for_finalization = wait_for_finalization
-        self._connection_queue = queue.Queue(num_connections)
         self.url = url
-
-        for _ in range(num_connections):
-            ws_options: dict[str, int] = {}
-            if timeout is not None:
-                ws_options["timeout"] = timeout
-            self._ws_options = ws_options
-            self._connection_queue.put(
-                _instantiate_substrateinterface(
-                    url, ws_options, threading.Lock()
-                )
-            )
+        ws_options: dict[str, int] = {}
+        if timeout is not None:
+            ws_options["timeout"] = timeout
+        self._ws_options = ws_options
+        self._engine = ChainEngine.get(
+            url,
+            _instantiate_substrateinterface,
+            num_connections=num_connections,
+            ws_options=ws_options,
+            runtime_path=_runtime_snapshot_path(url),
+        )
 
     @property
     def connections(self) -> int:
@@ -145,12 +109,15 @@ class TorusClient:
         """
         Context manager to get a connection from the pool.
 
-        Tries to get a connection from the pool queue. If the queue is empty,
-        it blocks for `timeout` seconds until a connection is available. If
-        `timeout` is None, it blocks indefinitely.
+        Takes an idle connection from the engine pool, opening one if the
+        pool is not full yet and reconnecting it if the node dropped it. If
+        none is available it blocks for `timeout` seconds, or indefinitely
+        if `timeout` is None.
 
         Args:
             timeout: The maximum time in seconds to wait for a connection.
+            init: Whether to point the connection at the cached runtime
+              metadata of the current spec version.
 
         Yields:
             The connection object from the pool.
@@ -159,24 +126,8 @@ class TorusClient:
             QueueEmptyError: If no connection is available within the timeout
               period.
         """
-        conn = self._connection_queue.get(timeout=timeout)
-        if init:
-            conn.substrate.init_runtime()  # type: ignore
-        try:
-            gc.collect()
-            if conn.substrate.websocket and conn.substrate.websocket.connected:  # type: ignore
-                with conn.lock:
-                    yield conn.substrate
-            else:
-                # reconnects
-                conn.stop_event.set()
-                conn = _instantiate_substrateinterface(
-                    self.url, self._ws_options, threading.Lock()
-                )
-                with conn.lock:
-                    yield conn.substrate
-        finally:
-            self._connection_queue.put(conn)
+        with self._engine.connection(timeout=timeout, init=init) as substrate:
+            yield substrate
 
     def _get_storage_keys(
         self,
@@ -256,59 +207,25 @@ class TorusClient:
     def _send_batch(
         self,
         batch_payload: list[Any],
-        request_ids: list[int],
+        request_ids: list[int] | None = None,
         extract_result: bool = True,
     ):
         """
         Sends a batch of requests to the substrate and collects the results.
 
         Args:
-            substrate: An instance of the substrate interface.
             batch_payload: The payload of the batch request.
-            request_ids: A list of request IDs for tracking responses.
-            results: A list to store the results of the requests.
+            request_ids: Unused, ids are assigned by the engine transport.
             extract_result: Whether to extract the result from the response.
 
         Raises:
             NetworkQueryError: If there is an `error` in the response message.
-
-        Note:
-            No explicit return value as results are appended to the provided 'results' list.
         """
-        results: list[str | dict[Any, Any]] = []
-        with self.get_conn(init=True) as substrate:
-            try:
-                substrate.websocket.send(  #  type: ignore
-                    json.dumps(batch_payload)
-                )
-            except NetworkQueryError:
-                pass
-            while len(results) < len(request_ids):
-                received_messages = json.loads(
-                    substrate.websocket.recv()  # type: ignore
-                )
-                if isinstance(received_messages, dict):
-                    received_messages: list[dict[Any, Any]] = [
-                        received_messages
-                    ]
-
-                for message in received_messages:
-                    if message.get("id") in request_ids:
-                        if extract_result:
-                            try:
-                                results.append(message["result"])
-                            except Exception:
-                                raise (
-                                    RuntimeError(
-                                        f"Error extracting result from message: {message}"
-                                    )
-                                )
-                        else:
-                            results.append(message)
-                    if "error" in message:
-                        raise NetworkQueryError(message["error"])
-
-            return results
+        requests = [
+            (p["method"], p["params"]) if isinstance(p, dict) else p
+            for p in batch_payload
+        ]
+        return self._engine.rpc.request(requests, extract_result=extract_result)
 
     def _make_request_smaller(
         self,
@@ -317,74 +234,10 @@ class TorusClient:
         fun_params: list[tuple[Any, Any, Any, Any, str]],
     ) -> tuple[list[list[tuple[T1, T2]]], list[Chunk]]:
         """
-        Splits a batch of requests into smaller batches, each not exceeding the specified maximum size.
-
-        Args:
-            batch_request: A list of requests to be sent in a batch.
-            max_size: Maximum size of each batch in bytes.
-
-        Returns:
-            A list of smaller request batches.
-
-        Example:
-            >>> _make_request_smaller(batch_request=[('method1', 'params1'), ('method2', 'params2')], max_size=1000)
-            [[('method1', 'params1')], [('method2', 'params2')]]
-        """
-        assert len(prefix_list) == len(fun_params) == len(batch_request)
-
-        def estimate_size(request: tuple[T1, T2]):
-            """Convert the batch request to a string and measure its length"""
-            return len(json.dumps(request))
-
-        # Initialize variables
-        result: list[list[tuple[T1, T2]]] = []
-        current_batch = []
-        current_prefix_batch = []
-        current_params_batch = []
-        current_size = 0
-
-        chunk_list: list[Chunk] = []
-
-        # Iterate through each request in the batch
-        for request, prefix, params in zip(
-            batch_request, prefix_list, fun_params
-        ):
-            request_size = estimate_size(request)
-
-            # Check if adding this request exceeds the max size
-            if current_size + request_size > MAX_REQUEST_SIZE:
-                # If so, start a new batch
-
-                # Essentiatly checks that it's not the first iteration
-                if current_batch:
-                    chunk = Chunk(
-                        current_batch,
-                        current_prefix_batch,
-                        current_params_batch,
-                    )
-                    chunk_list.append(chunk)
-                    result.append(current_batch)
-
-                current_batch = [request]
-                current_prefix_batch = [prefix]
-                current_params_batch = [params]
-                current_size = request_size
-            else:
-                # Otherwise, add to the current batch
-                current_batch.append(request)
-                current_size += request_size
-                current_prefix_batch.append(prefix)
-                current_params_batch.append(params)
-
-        # Add the last batch if it's not empty
-        if current_batch:
-            result.append(current_batch)
-            chunk = Chunk(
-                current_batch, current_prefix_batch, current_params_batch
-            )
-            chunk_list.append(chunk)
-
-        return result, chunk_list
+        Splits a batch of requests into smaller batches, each not exceeding
+        the maximum request size, see `torusdk.engine.make_request_smaller`.
+        """
+        return make_request_smaller(batch_request, prefix_list, fun_params)
 
     def _are_changes_equal(self, change_a: Any, change_b: Any):
         for (a, b), (c, d) in zip(change_a, change_b):
@@ -397,137 +250,36 @@ class TorusClient:
         extract_result: bool = True,
     ) -> list[str]:
         """
-        Sends batch requests to the substrate node using multiple threads and collects the results.
+        Sends batch requests to the substrate node and collects the results.
 
         Args:
-            substrate: An instance of the substrate interface.
             batch_requests : A list of requests to be sent in batches.
-            max_size: Maximum size of each batch in bytes.
             extract_result: Whether to extract the result from the response message.
 
         Returns:
             A list of results from the batch requests.
 
         Example:
-            >>> _rpc_request_batch(substrate_instance, [('method1', ['param1']), ('method2', ['param2'])])
-            ['result1', 'result2', ...]
-        """
-
-        chunk_results: list[Any] = []
-        # smaller_requests = self._make_request_smaller(batch_requests)
-        request_id = 0
-        with ThreadPoolExecutor() as executor:
-            futures: list[Future[list[str | dict[Any, Any]]]] = []
-            for chunk in [batch_requests]:
-                request_ids: list[int] = []
-                batch_payload: list[Any] = []
-                for method, params in chunk:
-                    request_id += 1
-                    request_ids.append(request_id)
-                    batch_payload.append(
-                        {
-                            "jsonrpc": "2.0",
-                            "method": method,
-                            "params": params,
-                            "id": request_id,
-                        }
-                    )
-
-                futures.append(
-                    executor.submit(
-                        self._send_batch,
-                        batch_payload=batch_payload,
-                        request_ids=request_ids,
-                        extract_result=extract_result,
-                    )
-                )
-            for future in futures:
-                resul = future.result()
-                chunk_results.append(resul)
-        return chunk_results
+            >>> _rpc_request_batch([('method1', ['param1']), ('method2', ['param2'])])
+            [['result1', 'result2', ...]]
+        """
+        return self._engine.rpc.request_batches(
+            [batch_requests], extract_result=extract_result
+        )
 
     def _rpc_request_batch_chunked(
         self, chunk_requests: list[Chunk], extract_result: bool = True
     ):
         """
-        Sends batch requests to the substrate node using multiple threads and collects the results.
-
-        Args:
-            substrate: An instance of the substrate interface.
-            batch_requests : A list of requests to be sent in batches.
-            max_size: Maximum size of each batch in bytes.
-            extract_result: Whether to extract the result from the response message.
+        Sends chunked batch requests, all in flight at once over the engine
+        transport, and collects the results.
 
         Returns:
-            A list of results from the batch requests.
-
-        Example:
-            >>> _rpc_request_batch(substrate_instance, [('method1', ['param1']), ('method2', ['param2'])])
-            ['result1', 'result2', ...]
-        """
-
-        def split_chunks(
-            chunk: Chunk, chunk_info: list[Chunk], chunk_info_idx: int
-        ):
-            manhattam_chunks: list[tuple[Any, Any]] = []
-            mutaded_chunk_info = deepcopy(chunk_info)
-            max_n_keys = 35000
-            for query in chunk.batch_requests:
-                result_keys = query[1][0]
-                keys_amount = len(result_keys)
-                if keys_amount > max_n_keys:
-                    mutaded_chunk_info.pop(chunk_info_idx)
-                    for i in range(0, keys_amount, max_n_keys):
-                        new_chunk = deepcopy(chunk)
-                        splitted_keys = result_keys[i : i + max_n_keys]
-                        splitted_query = deepcopy(query)
-                        splitted_query[1][0] = splitted_keys
-                        new_chunk.batch_requests = [splitted_query]
-                        manhattam_chunks.append(splitted_query)
-                        mutaded_chunk_info.insert(chunk_info_idx, new_chunk)
-                else:
-                    manhattam_chunks.append(query)
-            return manhattam_chunks, mutaded_chunk_info
-
-        assert len(chunk_requests) > 0
-        mutated_chunk_info: list[Chunk] = []
-        chunk_results: list[Any] = []
-        # smaller_requests = self._make_request_smaller(batch_requests)
-        request_id = 0
-
-        with ThreadPoolExecutor() as executor:
-            futures: list[Future[list[str | dict[Any, Any]]]] = []
-            for idx, macro_chunk in enumerate(chunk_requests):
-                _, mutated_chunk_info = split_chunks(
-                    macro_chunk, chunk_requests, idx
-                )
-            for chunk in mutated_chunk_info:
-                request_ids: list[int] = []
-                batch_payload: list[Any] = []
-                for method, params in chunk.batch_requests:
-                    # for method, params in micro_chunk:
-                    request_id += 1
-                    request_ids.append(request_id)
-                    batch_payload.append(
-                        {
-                            "jsonrpc": "2.0",
-                            "method": method,
-                            "params": params,
-                            "id": request_id,
-                        }
-                    )
-                futures.append(
-                    executor.submit(
-                        self._send_batch,
-                        batch_payload=batch_payload,
-                        request_ids=request_ids,
-                        extract_result=extract_result,
-                    )
-                )
-            for future in futures:
-                resul = future.result()
-                chunk_results.append(resul)
-        return chunk_results, mutated_chunk_info
+            The results per chunk and the chunks as they were sent.
+        """
+        return self._engine.request_chunks(
+            chunk_requests, extract_result=extract_result
+        )
 
     def _decode_response(
         self,
@@ -537,119 +289,13 @@ class TorusClient:
         block_hash: str,
     ) -> dict[str, dict[Any, Any]]:
         """
-        Decodes a response from the substrate interface and organizes the data into a dictionary.
-
-        Args:
-            response: A list of encoded responses from a substrate query.
-            function_parameters: A list of tuples containing the parameters for each storage function.
-            last_keys: A list of the last keys used in the substrate query.
-            prefix_list: A list of prefixes used in the substrate query.
-            substrate: An instance of the SubstrateInterface class.
-            block_hash: The hash of the block to be queried.
-
-        Returns:
-            A dictionary where each key is a storage function name and the value is another dictionary.
-            This inner dictionary's key is the decoded key from the response and the value is the corresponding decoded value.
-
-        Raises:
-            ValueError: If an unsupported hash type is encountered in the `concat_hash_len` function.
-
-        Example:
-            >>> _decode_response(
-                    response=[...],
-                    function_parameters=[...],
-                    last_keys=[...],
-                    prefix_list=[...],
-                    substrate=substrate_instance,
-                    block_hash="0x123..."
-                )
-            {'storage_function_name': {decoded_key: decoded_value, ...}, ...}
+        Decodes a response from the substrate interface and organizes the
+        data into {storage function: {item key: value}}, see
+        `torusdk.engine.ChainEngine.decode_response`.
         """
-
-        def get_item_key_value(
-            item_key: tuple[Any, ...] | Any,
-        ) -> tuple[Any, ...] | Any:
-            if isinstance(item_key, tuple):
-                return tuple(k.value for k in item_key)  # type: ignore
-            return item_key.value
-
-        def concat_hash_len(key_hasher: str) -> int:
-            """
-            Determines the length of the hash based on the given key hasher type.
-
-            Args:
-                key_hasher: The type of key hasher.
-
-            Returns:
-                The length of the hash corresponding to the given key hasher type.
-
-            Raises:
-                ValueError: If the key hasher type is not supported.
-
-            Example:
-                >>> concat_hash_len("Blake2_128Concat")
-                16
-            """
-
-            if key_hasher == "Blake2_128Concat":
-                return 16
-            elif key_hasher == "Twox64Concat":
-                return 8
-            elif key_hasher == "Identity":
-                return 0
-            else:
-                raise ValueError("Unsupported hash type")
-
-        assert len(response) == len(function_parameters) == len(prefix_list)
-        result_dict: dict[str, dict[Any, Any]] = {}
-        for res, fun_params_tuple, prefix in zip(
-            response, function_parameters, prefix_list
-        ):
-            if not res:
-                continue
-            res = res[0]
-            changes = res["changes"]  # type: ignore
-            value_type, param_types, key_hashers, params, storage_function = (
-                fun_params_tuple
-            )
-            with self.get_conn(init=True) as substrate:
-                for item in changes:
-                    # Determine type string
-                    key_type_string: list[Any] = []
-                    for n in range(len(params), len(param_types)):
-                        key_type_string.append(
-                            f"[u8; {concat_hash_len(key_hashers[n])}]"
-                        )
-                        key_type_string.append(param_types[n])
-
-                    item_key_obj = substrate.decode_scale(  # type: ignore
-                        type_string=f"({', '.join(key_type_string)})",
-                        scale_bytes="0x" + item[0][len(prefix) :],
-                        return_scale_obj=True,
-                        block_hash=block_hash,
-                    )
-                    # strip key_hashers to use as item key
-                    if len(param_types) - len(params) == 1:
-                        item_key = item_key_obj.value_object[1]  # type: ignore
-                    else:
-                        item_key = tuple(  # type: ignore
-                            item_key_obj.value_object[key + 1]  # type: ignore
-                            for key in range(  # type: ignore
-                                len(params), len(param_types) + 1, 2
-                            )
-                        )
-
-                    item_value = substrate.decode_scale(  # type: ignore
-                        type_string=value_type,
-                        scale_bytes=item[1],
-                        return_scale_obj=True,
-                        block_hash=block_hash,
-                    )
-                    result_dict.setdefault(storage_function, {})
-                    key = get_item_key_value(item_key)  # type: ignore
-                    result_dict[storage_function][key] = item_value.value  # type: ignore
-
-        return result_dict
+        return self._engine.decode_response(
+            response, function_parameters, prefix_list, block_hash
+        )
 
     def query_batch(
         self, functions: dict[str, list[tuple[str, list[Any]]]]
@@ -0,0 +1,360 @@
+"""
+Vectorised decoding of fixed layout `query_map` pages.
+
+Storage whose keys and values are made of u8..u128, bool, AccountId, [u8; N],
+tuples of those or a Vec of any of them is decoded a whole page at a time with
+numpy instead of one scalecodec object per key and value. Used by
+`torusdk.engine`, commune's `subspace` vendors a copy as `subspace.decoder`.
+"""
+
+import json
+import random
+import time
+from typing import Any
+
+from scalecodec.utils.ss58 import ss58_encode
+
+try:
+    import numpy as np
+except ImportError:  # no fast path, everything goes through scalecodec
+    np = None  # type: ignore
+
+HASHER_LEN = {"Blake2_128Concat": 16, "Twox64Concat": 8, "Identity": 0}
+PRIMITIVES = {
+    "U8": "<u1",
+    "U16": "<u2",
+    "U32": "<u4",
+    "U64": "<u8",
+    "U128": "V16",
+    "Bool": "?",
+}
+
+Layout = tuple[Any, ...]
+
+
+def compact_length(data: bytes) -> tuple[int | None, int]:
+    """
+    Returns the value and the number of bytes used by the SCALE compact at
+    the start of `data`.
+    """
+    if not data:
+        return None, 0
+    mode = data[0] & 3
+    if mode == 0:
+        return data[0] >> 2, 1
+    if mode == 1:
+        return int.from_bytes(data[:2], "little") >> 2, 2
+    if mode == 2:
+        return int.from_bytes(data[:4], "little") >> 2, 4
+    size = (data[0] >> 2) + 4
+    return int.from_bytes(data[1 : 1 + size], "little"), 1 + size
+
+
+def encode_compact(n: int) -> bytes:
+    """Encodes `n` as a SCALE compact."""
+    if n < 1 << 6:
+        return bytes([n << 2])
+    if n < 1 << 14:
+        return ((n << 2) | 1).to_bytes(2, "little")
+    if n < 1 << 30:
+        return ((n << 2) | 2).to_bytes(4, "little")
+    size = (n.bit_length() + 7) // 8
+    return bytes([((size - 4) << 2) | 3]) + n.to_bytes(size, "little")
+
+
+class FastDecoder:
+    """
+    Decodes whole response pages of fixed layout storage.
+
+    `decode_page` returns None for pages it can not handle, the caller then
+    falls back to the generic scalecodec decoder.
+    """
+
+    def __init__(self, runtime_config: Any = None):
+        self.runtime_config = runtime_config
+        self._type2layout: dict[str, Layout | None] = {}
+        self._account2address: dict[bytes, str] = {}
+
+    def layout(self, type_string: str) -> Layout | None:
+        """
+        Resolves a type string through its scalecodec decoder class, so
+        portable registry names work too.
+        """
+        if type_string not in self._type2layout:
+            try:
+                self._type2layout[type_string] = self._resolve(type_string)
+            except Exception:
+                self._type2layout[type_string] = None
+        return self._type2layout[type_string]
+
+    def _resolve(self, type_string: str) -> Layout | None:
+        cls = self.runtime_config.get_decoder_class(type_string)  # type: ignore
+        if cls is None:
+            return None
+        names = [k.__name__ for k in cls.__mro__]
+        if "GenericAccountId" in names:
+            return ("account",)
+        for name in names[:2]:
+            if name in PRIMITIVES:
+                return ("prim", PRIMITIVES[name])
+        if "FixedLengthArray" in names and cls.sub_type == "u8":
+            return ("bytes", cls.element_count)
+        if "Tuple" in names and getattr(cls, "type_mapping", None):
+            layouts = [self.layout(t) for t in cls.type_mapping]
+            if all(sub and sub[0] != "vec" for sub in layouts):
+                return ("tuple", layouts)
+            return None
+        if "Vec" in names and getattr(cls, "sub_type", None):
+            sub_layout = self.layout(cls.sub_type)
+            if sub_layout and sub_layout[0] != "vec":
+                return ("vec", sub_layout)
+        return None
+
+    def _dtype(self, layout: Layout) -> Any:
+        kind = layout[0]
+        if kind == "prim":
+            return np.dtype(layout[1])  # type: ignore
+        if kind == "account":
+            return np.dtype("V32")  # type: ignore
+        if kind == "bytes":
+            return np.dtype(f"V{layout[1]}")  # type: ignore
+        return np.dtype(  # type: ignore
+            [(f"f{i}", self._dtype(sub)) for i, sub in enumerate(layout[1])]
+        )
+
+    def _address(self, public_key: bytes) -> str:
+        if public_key not in self._account2address:
+            ss58_format = self.runtime_config.ss58_format  # type: ignore
+            if ss58_format is None:
+                address = "0x" + public_key.hex()
+            else:
+                address = ss58_encode(public_key, ss58_format=ss58_format)
+            self._account2address[public_key] = address
+        return self._account2address[public_key]
+
+    def _to_python(self, layout: Layout, column: Any) -> list[Any]:
+        kind = layout[0]
+        if kind == "prim":
+            if layout[1] == "V16":
+                return [int.from_bytes(x.tobytes(), "little") for x in column]
+            return column.tolist()
+        if kind == "account":
+            return [self._address(x.tobytes()) for x in column]
+        if kind == "bytes":
+            return ["0x" + x.tobytes().hex() for x in column]
+        columns = [
+            self._to_python(sub, column[f"f{i}"])
+            for i, sub in enumerate(layout[1])
+        ]
+        return list(zip(*columns))
+
+    def _decode_values(
+        self, type_string: str, hex_values: list[str]
+    ) -> list[Any] | None:
+        layout = self.layout(type_string)
+        if layout is None:
+            return None
+        if layout[0] != "vec":
+            dtype = self._dtype(layout)
+            data = bytes.fromhex(
+                "".join(v.removeprefix("0x") for v in hex_values)
+            )
+            if len(data) != dtype.itemsize * len(hex_values):
+                return None
+            return self._to_python(layout, np.frombuffer(data, dtype=dtype))  # type: ignore
+        dtype = self._dtype(layout[1])
+        values: list[Any] = []
+        for v in hex_values:
+            data = bytes.fromhex(v.removeprefix("0x"))
+            n, offset = compact_length(data)
+            if n is None or offset + n * dtype.itemsize != len(data):
+                return None
+            array = np.frombuffer(data, dtype=dtype, count=n, offset=offset)  # type: ignore
+            values.append(self._to_python(layout[1], array))
+        return values
+
+    def _decode_keys(
+        self,
+        fun_params: tuple[Any, Any, Any, Any, str],
+        hex_keys: list[str],
+    ) -> list[Any] | None:
+        _, param_types, key_hashers, params, _ = fun_params
+        remaining = len(param_types) - len(params)
+        # the keys `_decode_response` builds: the param, or both of a double map
+        if not (remaining == 1 or (remaining == 2 and len(params) == 0)):
+            return None
+        fields: list[tuple[str, Any]] = []
+        layouts: list[tuple[str, Layout]] = []
+        for n in range(len(params), len(param_types)):
+            if key_hashers[n] not in HASHER_LEN:
+                return None
+            layout = self.layout(param_types[n])
+            if layout is None or layout[0] == "vec":
+                return None
+            if HASHER_LEN[key_hashers[n]]:
+                fields.append((f"h{n}", f"V{HASHER_LEN[key_hashers[n]]}"))
+            fields.append((f"p{n}", self._dtype(layout)))
+            layouts.append((f"p{n}", layout))
+        dtype = np.dtype(fields)  # type: ignore
+        data = bytes.fromhex("".join(hex_keys))
+        if len(data) != dtype.itemsize * len(hex_keys):
+            return None
+        rows = np.frombuffer(data, dtype=dtype)  # type: ignore
+        columns = [
+            self._to_python(layout, rows[name]) for name, layout in layouts
+        ]
+        return columns[0] if remaining == 1 else list(zip(*columns))
+
+    def decode_page(
+        self,
+        fun_params: tuple[Any, Any, Any, Any, str],
+        prefix: str,
+        changes: list[list[str]],
+    ) -> dict[Any, Any] | None:
+        """
+        Decodes the `changes` of one `state_queryStorageAt` response.
+
+        Returns:
+            {item key: value}, or None when the layout is not fixed.
+        """
+        if np is None or self.runtime_config is None:
+            return None
+        changes = [item for item in changes if item[1] is not None]
+        if not changes:
+            return {}
+        keys = self._decode_keys(
+            fun_params, [item[0][len(prefix) :] for item in changes]
+        )
+        if keys is None:
+            return None
+        values = self._decode_values(
+            fun_params[0], [item[1] for item in changes]
+        )
+        if values is None:
+            return None
+        return dict(zip(keys, values))
+
+    @staticmethod
+    def record(
+        path: str,
+        fun_params: tuple[Any, Any, Any, Any, str],
+        prefix: str,
+        changes: list[list[str]],
+        ss58_format: int = 42,
+    ) -> str:
+        """Saves a response page so `benchmark` can replay it offline."""
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "fun_params": list(fun_params),
+                    "prefix": prefix,
+                    "changes": changes,
+                    "ss58_format": ss58_format,
+                },
+                f,
+            )
+        return path
+
+    @staticmethod
+    def synthetic_page(n: int = 10000, weights: int = 64) -> dict[str, Any]:
+        """A Weights like page, (u16, u16) keys with Vec<(u16, u16)> values."""
+        prefix = "0x" + "ab" * 32
+        changes: list[list[str]] = []
+        for uid in range(n):
+            key = (
+                prefix
+                + "cd" * 8
+                + (2).to_bytes(2, "little").hex()
+                + "ef" * 8
+                + uid.to_bytes(2, "little").hex()
+            )
+            pairs = b"".join(
+                random.randrange(n).to_bytes(2, "little")
+                + random.randrange(2**16).to_bytes(2, "little")
+                for _ in range(weights)
+            )
+            changes.append(
+                [key, "0x" + encode_compact(weights).hex() + pairs.hex()]
+            )
+        return {
+            "fun_params": [
+                "Vec<(u16, u16)>",
+                ["u16", "u16"],
+                ["Twox64Concat", "Twox64Concat"],
+                [],
+                "Weights",
+            ],
+            "prefix": prefix,
+            "changes": changes,
+            "ss58_format": 42,
+        }
+
+    @classmethod
+    def benchmark(
+        cls, path: str | None = None, n: int = 10000
+    ) -> dict[str, Any]:
+        """
+        Times generic (scalecodec) against fast decoding of a recorded page
+        (see `record`), or of a synthetic Weights page, offline with the core
+        type registry.
+
+        Raises:
+            AssertionError: If both decoders disagree.
+        """
+        from scalecodec.base import RuntimeConfigurationObject, ScaleBytes
+        from scalecodec.type_registry import load_type_registry_preset
+
+        if path is None:
+            page = cls.synthetic_page(n)
+        else:
+            with open(path) as f:
+                page = json.load(f)
+        runtime_config = RuntimeConfigurationObject(
+            ss58_format=page["ss58_format"]
+        )
+        runtime_config.update_type_registry(
+            load_type_registry_preset(name="core")
+        )
+        value_type, param_types, key_hashers, params, _ = page["fun_params"]
+        prefix, changes = page["prefix"], page["changes"]
+
+        start = time.time()
+        generic: dict[Any, Any] = {}
+        key_type_string: list[str] = []
+        for i in range(len(params), len(param_types)):
+            key_type_string += [
+                f"[u8; {HASHER_LEN[key_hashers[i]]}]",
+                param_types[i],
+            ]
+        for key, value in changes:
+            key_obj = runtime_config.create_scale_object(
+                f"({', '.join(key_type_string)})",
+                ScaleBytes("0x" + key[len(prefix) :]),
+            )
+            key_obj.decode()
+            if len(param_types) - len(params) == 1:
+                item_key = key_obj.value_object[1].value
+            else:
+                item_key = tuple(
+                    key_obj.value_object[k + 1].value
+                    for k in range(len(params), len(param_types) + 1, 2)
+                )
+            value_obj = runtime_config.create_scale_object(
+                value_type, ScaleBytes(value)
+            )
+            value_obj.decode()
+            generic[item_key] = value_obj.value
+        generic_time = time.time() - start
+
+        start = time.time()
+        fast = cls(runtime_config).decode_page(
+            page["fun_params"], prefix, changes
+        )
+        fast_time = time.time() - start
+        assert fast == generic, "fast decoding differs from scalecodec"
+        return {
+            "items": len(changes),
+            "generic_time": generic_time,
+            "fast_time": fast_time,
+            "speedup": generic_time / max(fast_time, 1e-9),
+        }
@@ -0,0 +1,881 @@
+"""
+Chain client engine of `torusdk.client.TorusClient`. commune's
+`subspace.Subspace` vendors a copy as `subspace.engine`, keep the two in sync.
+
+One `ChainEngine` per node url and connection factory per process holds
+everything that makes storage queries fast: the connection pool (sized on
+demand, health checked, reconnecting with backoff), the runtime metadata
+cache, the multiplexed batch transport, the batch chunker and the response
+decoders. Clients only
+add their own queries on top, so a process talking to several chains holds
+one pool per node instead of one per client.
+"""
+
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, TypeVar
+
+from scalecodec.base import RuntimeConfigurationObject, ScaleBytes
+from scalecodec.type_registry import load_type_registry_preset
+from websocket import create_connection
+
+from torusdk.decoder import HASHER_LEN, FastDecoder
+from torusdk.errors import NetworkQueryError
+
+MAX_REQUEST_SIZE = 9_000_000
+MAX_KEYS_PER_QUERY = 35_000
+
+T1 = TypeVar("T1")
+T2 = TypeVar("T2")
+
+SubstrateFactory = Callable[[str, dict[str, Any]], Any]
+
+
+@dataclass
+class Chunk:
+    batch_requests: list[tuple[Any, Any]]
+    prefix_list: list[list[str]]
+    fun_params: list[tuple[Any, Any, Any, Any, str]]
+
+
+class ConnectionPool:
+    """
+    Substrate interface connections to one node.
+
+    Connections are opened on demand up to `max_connections`, checked before
+    they are handed out, kept alive by a heartbeat while idle and reopened
+    with exponential backoff when the node drops them.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        factory: SubstrateFactory,
+        max_connections: int = 1,
+        ws_options: dict[str, Any] | None = None,
+        heartbeat_interval: float = 11,
+        max_attempts: int = 5,
+        max_backoff: float = 30,
+    ):
+        self.url = url
+        self.factory = factory
+        self.max_connections = max(max_connections, 1)
+        self.ws_options = ws_options or {}
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.heartbeat_interval = heartbeat_interval
+        self.idle: queue.Queue[Any] = queue.Queue()
+        self.size = 0
+        self.reconnects = 0
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.heartbeat = threading.Thread(
+            target=self._heartbeat_loop, daemon=True
+        )
+        self.heartbeat.start()
+
+    def connect(self) -> Any:
+        """opens a connection, retrying with jittered exponential backoff"""
+        for attempt in itertools.count():
+            try:
+                return self.factory(self.url, dict(self.ws_options))
+            except Exception:
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                delay = min(0.5 * 2**attempt, self.max_backoff)
+                time.sleep(delay * random.uniform(0.5, 1))
+        raise AssertionError("unreachable")
+
+    def healthy(self, conn: Any) -> bool:
+        websocket = getattr(conn, "websocket", None)
+        return websocket is not None and websocket.connected
+
+    def reconnect(self, conn: Any) -> Any:
+        self.reconnects += 1
+        try:
+            conn.websocket.close()
+        except Exception:
+            pass
+        try:
+            return self.connect()
+        except Exception:
+            with self.lock:
+                self.size -= 1
+            raise
+
+    def acquire(self, timeout: float | None = None) -> Any:
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                grow = self.size < self.max_connections
+                if grow:
+                    self.size += 1
+            if grow:
+                try:
+                    return self.connect()
+                except Exception:
+                    with self.lock:
+                        self.size -= 1
+                    raise
+            conn = self.idle.get(timeout=timeout)
+        if not self.healthy(conn):
+            conn = self.reconnect(conn)
+        return conn
+
+    def release(self, conn: Any):
+        self.idle.put(conn)
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator[Any]:
+        conn = self.acquire(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def resize(self, max_connections: int):
+        with self.lock:
+            self.max_connections = max(self.max_connections, max_connections)
+
+    def _heartbeat_loop(self):
+        # only idle connections are touched, a checked out one belongs to its caller
+        while not self.stop.wait(self.heartbeat_interval):
+            for _ in range(self.idle.qsize()):
+                try:
+                    conn = self.idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    conn.websocket.pong(b"")
+                except Exception:
+                    try:
+                        conn = self.reconnect(conn)
+                    except Exception:
+                        continue
+                self.idle.put(conn)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": self.idle.qsize(),
+            "max_connections": self.max_connections,
+            "reconnects": self.reconnects,
+        }
+
+    def close(self):
+        self.stop.set()
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.websocket.close()
+            except Exception:
+                pass
+
+
+class RuntimeCache:
+    """
+    Decoded metadata per runtime spec version, shared by every pooled
+    connection. Each connection still gets a type registry of its own.
+
+    The raw metadata of each spec version is snapshotted to `path` so a cold
+    start decodes it locally instead of downloading it, and the head spec
+    version is only re-checked every `check_interval` seconds.
+    """
+
+    def __init__(self, path: str | None = None, check_interval: float = 60):
+        self.path = path
+        self.check_interval = check_interval
+        self.lock = threading.RLock()
+        self.spec2runtime: dict[int, dict[str, Any]] = {}
+        self.spec_version: int | None = None
+        self.transaction_version: int | None = None
+        self.last_check = 0.0
+        self.stats = {"hits": 0, "builds": 0, "snapshot_loads": 0, "checks": 0}
+
+    def snapshot_path(self, spec_version: int) -> str:
+        assert self.path is not None
+        return os.path.join(self.path, f"{spec_version}.json")
+
+    def read_snapshot(self, spec_version: int) -> dict[str, Any] | None:
+        if self.path is None or not os.path.exists(
+            self.snapshot_path(spec_version)
+        ):
+            return None
+        try:
+            with open(self.snapshot_path(spec_version)) as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def write_snapshot(self, snapshot: dict[str, Any]):
+        if self.path is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        path = self.snapshot_path(snapshot["spec_version"])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def check(self, conn: Any, update: bool = False) -> int:
+        """spec version at the head, asks the node at most every check_interval seconds"""
+        with self.lock:
+            stale = time.time() - self.last_check > self.check_interval
+            if update or self.spec_version is None or stale:
+                info = conn.get_block_runtime_version(None)
+                if info is None:
+                    raise NetworkQueryError("no runtime version from the node")
+                spec_version = info.get("specVersion")
+                if spec_version != self.spec_version:
+                    # a runtime upgrade, the decoded runtimes of older specs are stale
+                    self.spec2runtime = {
+                        k: v
+                        for k, v in self.spec2runtime.items()
+                        if k == spec_version
+                    }
+                self.spec_version = spec_version
+                self.transaction_version = info.get("transactionVersion")
+                self.last_check = time.time()
+                self.stats["checks"] += 1
+            assert self.spec_version is not None
+            return self.spec_version
+
+    def build(self, conn: Any, spec_version: int) -> dict[str, Any]:
+        """decodes the metadata of a spec version (from the snapshot if there is one) on conn"""
+        snapshot = self.read_snapshot(spec_version)
+        if snapshot is None:
+            response = conn.get_block_metadata(decode=False)
+            snapshot = {
+                "spec_version": spec_version,
+                "transaction_version": self.transaction_version,
+                "metadata": response.get("result"),
+                "ss58_format": None,
+            }
+        else:
+            self.stats["snapshot_loads"] += 1
+        runtime_config = RuntimeConfigurationObject()
+        runtime_config.update_type_registry(
+            load_type_registry_preset(name="core")
+        )
+        metadata = runtime_config.create_scale_object(
+            "MetadataVersioned", data=ScaleBytes(snapshot["metadata"])
+        )
+        metadata.decode()
+        runtime = {
+            "spec_version": spec_version,
+            "transaction_version": snapshot["transaction_version"],
+            "metadata": metadata,
+            "ss58_format": snapshot["ss58_format"],
+        }
+        self.configure(conn, runtime)
+        if snapshot["ss58_format"] is None:
+            ss58_prefix_constant = conn.get_constant("System", "SS58Prefix")
+            snapshot["ss58_format"] = (
+                ss58_prefix_constant.value
+                if ss58_prefix_constant
+                else conn.ss58_format
+            )
+            self.write_snapshot(snapshot)
+        runtime["ss58_format"] = conn.ss58_format = snapshot["ss58_format"]
+        self.stats["builds"] += 1
+        return runtime
+
+    def configure(self, conn: Any, runtime: dict[str, Any]):
+        """
+        points conn at the decoded metadata, on a type registry of its own:
+        the substrate interface reloads the registry in place whenever it
+        meets another runtime, so a registry shared between connections
+        would be wiped under the threads decoding with it
+        """
+        # the same steps as SubstrateInterface.init_runtime, without refetching the metadata
+        runtime_config = RuntimeConfigurationObject(
+            ss58_format=runtime["ss58_format"]
+        )
+        conn.runtime_config = runtime_config
+        conn.metadata = runtime["metadata"]
+        conn.runtime_version = runtime["spec_version"]
+        conn.transaction_version = runtime["transaction_version"]
+        conn.reload_type_registry(
+            use_remote_preset=conn.config.get("use_remote_preset"),
+            auto_discover=conn.config.get("auto_discover"),
+        )
+        if conn.implements_scaleinfo():
+            runtime_config.add_portable_registry(runtime["metadata"])
+        runtime_config.set_active_spec_version_id(runtime["spec_version"])
+        try:
+            _ = runtime_config.create_scale_object(
+                "sp_weights::weight_v2::Weight"
+            )
+            is_weight_v2 = True
+            runtime_config.update_type_registry_types(
+                {"Weight": "sp_weights::weight_v2::Weight"}
+            )
+        except NotImplementedError:
+            is_weight_v2 = False
+            runtime_config.update_type_registry_types({"Weight": "WeightV1"})
+        conn.config["is_weight_v2"] = is_weight_v2
+        if runtime["ss58_format"] is not None:
+            conn.ss58_format = runtime["ss58_format"]
+
+    def apply(self, conn: Any, update: bool = False) -> Any:
+        """points conn at the runtime of the current spec version, decoding its metadata once"""
+        with self.lock:
+            spec_version = self.check(conn, update=update)
+            runtime = self.spec2runtime.get(spec_version)
+            if runtime is None:
+                runtime = self.build(conn, spec_version)
+                self.spec2runtime[spec_version] = runtime
+                return conn
+            self.stats["hits"] += 1
+        if (
+            conn.metadata is not runtime["metadata"]
+            or conn.runtime_version != spec_version
+        ):
+            self.configure(conn, runtime)
+        return conn
+
+    def clear(self):
+        with self.lock:
+            self.spec2runtime = {}
+            self.spec_version = None
+            self.last_check = 0
+
+
+class RpcConnection:
+    """
+    One websocket with many requests in flight.
+
+    Callers send batches under a lock and get a future per request id, a
+    reader thread routes every response to the future of its id, so batches
+    are pipelined instead of holding the socket for a whole round trip.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ws_options: dict[str, Any] | None = None,
+        error_type: type[Exception] = NetworkQueryError,
+    ):
+        self.url = url
+        self.error_type = error_type
+        self.ws_options = {
+            k: v
+            for k, v in (ws_options or {}).items()
+            if k not in ["max_size", "read_limit", "write_limit"]
+        }
+        self.websocket = create_connection(
+            url, enable_multithread=True, **self.ws_options
+        )
+        # the timeout bounds the handshake only, the reader blocks between
+        # responses and `RpcMux.gather` bounds every wait with it instead
+        self.websocket.settimeout(None)
+        self.lock = threading.Lock()
+        self.id2future: dict[int, Future[Any]] = {}
+        self.closed = False
+        self.reader = threading.Thread(target=self.read_loop, daemon=True)
+        self.reader.start()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.id2future)
+
+    def send(self, payloads: list[dict[str, Any]]) -> list[Future[Any]]:
+        """sends the payloads as one batch frame, one future per payload"""
+        futures: list[Future[Any]] = [Future() for _ in payloads]
+        with self.lock:
+            if self.closed:
+                raise ConnectionError(f"rpc connection to {self.url} is closed")
+            for payload, future in zip(payloads, futures):
+                self.id2future[payload["id"]] = future
+        try:
+            self.websocket.send(json.dumps(payloads))
+        except Exception as e:
+            self.fail(e)
+        return futures
+
+    def discard(self, futures: set[Future[Any]]) -> bool:
+        """
+        stops routing the responses of futures nobody waits for anymore,
+        true when any of them was in flight on this connection
+        """
+        discarded = False
+        with self.lock:
+            for request_id, future in list(self.id2future.items()):
+                if future in futures:
+                    del self.id2future[request_id]
+                    discarded = True
+        return discarded
+
+    def read_loop(self):
+        while not self.closed:
+            try:
+                messages = json.loads(self.websocket.recv())
+            except Exception as e:
+                self.fail(e)
+                return
+            if isinstance(messages, dict):
+                messages = [messages]
+            for message in messages:
+                with self.lock:
+                    future = self.id2future.pop(message.get("id"), None)
+                if future is None:
+                    continue
+                if "error" in message:
+                    future.set_exception(self.error_type(message["error"]))
+                else:
+                    future.set_result(message)
+
+    def fail(self, error: Exception):
+        """closes the connection and fails every request still in flight"""
+        with self.lock:
+            self.closed = True
+            id2future, self.id2future = self.id2future, {}
+        for future in id2future.values():
+            if not future.done():
+                future.set_exception(
+                    ConnectionError(
+                        f"rpc connection to {self.url} lost: {error}"
+                    )
+                )
+        try:
+            # wakes the reader first, it holds the socket while it waits in
+            # recv and a stalled node never answers the close frame
+            self.websocket.abort()
+            self.websocket.close()
+        except Exception:
+            pass
+
+    def close(self):
+        self.fail(ConnectionError("closed"))
+
+
+class RpcMux:
+    """
+    A pool of multiplexed rpc connections.
+
+    Each batch goes to the connection with the fewest requests in flight,
+    dead connections are reopened on the next send and request ids are
+    unique across the pool. Waits for responses are bounded by the
+    `timeout` of ws_options unless the caller passes its own.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ws_options: dict[str, Any] | None = None,
+        num_connections: int = 1,
+        error_type: type[Exception] = NetworkQueryError,
+    ):
+        self.url = url
+        self.ws_options = ws_options or {}
+        self.num_connections = max(num_connections, 1)
+        self.error_type = error_type
+        self.timeout: float | None = self.ws_options.get("timeout")
+        self.lock = threading.Lock()
+        self.connections: list[RpcConnection] = []
+        self.request_id = itertools.count(1)
+
+    def connection(self) -> RpcConnection:
+        with self.lock:
+            self.connections = [
+                conn for conn in self.connections if not conn.closed
+            ]
+            if len(self.connections) < self.num_connections:
+                conn = RpcConnection(
+                    self.url, self.ws_options, error_type=self.error_type
+                )
+                self.connections.append(conn)
+                return conn
+            return min(self.connections, key=lambda conn: conn.in_flight)
+
+    def submit(
+        self, requests: list[tuple[str, list[Any]]]
+    ) -> list[Future[Any]]:
+        """sends (method, params) requests as one batch frame without waiting for the responses"""
+        payloads = [
+            {
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params,
+                "id": next(self.request_id),
+            }
+            for method, params in requests
+        ]
+        if not payloads:
+            return []
+        return self.connection().send(payloads)
+
+    def gather(
+        self,
+        futures: list[Future[Any]],
+        extract_result: bool = True,
+        timeout: float | None = None,
+    ) -> list[Any]:
+        if timeout is None:
+            timeout = self.timeout
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            error = TimeoutError(
+                f"{len(not_done)}/{len(futures)} rpc requests timed out after {timeout}s"
+            )
+            with self.lock:
+                connections = list(self.connections)
+            for conn in connections:
+                # the node stopped answering on this socket, close it so the
+                # next batch goes out on a fresh one
+                if conn.discard(not_done):
+                    conn.fail(error)
+            for future in not_done:
+                future.cancel()
+            raise error
+        results = [future.result() for future in futures]
+        if extract_result:
+            results = [message["result"] for message in results]
+        return results
+
+    def request(
+        self,
+        requests: list[tuple[str, list[Any]]],
+        extract_result: bool = True,
+        timeout: float | None = None,
+    ) -> list[Any]:
+        return self.gather(
+            self.submit(requests),
+            extract_result=extract_result,
+            timeout=timeout,
+        )
+
+    def request_batches(
+        self,
+        batches: list[list[tuple[str, list[Any]]]],
+        extract_result: bool = True,
+        timeout: float | None = None,
+    ) -> list[list[Any]]:
+        """pipelines every batch across the pool, then collects the results in order"""
+        batch_futures = [self.submit(batch) for batch in batches]
+        return [
+            self.gather(futures, extract_result=extract_result, timeout=timeout)
+            for futures in batch_futures
+        ]
+
+    def close(self):
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            conn.close()
+
+
+def make_request_smaller(
+    batch_request: list[tuple[T1, T2]],
+    prefix_list: list[list[str]],
+    fun_params: list[tuple[Any, Any, Any, Any, str]],
+    max_size: int = MAX_REQUEST_SIZE,
+) -> tuple[list[list[tuple[T1, T2]]], list[Chunk]]:
+    """
+    Splits a batch of requests into smaller batches, each not exceeding
+    `max_size` bytes of json.
+    """
+    assert len(prefix_list) == len(fun_params) == len(batch_request)
+    result: list[list[tuple[T1, T2]]] = []
+    current_batch: list[tuple[T1, T2]] = []
+    current_prefix_batch: list[Any] = []
+    current_params_batch: list[Any] = []
+    current_size = 0
+    chunk_list: list[Chunk] = []
+    for request, prefix, params in zip(batch_request, prefix_list, fun_params):
+        request_size = len(json.dumps(request))
+        if current_size + request_size > max_size:
+            # essentially checks that it's not the first iteration
+            if current_batch:
+                chunk_list.append(
+                    Chunk(current_batch, current_prefix_batch, current_params_batch)  # type: ignore
+                )
+                result.append(current_batch)
+            current_batch = [request]
+            current_prefix_batch = [prefix]
+            current_params_batch = [params]
+            current_size = request_size
+        else:
+            current_batch.append(request)
+            current_size += request_size
+            current_prefix_batch.append(prefix)
+            current_params_batch.append(params)
+    if current_batch:
+        result.append(current_batch)
+        chunk_list.append(
+            Chunk(current_batch, current_prefix_batch, current_params_batch)  # type: ignore
+        )
+    return result, chunk_list
+
+
+def split_chunks(
+    chunk_requests: list[Chunk], max_n_keys: int = MAX_KEYS_PER_QUERY
+) -> list[Chunk]:
+    """
+    Splits the queries carrying more than `max_n_keys` keys into chunks of
+    their own, keeping the behaviour the clients always had.
+    """
+
+    def split(chunk: Chunk, chunk_info: list[Chunk], chunk_info_idx: int):
+        mutated_chunk_info = deepcopy(chunk_info)
+        for query in chunk.batch_requests:
+            result_keys = query[1][0]
+            keys_amount = len(result_keys)
+            if keys_amount > max_n_keys:
+                mutated_chunk_info.pop(chunk_info_idx)
+                for i in range(0, keys_amount, max_n_keys):
+                    new_chunk = deepcopy(chunk)
+                    splitted_query = deepcopy(query)
+                    splitted_query[1][0] = result_keys[i : i + max_n_keys]
+                    new_chunk.batch_requests = [splitted_query]
+                    mutated_chunk_info.insert(chunk_info_idx, new_chunk)
+        return mutated_chunk_info
+
+    assert len(chunk_requests) > 0
+    mutated_chunk_info: list[Chunk] = []
+    for idx, macro_chunk in enumerate(chunk_requests):
+        mutated_chunk_info = split(macro_chunk, chunk_requests, idx)
+    return mutated_chunk_info
+
+
+class ChainEngine:
+    """
+    Pool, runtime cache, rpc transport and decoders of one node url.
+
+    Use `ChainEngine.get` so every client of the same node in the process
+    shares one engine.
+    """
+
+    url2engine: dict[tuple[Any, ...], "ChainEngine"] = {}
+    registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        url: str,
+        factory: SubstrateFactory,
+        num_connections: int = 1,
+        ws_options: dict[str, Any] | None = None,
+        runtime_path: str | None = None,
+        runtime_check_interval: float = 60,
+        error_type: type[Exception] = NetworkQueryError,
+    ):
+        self.url = url
+        self.key: tuple[Any, ...] = (url, factory, runtime_path, error_type)
+        self.ws_options = ws_options or {}
+        self.pool = ConnectionPool(
+            url,
+            factory,
+            max_connections=num_connections,
+            ws_options=self.ws_options,
+        )
+        self.runtime = RuntimeCache(
+            path=runtime_path, check_interval=runtime_check_interval
+        )
+        self.rpc = RpcMux(
+            url,
+            ws_options=self.ws_options,
+            num_connections=num_connections,
+            error_type=error_type,
+        )
+        self.config2decoder: weakref.WeakKeyDictionary[Any, FastDecoder] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.fast_decode = True
+
+    @classmethod
+    def get(
+        cls,
+        url: str,
+        factory: SubstrateFactory,
+        num_connections: int = 1,
+        ws_options: dict[str, Any] | None = None,
+        runtime_path: str | None = None,
+        runtime_check_interval: float = 60,
+        error_type: type[Exception] = NetworkQueryError,
+    ) -> "ChainEngine":
+        """
+        the engine of url, created on first use and grown to the largest
+        num_connections asked. Clients only share an engine when they also
+        pass the same factory, runtime_path and error_type, pass a module
+        level factory rather than a lambda to share it.
+        """
+        key = (url, factory, runtime_path, error_type)
+        with cls.registry_lock:
+            engine = cls.url2engine.get(key)
+            if engine is None:
+                engine = cls(
+                    url,
+                    factory,
+                    num_connections=num_connections,
+                    ws_options=ws_options,
+                    runtime_path=runtime_path,
+                    runtime_check_interval=runtime_check_interval,
+                    error_type=error_type,
+                )
+                cls.url2engine[key] = engine
+            else:
+                engine.pool.resize(num_connections)
+                engine.rpc.num_connections = max(
+                    engine.rpc.num_connections, num_connections
+                )
+            return engine
+
+    @contextmanager
+    def connection(
+        self, timeout: float | None = None, init: bool = False
+    ) -> Iterator[Any]:
+        """a pooled connection, pointed at the cached runtime when init is set"""
+        with self.pool.connection(timeout=timeout) as conn:
+            if init:
+                self.runtime.apply(conn)
+            yield conn
+
+    def submit_chunks(
+        self, chunk_requests: list[Chunk]
+    ) -> tuple[list[list[Future[Any]]], list[Chunk]]:
+        """sends every chunk at once without waiting for the responses"""
+        chunks = split_chunks(chunk_requests)
+        return [
+            self.rpc.submit(chunk.batch_requests) for chunk in chunks
+        ], chunks
+
+    def request_chunks(
+        self,
+        chunk_requests: list[Chunk],
+        extract_result: bool = True,
+        timeout: float | None = None,
+    ) -> tuple[list[list[Any]], list[Chunk]]:
+        chunk_futures, chunks = self.submit_chunks(chunk_requests)
+        results = [
+            self.rpc.gather(
+                futures, extract_result=extract_result, timeout=timeout
+            )
+            for futures in chunk_futures
+        ]
+        return results, chunks
+
+    def decode_page(
+        self,
+        substrate: Any,
+        fun_params: tuple[Any, Any, Any, Any, str],
+        prefix: str,
+        changes: list[list[str]],
+    ) -> dict[Any, Any] | None:
+        """a whole page with numpy when the layout is fixed, None otherwise"""
+        if not self.fast_decode:
+            return None
+        # one decoder per type registry, so layouts are only resolved through
+        # the registry of the connection the caller holds
+        decoder = self.config2decoder.get(substrate.runtime_config)
+        if decoder is None:
+            decoder = FastDecoder(substrate.runtime_config)
+            self.config2decoder[substrate.runtime_config] = decoder
+        return decoder.decode_page(fun_params, prefix, changes)
+
+    def decode_response(
+        self,
+        response: list[Any],
+        function_parameters: list[tuple[Any, Any, Any, Any, str]],
+        prefix_list: list[Any],
+        block_hash: str | None,
+    ) -> dict[str, dict[Any, Any]]:
+        """
+        Decodes `state_queryStorageAt` responses into
+        {storage function: {item key: value}}, page at a time when the layout
+        is fixed and item by item through scalecodec otherwise.
+        """
+
+        def get_item_key_value(item_key: Any) -> Any:
+            if isinstance(item_key, tuple):
+                return tuple(k.value for k in item_key)  # type: ignore
+            return item_key.value
+
+        def concat_hash_len(key_hasher: str) -> int:
+            if key_hasher not in HASHER_LEN:
+                raise ValueError("Unsupported hash type")
+            return HASHER_LEN[key_hasher]
+
+        assert len(response) == len(function_parameters) == len(prefix_list)
+        result_dict: dict[str, dict[Any, Any]] = {}
+        for res, fun_params_tuple, prefix in zip(
+            response, function_parameters, prefix_list
+        ):
+            if not res:
+                continue
+            res = res[0]
+            changes = res["changes"]
+            value_type, param_types, key_hashers, params, storage_function = (
+                fun_params_tuple
+            )
+            with self.connection(init=True) as substrate:
+                decoded = self.decode_page(
+                    substrate, fun_params_tuple, prefix, changes
+                )
+                if decoded is not None:
+                    if decoded:
+                        result_dict.setdefault(storage_function, {}).update(
+                            decoded
+                        )
+                    continue
+                for item in changes:
+                    key_type_string: list[Any] = []
+                    for n in range(len(params), len(param_types)):
+                        key_type_string.append(
+                            f"[u8; {concat_hash_len(key_hashers[n])}]"
+                        )
+                        key_type_string.append(param_types[n])
+                    item_key_obj = substrate.decode_scale(
+                        type_string=f"({', '.join(key_type_string)})",
+                        scale_bytes="0x" + item[0][len(prefix) :],
+                        return_scale_obj=True,
+                        block_hash=block_hash,
+                    )
+                    # strip key_hashers to use as item key
+                    if len(param_types) - len(params) == 1:
+                        item_key = item_key_obj.value_object[1]
+                    else:
+                        item_key = tuple(
+                            item_key_obj.value_object[key + 1]
+                            for key in range(
+                                len(params), len(param_types) + 1, 2
+                            )
+                        )
+                    item_value = substrate.decode_scale(
+                        type_string=value_type,
+                        scale_bytes=item[1],
+                        return_scale_obj=True,
+                        block_hash=block_hash,
+                    )
+                    result_dict.setdefault(storage_function, {})
+                    key = get_item_key_value(item_key)
+                    result_dict[storage_function][key] = item_value.value
+        return result_dict
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "pool": self.pool.stats(),
+            "runtime": dict(self.runtime.stats),
+            "rpc_connections": len(self.rpc.connections),
+        }
+
+    def close(self):
+        self.pool.close()
+        self.rpc.close()
+        with self.registry_lock:
+            if self.url2engine.get(self.key) is self:
+                del self.url2engine[self.key]
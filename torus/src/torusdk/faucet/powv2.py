@@ -5,10 +5,11 @@ import multiprocessing.queues
 import multiprocessing.synchronize
 import os
 import threading
+import time
 from abc import abstractmethod
 from dataclasses import dataclass
 from queue import Empty
-from typing import Any, Dict, Generic, Optional, TypeVar, cast
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar, cast
 
 from Crypto.Hash import keccak
 from torustrateinterface import Keypair
@@ -16,8 +17,51 @@ from torustrateinterface import Keypair
 from torusdk.client import TorusClient
 from torusdk.util.mutex import MutexBox
 
+try:
+    import numpy as np
+except ImportError:  # no batched backend, nonces are hashed one at a time
+    np = None  # type: ignore
+
 SEAL_LIMIT = 2**256 - 1  # U256_MAX
 DIFFICULTY = 1_000_000
+# `seal * DIFFICULTY < SEAL_LIMIT` is `seal <= SEAL_THRESHOLD`
+SEAL_THRESHOLD = (SEAL_LIMIT - 1) // DIFFICULTY
+BATCH_SIZE = 16_384
+
+KECCAK_ROUND_CONSTANTS = [
+    0x0000000000000001,
+    0x0000000000008082,
+    0x800000000000808A,
+    0x8000000080008000,
+    0x000000000000808B,
+    0x0000000080000001,
+    0x8000000080008081,
+    0x8000000000008009,
+    0x000000000000008A,
+    0x0000000000000088,
+    0x0000000080008009,
+    0x000000008000000A,
+    0x000000008000808B,
+    0x800000000000008B,
+    0x8000000000008089,
+    0x8000000000008003,
+    0x8000000000008002,
+    0x8000000000000080,
+    0x000000000000800A,
+    0x800000008000000A,
+    0x8000000080008081,
+    0x8000000000008080,
+    0x0000000080000001,
+    0x8000000080008008,
+]
+# rotation offsets of lane (x, y), indexed [x][y]
+KECCAK_ROTATIONS = [
+    [0, 36, 3, 41, 18],
+    [1, 44, 10, 45, 2],
+    [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56],
+    [27, 20, 39, 8, 14],
+]
 
 
 T = TypeVar("T")
@@ -120,6 +164,9 @@ class _SolverBase:
         stopEvent: An event to signal the solver process to stop.
         limit: The maximum number of solutions to find.
         key: The keypair used for generating solutions.
+        batch_size: Nonces hashed per call by the batched backend, 0 or None
+          hashes them one at a time.
+        hash_count: Hashes computed so far, shared with the parent process.
 
     Args:
         proc_num: The unique identifier of the solver process.
@@ -144,6 +191,7 @@ class _SolverBase:
         key: Keypair,
         node_url: str,
         mp_context: Any = None,
+        batch_size: int | None = BATCH_SIZE,
     ):
         """
         Initializes a new instance of the _SolverBase class.
@@ -158,6 +206,7 @@ class _SolverBase:
             limit: The maximum number of solutions to find.
             key: The keypair used for generating solutions.
             mp_context: The multiprocessing context to use.
+            batch_size: Nonces hashed per call by the batched backend.
         """
         if mp_context is None:
             mp_context = multiprocessing
@@ -179,6 +228,8 @@ class _SolverBase:
         self.limit = limit
         self.key = key
         self.node_url = node_url
+        self.batch_size = batch_size
+        self.hash_count = mp_context.Value("Q", 0, lock=False)  # type: ignore
 
     def _run_wrapper(self):
         """Wrapper method to call the actual run method."""
@@ -255,6 +306,7 @@ class _Solver(_SolverBase):
         block_info_box = self.block_info_box
 
         self.c_client = client
+        hasher = _make_hasher(self.batch_size)
         block_number, block_and_key_hash_bytes, block_hash = unbox_block_info(
             block_info_box
         )
@@ -275,13 +327,15 @@ class _Solver(_SolverBase):
                         unbox_block_info(block_info_box)
                     )
 
-            solution = _solve_for_nonce_block(
+            solution = solve_nonce_range(
                 nonce_start,
                 nonce_end,
                 block_and_key_hash_bytes,  # type: ignore
                 block_number,  # type: ignore
                 block_hash,  # type: ignore
+                hasher,
             )
+            self.hash_count.value += nonce_end - nonce_start
 
             if solution is not None:
                 self.solution_queue.put(solution)
@@ -469,6 +523,197 @@ def _solve_for_nonce_block(
     return None
 
 
+class _BatchKeccak256:
+    """
+    Keccak-256 of many 32 byte messages at once.
+
+    The sponge state is kept as 25 numpy lanes of `batch_size` words and
+    every step of Keccak-f[1600] runs in place on whole lanes, so the cost of
+    a Python call is paid per batch instead of per hash.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+        self.state = np.zeros((25, batch_size), dtype=np.uint64)  # type: ignore
+        self.permuted = np.zeros((25, batch_size), dtype=np.uint64)  # type: ignore
+        self.parity = np.zeros((5, batch_size), dtype=np.uint64)  # type: ignore
+        self.theta = np.zeros((5, batch_size), dtype=np.uint64)  # type: ignore
+        self.tmp = np.zeros(batch_size, dtype=np.uint64)  # type: ignore
+        self.round_constants = [
+            np.uint64(rc)  # type: ignore
+            for rc in KECCAK_ROUND_CONSTANTS
+        ]
+        # rho and pi: lane x + 5y is rotated into lane y + 5(2x + 3y)
+        self.rho_pi = [
+            (
+                x + 5 * y,
+                y + 5 * ((2 * x + 3 * y) % 5),
+                np.uint64(KECCAK_ROTATIONS[x][y]),  # type: ignore
+                np.uint64(64 - KECCAK_ROTATIONS[x][y]),  # type: ignore
+            )
+            for x in range(5)
+            for y in range(5)
+        ]
+
+    def digest(self, messages: bytes) -> Any:
+        """
+        Hashes `batch_size` concatenated 32 byte messages.
+
+        Returns:
+            A (batch_size, 32) uint8 array with one digest per row.
+        """
+        n = self.batch_size
+        assert len(messages) == 32 * n
+        a, b, c, d, t = (
+            self.state,
+            self.permuted,
+            self.parity,
+            self.theta,
+            self.tmp,
+        )
+        xor, band, bor = np.bitwise_xor, np.bitwise_and, np.bitwise_or  # type: ignore
+        shl, shr, inv = np.left_shift, np.right_shift, np.invert  # type: ignore
+        one, s63 = np.uint64(1), np.uint64(63)  # type: ignore
+
+        # a single block: the message, keccak padding and zeros
+        a.fill(0)
+        a[0:4] = np.frombuffer(messages, dtype="<u8").reshape(n, 4).T  # type: ignore
+        a[4] = 0x01
+        a[16] = 0x8000000000000000
+        for rc in self.round_constants:
+            for x in range(5):
+                xor(a[x], a[x + 5], out=c[x])
+                xor(c[x], a[x + 10], out=c[x])
+                xor(c[x], a[x + 15], out=c[x])
+                xor(c[x], a[x + 20], out=c[x])
+            for x in range(5):
+                shl(c[(x + 1) % 5], one, out=d[x])
+                shr(c[(x + 1) % 5], s63, out=t)
+                bor(d[x], t, out=d[x])
+                xor(d[x], c[(x - 1) % 5], out=d[x])
+            for src, dst, rot, rot_back in self.rho_pi:
+                xor(a[src], d[src % 5], out=a[src])
+                if rot:
+                    shl(a[src], rot, out=b[dst])
+                    shr(a[src], rot_back, out=t)
+                    bor(b[dst], t, out=b[dst])
+                else:
+                    b[dst] = a[src]
+            for y in range(0, 25, 5):
+                for x in range(5):
+                    inv(b[y + (x + 1) % 5], out=t)
+                    band(t, b[y + (x + 2) % 5], out=t)
+                    xor(b[y + x], t, out=a[y + x])
+            xor(a[0], rc, out=a[0])
+        return np.ascontiguousarray(a[0:4].T).view(np.uint8).reshape(n, 32)  # type: ignore
+
+
+def _solve_for_nonce_block_batched(
+    nonce_start: int,
+    nonce_end: int,
+    block_and_key_hash_bytes: bytes,
+    block_number: int,
+    block_hash: str,
+    hasher: _BatchKeccak256,
+) -> POWSolution | None:
+    """
+    Same as `_solve_for_nonce_block`, `hasher.batch_size` nonces at a time.
+
+    The sha256 pre seals still go through hashlib one by one (it is cheap),
+    the keccak step and the difficulty check run on the whole batch. Nonces
+    past `nonce_end` in the last batch are hashed but never returned.
+    """
+    sha256 = hashlib.sha256
+    block_and_key = block_and_key_hash_bytes[:32]
+    # the top word of a seal bounds its value, only the seals under it are
+    # checked exactly
+    top_threshold = np.uint64(SEAL_THRESHOLD >> 192)  # type: ignore
+    for batch_start in range(nonce_start, nonce_end, hasher.batch_size):
+        pre_seals = b"".join(
+            [
+                sha256(nonce.to_bytes(8, "little") + block_and_key).digest()
+                for nonce in range(batch_start, batch_start + hasher.batch_size)
+            ]
+        )
+        seals = hasher.digest(pre_seals)
+        top = seals[:, :8].copy().view(">u8").ravel()
+        for idx in np.flatnonzero(top <= top_threshold):  # type: ignore
+            nonce = batch_start + int(idx)
+            seal = seals[idx].tobytes()
+            if nonce < nonce_end and _seal_meets_difficulty(seal):
+                return POWSolution(nonce, block_number, seal, block_hash)
+    return None
+
+
+def solve_nonce_range(
+    nonce_start: int,
+    nonce_end: int,
+    block_and_key_hash_bytes: bytes,
+    block_number: int,
+    block_hash: str,
+    hasher: _BatchKeccak256 | None = None,
+) -> POWSolution | None:
+    """
+    Searches `[nonce_start, nonce_end)` for a seal meeting the difficulty,
+    with the batched backend when a hasher is given and one nonce at a time
+    otherwise.
+    """
+    if hasher is None:
+        return _solve_for_nonce_block(
+            nonce_start,
+            nonce_end,
+            block_and_key_hash_bytes,
+            block_number,
+            block_hash,
+        )
+    return _solve_for_nonce_block_batched(
+        nonce_start,
+        nonce_end,
+        block_and_key_hash_bytes,
+        block_number,
+        block_hash,
+        hasher,
+    )
+
+
+def _make_hasher(batch_size: int | None) -> _BatchKeccak256 | None:
+    """The batched backend, or None when numpy is missing or batching is off."""
+    if np is None or not batch_size:
+        return None
+    return _BatchKeccak256(batch_size)
+
+
+def benchmark_hash_rate(
+    seconds: float = 3.0, batch_size: int = BATCH_SIZE
+) -> dict[str, float]:
+    """
+    Measures the single core hash rate of the scalar and batched backends.
+
+    Returns:
+        Hashes per second of each backend, and the speedup of the batched one.
+    """
+    block_and_key_hash_bytes = os.urandom(32)
+
+    def rate(hasher: _BatchKeccak256 | None, step: int) -> float:
+        hashes = 0
+        nonce = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            solve_nonce_range(
+                nonce, nonce + step, block_and_key_hash_bytes, 0, "", hasher
+            )
+            nonce += step
+            hashes += step
+        return hashes / (time.perf_counter() - start)
+
+    result = {"scalar": rate(None, 10_000)}
+    hasher = _make_hasher(batch_size)
+    if hasher is not None:
+        result["batched"] = rate(hasher, batch_size)
+        result["speedup"] = result["batched"] / result["scalar"]
+    return result
+
+
 def get_cpu_count():
     """
     Gets the number of allowed CPU cores for the current process.
@@ -486,12 +731,25 @@ def get_cpu_count():
         return count
 
 
+def worker_hash_rates(
+    workers: list["_Solver"], elapsed: float
+) -> list[float]:
+    """
+    Hashes per second of each solver process over `elapsed` seconds.
+    """
+    elapsed = max(elapsed, 1e-9)
+    return [worker.hash_count.value / elapsed for worker in workers]
+
+
 def solve_for_difficulty_fast(
     c_client: TorusClient,
     key: Keypair,
     node_url: str,
     num_processes: Optional[int] = None,
     update_interval: Optional[int] = None,
+    batch_size: Optional[int] = BATCH_SIZE,
+    on_hash_rate: Optional[Callable[[list[float]], None]] = None,
+    report_interval: float = 5.0,
 ):
     """
     Solves the proof-of-work using multiple processes.
@@ -505,6 +763,11 @@ def solve_for_difficulty_fast(
         key: The Keypair used for signing.
         num_processes: The number of solver processes to create (default: number of CPU cores).
         update_interval: The interval at which the solvers update their progress (default: 500,000).
+        batch_size: Nonces hashed per call by the batched (numpy) backend,
+          0 or None hashes them one at a time.
+        on_hash_rate: Called every `report_interval` seconds, and once when a
+          solution is found, with the hashes per second of each worker.
+        report_interval: Seconds between hash rate reports.
 
     Returns:
         A POWSolution object if a solution is found, None otherwise.
@@ -548,17 +811,24 @@ def solve_for_difficulty_fast(
             key,
             node_url,
             mp_context,
+            batch_size,
         )
         for i in range(num_processes)
     ]
 
+    start_time = time.time()
     for worker in solvers:
         worker.start()
 
     solution = None
     current_block = None
+    last_report = start_time
 
     while True:
+        now = time.time()
+        if on_hash_rate is not None and now - last_report > report_interval:
+            last_report = now
+            on_hash_rate(worker_hash_rates(solvers, last_report - start_time))
         try:
             solution = solution_queue.get(block=True, timeout=0.25)
             if solution is not None:
@@ -577,15 +847,20 @@ def solve_for_difficulty_fast(
             pass
 
     stopEvent.set()
-    print("Finished")
+    rates = worker_hash_rates(solvers, time.time() - start_time)
+    total_rate = sum(rates)
+    print(
+        f"Finished at {total_rate:,.0f} H/s "
+        f"({total_rate / len(rates):,.0f} H/s per worker)"
+    )
+    if on_hash_rate is not None:
+        on_hash_rate(rates)
     _terminate_workers_and_wait_for_exit(solvers)
 
     return solution
 
 
 if __name__ == "__main__":
-    import time
-
     from torusdk._common import get_node_url
     from torusdk.key import load_keypair
 
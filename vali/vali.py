@@ -1,6 +1,8 @@
 
 import commune as c
 import os
+import threading
+import concurrent.futures
 import pandas as pd
 from typing import *
 import inspect
@@ -10,7 +12,8 @@ class Vali:
 
                     network= 'local', # for local chain:test or test # for testnet chain:main or main # for mainnet
                     search : Optional[str] =  None, # (OPTIONAL) the search string for the network 
-                    batch_size : int = 128, # the batch size of the most parallel tasks
+                    batch_size : int = 128, # the number of evaluations in flight (sliding window)
+                    persist_batch_size : int = 64, # the number of results written per background flush
                     task : str= 'task', # score function
                     key : str = None, # the key for the module
                     tempo : int = 60, # the time between epochs
@@ -27,6 +30,10 @@ class Vali:
         self.subnet = None    
         self.timeout = timeout
         self.batch_size = batch_size
+        self.persist_batch_size = persist_batch_size
+        self.url2client = {} # clients are reused across epochs
+        self.save_threads = []
+        self.stragglers = set() # timed out evaluations that are still running, they keep their slot
         self.verbose = verbose
         self.key = c.get_key(key)
         self.set_task(task)
@@ -111,12 +118,23 @@ class Vali:
             else:
                 raise ValueError(f'Module not found {module}')
         return module
-    def forward(self,  module:Union[str, dict], **params):
+    def get_client(self, url:str):
+        """pooled client per url"""
+        if url not in self.url2client:
+            self.url2client[url] = c.client(url, key=self.key)
+        return self.url2client[url]
+
+    def forward(self,  module:Union[str, dict], persist:bool=True, **params):
         module = self.get_module(module)
         module['time'] = c.time()
-        client = c.client(module['url'], key=self.key)
+        client = self.get_client(module['url'])
         c.print(f'Sample(task={self.task.info["name"]} module={module["name"]} url={module["url"]})')
-        result = self.task.forward(client, **params)
+        try:
+            result = self.task.forward(client, **params)
+        except Exception as e:
+            # the connection may be broken, build a fresh client next time
+            self.url2client.pop(module['url'], None)
+            raise e
         # prepare the module for the result
         assert 'score' in result, f'Module {module["name"]} does not have a score {result}'
         data = {**module, **result}
@@ -129,9 +147,21 @@ class Vali:
         data['path'] = self.get_module_path(data['key'])
         data['proof'] = c.sign(c.hash(data), key=self.key, mode='dict')
         self.verify_proof(data) # verify the proof
-        c.put_json(data['path'], data)
+        if persist:
+            c.put_json(data['path'], data)
         return data
 
+    def save_results(self, results:List[dict]):
+        for data in results:
+            c.put_json(data['path'], data)
+        return len(results)
+
+    def save_results_background(self, results:List[dict]):
+        """writes a batch of results off the evaluation path"""
+        thread = threading.Thread(target=self.save_results, args=(results,), daemon=True)
+        thread.start()
+        self.save_threads = [t for t in self.save_threads if t.is_alive()] + [thread]
+
     def get_module_path(self, module:str):
         return self.storage_path + '/' + module + '.json'
 
@@ -145,10 +175,21 @@ class Vali:
         assert c.verify(proof), f'Invalid Proof {proof}'
 
     def epoch(self, features=['score', 'key', 'duration', 'name'], **kwargs):
+        scoreboard = None
+        for scoreboard in self.epoch_stream(features=features, **kwargs):
+            pass
+        return scoreboard
+
+    def epoch_stream(self, features=['score', 'key', 'duration', 'name'], stream_every:int=None, **kwargs):
+        """
+        keeps batch_size evaluations in flight (a new one starts as soon as one finishes),
+        yields the partial scoreboard every stream_every results and the final one at the end.
+        an evaluation that timed out but can not be cancelled keeps its slot until it returns
+        """
         self.sync()
-        n = len(self.modules)
-        batches = [self.modules[i:i+self.batch_size] for i in range(0, n, self.batch_size)]
-        num_batches = len(batches)
+        modules = list(self.modules)
+        n = len(modules)
+        stream_every = stream_every or self.batch_size
         epoch_info = {
             'epochs' : self.epochs,
             'task': self.task.info['name'],
@@ -156,32 +197,72 @@ class Vali:
             'batch_size': self.batch_size,
         }
         results = []
-        for i, batch in enumerate(batches):
-            futures = []
-            future2module = {}
-            for m in batch:
-                print(f'Batch {i}/{num_batches} {m["name"]} {m["url"]}')
-                future = c.submit(self.forward, [m], timeout=self.timeout)
+        unsaved = []
+        future2module = {}
+        future2time = {}
+        idx = 0
+        n_streamed = 0
+        while idx < n or future2module:
+            self.stragglers = {future for future in self.stragglers if not future.done()}
+            # top up the window
+            while idx < n and len(future2module) + len(self.stragglers) < self.batch_size:
+                m = modules[idx]
+                idx += 1
+                future = c.submit(self.forward, {'module': m, 'persist': False}, timeout=self.timeout)
                 future2module[future] = m
-                
-            for future in c.as_completed(future2module):
+                future2time[future] = c.time()
+            if future2time:
+                wait_timeout = max(min(future2time.values()) + self.timeout - c.time(), 0)
+            else:
+                # the window is full of stragglers, wait for one to free its slot
+                wait_timeout = self.timeout
+            done, _ = concurrent.futures.wait(list(future2module) + list(self.stragglers), 
+                                              timeout=wait_timeout, 
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future not in future2module:
+                    continue
+                m = future2module.pop(future)
+                future2time.pop(future)
                 try:
-                    m = future2module[future]
                     result = future.result()
                     if isinstance(result, dict) and 'score' in result:
                         results.append(result)
+                        unsaved.append(result)
                     else: 
                         c.print(f'Error({m["name"]}, result={result})')
                 except Exception as e:
-                    print(f'Error in batch {i} {c.detailed_error(e)}')
-
+                    print(f'Error({m["name"]}) {c.detailed_error(e)}')
+            # give up on evaluations that passed the timeout
+            for future, t in list(future2time.items()):
+                if c.time() - t > self.timeout:
+                    m = future2module.pop(future)
+                    future2time.pop(future)
+                    if not future.cancel():
+                        self.stragglers.add(future)
+                    c.print(f'Timeout({m["name"]}, timeout={self.timeout})')
+            if len(unsaved) >= self.persist_batch_size:
+                self.save_results_background(unsaved)
+                unsaved = []
+            if len(results) - n_streamed >= stream_every and (idx < n or future2module):
+                n_streamed = len(results)
+                yield self.scoreboard(results, features)
+        self.save_results(unsaved)
+        for thread in self.save_threads:
+            thread.join()
+        self.save_threads = []
         self.epochs += 1
         self.epoch_time = c.time()
         self.vote(results)
         if len(results) > 0:
-            return c.df(results)[features].sort_values(by='score', ascending=False)
+            yield self.scoreboard(results, features)
         else:
-            return c.df([{'success': False, 'msg': 'No results to vote on', 'epoch_info': epoch_info}])
+            yield c.df([{'success': False, 'msg': 'No results to vote on', 'epoch_info': epoch_info}])
+
+    def scoreboard(self, results:List[dict]=None, features=['score', 'key', 'duration', 'name']):
+        if results == None:
+            return self.results()
+        return c.df(results)[features].sort_values(by='score', ascending=False)
 
     @property
     def vote_staleness(self):
@@ -198,8 +279,8 @@ class Vali:
         assert all('score' in r for r in results), f'No score in results {results}'
         assert all('key' in r for r in results), f'No key in results {results}'
         return self.net.vote(
-                    modules=[m['key'] for m in modules], 
-                    weights=[m['score'] for m in modules],  
+                    modules=[m['key'] for m in results], 
+                    weights=[m['score'] for m in results],  
                     key=self.key, 
                     subnet=self.subnet
                     )